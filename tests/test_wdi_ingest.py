@@ -0,0 +1,59 @@
+"""
+استيراد ملف WDI المجمع (أرشيف صغير ثابت) ثم جلب البيانات من المخزن المحلي دون أي طلب شبكة
+
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+import tempfile
+
+# المخزن وعنوان API يُقرآن عند استيراد wbb5: مجلد مؤقت وعنوان لا يستجيب
+os.environ["WEBBANK_CACHE_DIR"] = tempfile.mkdtemp(prefix="wbb5-test-")
+os.environ["WORLD_BANK_API_URL"] = "http://127.0.0.1:9/v2"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+import wbb5
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "wdi_sample.zip")
+INDICATORS = [
+    {"code": "NY.GDP.MKTP.CD", "name": "GDP"},
+    {"code": "FP.CPI.TOTL.ZG", "name": "Inflation"},
+]
+
+
+@pytest.fixture
+def no_network(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError(f"unexpected network call: {args}")
+
+    monkeypatch.setattr(wbb5, "http_get", refuse)
+    monkeypatch.setattr(wbb5, "_fetch_world_bank_page", refuse)
+
+
+def test_ingest_fixture_then_fetch_offline(no_network):
+    result = wbb5.ingest_wdi_archive(FIXTURE)
+    assert result == {"rows": 6, "cells": 36, "values": 35, "indicators": 2, "countries": 3}
+
+    df, failed_requests = wbb5.fetch_world_bank_data(["DZA", "EGY", "MAR"], INDICATORS, 2015, 2020)
+
+    assert failed_requests == 0
+    assert len(df) == 18
+    assert set(df["CountryCode"]) == {"DZA", "EGY", "MAR"}
+
+    cells = df.set_index(["CountryCode", "السنة"])
+    assert cells.loc[("DZA", 2017), "GDP"] == 1.70e11
+    assert cells.loc[("MAR", 2019), "Inflation"] == 0.20
+    assert cells.loc[("EGY", 2017), "Inflation"] == 29.51
+    # الخلية الفارغة في الملف محفوظة كـ NULL: موجودة في المخزن فلا تُطلب من API
+    assert cells["Inflation"].isna().sum() == 1
+    assert pd.isna(cells.loc[("EGY", 2020), "Inflation"])
+
+
+def test_ingest_selected_indicators(no_network):
+    result = wbb5.ingest_wdi_archive(FIXTURE, indicator_codes=["fp.cpi.totl.zg"])
+    assert result["indicators"] == 1
+    assert result["rows"] == 3
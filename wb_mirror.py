@@ -0,0 +1,275 @@
+"""
+╔══════════════════════════════════════════════════════════════════════════════╗
+║     🪞 نسخة مرآة محلية لـ API البنك الدولي - World Bank API Mirror           ║
+║                                                                              ║
+║     خادم صغير (المكتبة القياسية فقط) يقدّم استجابات مسجّلة بنفس صيغة API v2   ║
+║     وترقيم صفحاته، للبيئات المعزولة عن الإنترنت واختبارات الحمل القابلة للتكرار ║
+╚══════════════════════════════════════════════════════════════════════════════╝
+
+المسارات المدعومة:
+    /v2/country
+    /v2/indicator
+    /v2/country/{c1;c2;...|all}/indicator/{code}?date=2000:2020
+
+الاستخدام:
+    # تسجيل قوائم الدول والمؤشرات (ومشاهدات مؤشرات محددة) من API الحقيقي
+    python wb_mirror.py record --out recordings --indicators NY.GDP.MKTP.CD FP.CPI.TOTL.ZG
+
+    # تشغيل الخادم (المشاهدات من التسجيلات، ثم من مخزن wbb5 المحلي observations.sqlite)
+    python wb_mirror.py serve --data recordings --port 8000
+
+    # توجيه اللوحة إليه
+    WORLD_BANK_API_URL=http://127.0.0.1:8000/v2 streamlit run wbb5.py
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPSTREAM_API_URL = "https://api.worldbank.org/v2"
+DEFAULT_PER_PAGE = 50
+
+# نفس موقع مخزن المشاهدات في wbb5.py
+CACHE_DIR = os.environ.get("WEBBANK_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "webbank"))
+DEFAULT_STORE_PATH = os.path.join(CACHE_DIR, "observations.sqlite")
+
+INVALID_VALUE_MESSAGE = [{"message": [{"id": "120", "key": "Invalid value", "value": "The provided parameter value is not valid"}]}]
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 1. مصادر البيانات: ملفات التسجيل ومخزن المشاهدات
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def _observation_file(data_dir, code):
+    """مسار ملف مشاهدات مؤشر مسجّل"""
+    return os.path.join(data_dir, "observations", f"{code.upper()}.json")
+
+
+def load_recording(data_dir, name):
+    """قراءة قائمة عناصر مسجّلة (country.json أو indicator.json)، أو None إذا لم توجد"""
+
+    path = os.path.join(data_dir, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def observations_from_recording(data_dir, code, countries, start_year, end_year):
+    """مشاهدات مؤشر من ملف مسجّل مع تصفية الدول والسنوات، أو None إذا لم يُسجَّل"""
+
+    path = _observation_file(data_dir, code)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        items = json.load(f)
+
+    return [
+        item for item in items
+        if (countries is None or (item.get("countryiso3code") or item["country"]["id"]).upper() in countries)
+        and start_year <= int(item["date"]) <= end_year
+    ]
+
+
+def observations_from_store(store_path, code, countries, start_year, end_year):
+    """مشاهدات مؤشر من مخزن wbb5 المحلي (بما فيه ما استُورد من ملف WDI المجمع)، أو None"""
+
+    if not store_path or not os.path.exists(store_path):
+        return None
+
+    query = "SELECT country, country_name, year, value FROM observations WHERE indicator = ? AND year BETWEEN ? AND ?"
+    params = [code, start_year, end_year]
+    if countries is not None:
+        query += f" AND country IN ({','.join('?' * len(countries))})"
+        params.extend(sorted(countries))
+    query += " ORDER BY country, year DESC"
+
+    conn = sqlite3.connect(f"file:{store_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    if not rows:
+        return None
+
+    return [
+        {
+            "indicator": {"id": code, "value": code},
+            "country": {"id": country, "value": name or country},
+            "countryiso3code": country,
+            "date": str(year),
+            "value": value,
+            "unit": "",
+            "obs_status": "",
+            "decimal": 0
+        }
+        for country, name, year, value in rows
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 2. الخادم
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def paginate(items, query):
+    """تقسيم العناصر إلى صفحات بصيغة API البنك الدولي: [البيانات الوصفية، العناصر]"""
+
+    try:
+        per_page = max(1, int(query.get("per_page", [DEFAULT_PER_PAGE])[0]))
+        page = max(1, int(query.get("page", ["1"])[0]))
+    except ValueError:
+        return INVALID_VALUE_MESSAGE
+
+    total = len(items)
+    pages = max(1, math.ceil(total / per_page))
+    chunk = items[(page - 1) * per_page: page * per_page]
+    return [{"page": page, "pages": pages, "per_page": per_page, "total": total}, chunk or None]
+
+
+def _parse_date_range(value):
+    """تحويل date=2000:2020 أو date=2015 إلى (البداية، النهاية)"""
+
+    match = re.fullmatch(r"(\d{4})(?::(\d{4}))?", value or "")
+    if not match:
+        return 1960, 2100
+    start = int(match.group(1))
+    return start, int(match.group(2) or start)
+
+
+def make_handler(data_dir, store_path):
+    """صنع معالج الطلبات المرتبط بمجلد التسجيلات ومسار المخزن"""
+
+    class MirrorHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            query = urllib.parse.parse_qs(url.query)
+            parts = [p for p in url.path.split("/") if p]
+
+            # تجاهل البادئة /v2 وبادئة اللغة (مثل /en)
+            if parts and parts[0] == "v2":
+                parts = parts[1:]
+            if len(parts) > 1 and re.fullmatch(r"[a-z]{2}", parts[0]):
+                parts = parts[1:]
+
+            body = self.route(parts, query)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_json(body)
+
+        def route(self, parts, query):
+            if parts == ["country"] or parts == ["indicator"]:
+                items = load_recording(data_dir, parts[0])
+                return None if items is None else paginate(items, query)
+
+            if len(parts) == 4 and parts[0] == "country" and parts[2] == "indicator":
+                countries = None if parts[1].lower() == "all" else {c.upper() for c in parts[1].split(";") if c}
+                start_year, end_year = _parse_date_range(query.get("date", [""])[0])
+
+                items = observations_from_recording(data_dir, parts[3], countries, start_year, end_year)
+                if items is None:
+                    items = observations_from_store(store_path, parts[3], countries, start_year, end_year)
+                return INVALID_VALUE_MESSAGE if items is None else paginate(items, query)
+
+            return None
+
+        def send_json(self, body):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json;charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return MirrorHandler
+
+
+def serve(data_dir, store_path, host, port):
+    """تشغيل الخادم حتى الإيقاف (Ctrl+C)"""
+
+    server = ThreadingHTTPServer((host, port), make_handler(data_dir, store_path))
+    print(f"World Bank mirror: http://{host}:{server.server_address[1]}/v2 (data: {data_dir}, store: {store_path or '-'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 3. التسجيل من API الحقيقي
+# ═══════════════════════════════════════════════════════════════════════════════
+
+
+def fetch_all_pages(url, params, per_page=20000):
+    """جلب جميع صفحات استعلام من API الحقيقي وإرجاع العناصر"""
+
+    items = []
+    page = 1
+    while True:
+        query = urllib.parse.urlencode({**params, "format": "json", "per_page": per_page, "page": page})
+        with urllib.request.urlopen(f"{url}?{query}", timeout=120) as response:
+            data = json.load(response)
+        if not (isinstance(data, list) and len(data) > 1):
+            raise ValueError(f"استجابة غير متوقعة من {url}: {data}")
+        items.extend(data[1] or [])
+        if page >= int(data[0].get("pages", 1) or 1):
+            return items
+        page += 1
+
+
+def record(out_dir, indicators, date, upstream):
+    """تسجيل قائمتي الدول والمؤشرات، ومشاهدات المؤشرات المطلوبة لجميع الدول"""
+
+    os.makedirs(os.path.join(out_dir, "observations"), exist_ok=True)
+
+    for name in ("country", "indicator"):
+        items = fetch_all_pages(f"{upstream}/{name}", {})
+        with open(os.path.join(out_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False)
+        print(f"{name}: {len(items):,}")
+
+    for code in indicators:
+        items = fetch_all_pages(f"{upstream}/country/all/indicator/{code}", {"date": date})
+        with open(_observation_file(out_dir, code), "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False)
+        print(f"{code}: {len(items):,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="نسخة مرآة محلية لـ API البنك الدولي")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="تشغيل الخادم")
+    serve_parser.add_argument("--data", default="recordings", help="مجلد التسجيلات")
+    serve_parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="مخزن المشاهدات (اختياري، '' لتعطيله)")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+
+    record_parser = commands.add_parser("record", help="تسجيل الاستجابات من API الحقيقي")
+    record_parser.add_argument("--out", default="recordings", help="مجلد التسجيلات")
+    record_parser.add_argument("--indicators", nargs="*", default=[], help="أكواد المؤشرات المطلوب تسجيل مشاهداتها")
+    record_parser.add_argument("--date", default="1960:2030", help="الفترة (مثل 2000:2023)")
+    record_parser.add_argument("--upstream", default=UPSTREAM_API_URL)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.data, args.store, args.host, args.port)
+    else:
+        record(args.out, args.indicators, args.date, args.upstream.rstrip("/"))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,29 @@ import numpy as np
 import requests
 import json
 import re
+import os
+import time
+import random
+import sqlite3
+import threading
+import bisect
+import hashlib
+import pickle
+import csv
+import zipfile
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from io import BytesIO
-from datetime import datetime
+from io import BytesIO, TextIOWrapper
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
 import tempfile
+import argparse
+import sys
 import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
 # Google Gemini SDK
 try:
@@ -29,9 +45,73 @@ try:
 except ImportError:
     GENAI_AVAILABLE = False
 
+# محللات JSON سريعة (اختيارية): msgspec بمخطط مُنمَّط ثم orjson، وإلا المكتبة القياسية
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Model Configuration - Gemini 3.0 Flash Preview
 GEMINI_MODEL_NAME = "gemini-3-flash-preview"
 
+# عنوان API البنك الدولي (يمكن توجيهه إلى نسخة مرآة محلية مثل wb_mirror.py في البيئات المعزولة)
+WORLD_BANK_API_URL = os.environ.get("WORLD_BANK_API_URL", "https://api.worldbank.org/v2").rstrip("/")
+
+# إعدادات الجلب المتوازي من API البنك الدولي
+MAX_FETCH_WORKERS = int(os.environ.get("WB_MAX_FETCH_WORKERS", "8"))
+COUNTRIES_PER_REQUEST = 50
+WB_PAGE_SIZE = 1000
+
+# عميل HTTP المشترك: إعادة المحاولة مع تراجع أُسّي وحدود التزامن لكل خادم
+HTTP_MAX_RETRIES = 4
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 30.0
+HTTP_RETRY_STATUSES = {429, 500, 502, 503, 504}
+HTTP_MAX_CONCURRENCY_PER_HOST = int(os.environ.get("WB_MAX_CONCURRENCY_PER_HOST", "8"))
+
+# التخزين المحلي الدائم (مشترك بين جميع الجلسات والعمليات ويبقى بعد إعادة التشغيل)
+CACHE_DIR = os.environ.get("WEBBANK_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "webbank"))
+OBSERVATION_STORE_PATH = os.path.join(CACHE_DIR, "observations.sqlite")
+OBSERVATION_TTL_SECONDS = int(os.environ.get("WB_OBSERVATION_TTL_DAYS", "7")) * 86400
+INDICATOR_INDEX_PATH = os.path.join(CACHE_DIR, "indicator_index.pkl")
+KV_CACHE_PATH = os.path.join(CACHE_DIR, "cache.sqlite")
+QUERY_PARSE_CACHE_TTL_SECONDS = 30 * 86400
+QUERY_PARSE_CACHE_MAX_ENTRIES = 2000
+# ملف WDI المجمع (جميع المؤشرات × جميع الدول) لاستيراده دفعة واحدة إلى مخزن المشاهدات
+WDI_BULK_URL = os.environ.get("WDI_BULK_URL", "https://databank.worldbank.org/data/download/WDI_CSV.zip")
+WDI_INGEST_BATCH_ROWS = 50000
+REPORT_CACHE_TTL_SECONDS = int(os.environ.get("WB_REPORT_CACHE_TTL_HOURS", "24")) * 3600
+REPORT_CACHE_MAX_ENTRIES = 200
+
+# ذاكرة الرسوم البيانية: عدد الأشكال المحفوظة (كائنات go.Figure) قبل إزالة الأقدم استخداماً
+FIGURE_CACHE_MAX_ENTRIES = 128
+CHART_THEME = "warm-gold"
+
+# وضع البيانات الكبيرة: فوق هذا العدد من النقاط في الرسم تُستخدم WebGL وتُختصر السلاسل (قابل للتعديل من الشريط الجانبي)
+DEFAULT_CHART_POINTS_BUDGET = 5000
+
+# بعد فشل جلب قائمة دول API لا يُعاد الجلب قبل هذه المدة (البحث يكتفي بالقاعدة المحلية)
+COUNTRY_CATALOGUE_RETRY_SECONDS = 300
+
+# تبويب الرسوم: عدد الرسوم في كل صفحة (تُبنى وتُرسل رسوم الصفحة الحالية فقط)
+CHARTS_PER_PAGE = 4
+
+# الشبكة المصغرة: شكل واحد لجميع المؤشرات؛ حد أقصى للوحات وحد أدنى لنقاط كل لوحة وارتفاع كل صف
+SMALL_MULTIPLES_MAX_FACETS = 24
+SMALL_MULTIPLES_MIN_FACET_POINTS = 500
+SMALL_MULTIPLES_ROW_HEIGHT = 260
+
+# الدردشة: ميزانية سياق البيانات (رموز تقريبية) وعدد الأدوار المحتفظ بها في الجلسة
+CHAT_CONTEXT_TOKEN_BUDGET = 600
+CHAT_HISTORY_WINDOW = 6
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # 1. إعدادات الصفحة والتصميم المتقدم
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -561,61 +641,323 @@ st.markdown("""
 # 2. جلب جميع المؤشرات والدول من API البنك الدولي
 # ═══════════════════════════════════════════════════════════════════════════════
 
+@st.cache_resource(show_spinner=False)
+def get_http_client():
+    """
+    عميل HTTP مشترك على مستوى العملية: جلسة واحدة بتجميع الاتصالات (keep-alive)،
+    حدود تزامن لكل خادم، وعدادات للطلبات وإعادة المحاولة والإخفاقات
+    """
+    
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=max(MAX_FETCH_WORKERS, HTTP_MAX_CONCURRENCY_PER_HOST),
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    
+    return {
+        "session": session,
+        "lock": threading.Lock(),
+        "host_limits": {},
+        "stats": {"requests": 0, "retries": 0, "failures": 0, "last_error": ""}
+    }
+
+
+def _record_http_stat(client, key, error=None):
+    """تحديث عدادات العميل المشترك بأمان بين الخيوط"""
+    with client["lock"]:
+        client["stats"][key] += 1
+        if error:
+            client["stats"]["last_error"] = error
+
+
+def _host_semaphore(client, url):
+    """إشارة تحدّ من عدد الطلبات المتزامنة نحو الخادم نفسه"""
+    host = urlparse(url).netloc
+    with client["lock"]:
+        if host not in client["host_limits"]:
+            client["host_limits"][host] = threading.BoundedSemaphore(HTTP_MAX_CONCURRENCY_PER_HOST)
+        return client["host_limits"][host]
+
+
+def _retry_delay(attempt, response=None):
+    """مدة الانتظار قبل المحاولة التالية: Retry-After إن وُجد، وإلا تراجع أُسّي مع تشويش عشوائي"""
+    
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(HTTP_BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return min(HTTP_BACKOFF_MAX, max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()))
+            except (TypeError, ValueError):
+                pass
+    
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+def http_get(url, params=None, timeout=30, client=None):
+    """
+    طلب GET عبر العميل المشترك مع إعادة المحاولة عند أخطاء الشبكة والحالات المؤقتة (429/5xx)
+    يُرجع الاستجابة الأخيرة، أو None إذا فشلت جميع المحاولات؛ وكل فشل نهائي يُسجَّل في العداد
+    """
+    
+    client = client or get_http_client()
+    semaphore = _host_semaphore(client, url)
+    
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        response = None
+        error = None
+        _record_http_stat(client, "requests")
+        
+        try:
+            with semaphore:
+                response = client["session"].get(url, params=params, timeout=timeout)
+            if response.status_code not in HTTP_RETRY_STATUSES:
+                if response.status_code != 200:
+                    _record_http_stat(client, "failures", f"HTTP {response.status_code}: {url}")
+                return response
+            error = f"HTTP {response.status_code}: {url}"
+        except requests.RequestException as e:
+            error = f"{type(e).__name__}: {url}"
+        
+        if attempt < HTTP_MAX_RETRIES:
+            _record_http_stat(client, "retries")
+            time.sleep(_retry_delay(attempt, response))
+    
+    _record_http_stat(client, "failures", error)
+    return response
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# فك ترميز الاستجابات: إسقاط العناصر إلى صفوف بالحقول المستخدمة فقط
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _observation_record(item):
+    """(ISO3، اسم الدولة، السنة كنص، القيمة) من عنصر مشاهدة"""
+    country = item.get("country") or {}
+    iso_code = item.get("countryiso3code") or country.get("id", "")
+    return iso_code, country.get("value") or iso_code, item.get("date"), item.get("value")
+
+
+def _indicator_record(item):
+    """(الكود، الاسم، المصدر) من عنصر كتالوج المؤشرات"""
+    return item.get("id", ""), item.get("name", ""), (item.get("source") or {}).get("value", "")
+
+
+def _country_record(item):
+    """(الكود، الاسم، المنطقة، فئة الدخل) من عنصر قائمة الدول"""
+    return (
+        item.get("id", ""),
+        item.get("name", ""),
+        (item.get("region") or {}).get("value", ""),
+        (item.get("incomeLevel") or {}).get("value", "")
+    )
+
+
+WB_RECORD_PROJECTORS = {
+    "observation": _observation_record,
+    "indicator": _indicator_record,
+    "country": _country_record,
+}
+
+if MSGSPEC_AVAILABLE:
+    # مخططات مُنمَّطة: msgspec يتجاهل باقي الحقول دون إنشاء قواميس لها
+    class _WBRef(msgspec.Struct):
+        id: str | None = ""
+        value: str | None = ""
+    
+    class _WBMeta(msgspec.Struct):
+        pages: int | str = 1
+        total: int | str | None = None
+    
+    class _WBObservation(msgspec.Struct):
+        country: _WBRef | None = None
+        countryiso3code: str | None = ""
+        date: str | None = None
+        value: float | None = None
+    
+    class _WBIndicator(msgspec.Struct):
+        id: str | None = ""
+        name: str | None = ""
+        source: _WBRef | None = None
+    
+    class _WBCountry(msgspec.Struct):
+        id: str | None = ""
+        name: str | None = ""
+        region: _WBRef | None = None
+        incomeLevel: _WBRef | None = None
+    
+    def _observation_struct_record(item):
+        country = item.country or _WBRef()
+        iso_code = item.countryiso3code or country.id or ""
+        return iso_code, country.value or iso_code, item.date, item.value
+    
+    WB_PAGE_DECODERS = {
+        "observation": (msgspec.json.Decoder(tuple[_WBMeta, list[_WBObservation] | None]), _observation_struct_record),
+        "indicator": (
+            msgspec.json.Decoder(tuple[_WBMeta, list[_WBIndicator] | None]),
+            lambda item: (item.id or "", item.name or "", item.source.value or "" if item.source else "")
+        ),
+        "country": (
+            msgspec.json.Decoder(tuple[_WBMeta, list[_WBCountry] | None]),
+            lambda item: (
+                item.id or "",
+                item.name or "",
+                item.region.value or "" if item.region else "",
+                item.incomeLevel.value or "" if item.incomeLevel else ""
+            )
+        ),
+    }
+
+
+def _decode_json(content):
+    """فك ترميز JSON بأسرع مكتبة متاحة"""
+    if MSGSPEC_AVAILABLE:
+        return msgspec.json.decode(content)
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _decode_world_bank_page(content, record=None):
+    """
+    فك ترميز صفحة [البيانات الوصفية، العناصر] من API البنك الدولي
+    record: نوع العنصر ("observation" أو "indicator" أو "country") لإرجاع صفوف بالحقول المستخدمة فقط
+    """
+    
+    if record and MSGSPEC_AVAILABLE:
+        decoder, project = WB_PAGE_DECODERS[record]
+        try:
+            meta, items = decoder.decode(content)
+            return {"pages": meta.pages, "total": meta.total}, [project(item) for item in items or []]
+        except msgspec.ValidationError:
+            pass  # شكل غير متوقع (مثل رسالة خطأ من API): المسار العام
+    
+    data = _decode_json(content)
+    if not (isinstance(data, list) and len(data) > 1):
+        return {}, []
+    
+    meta, items = data[0] or {}, data[1] or []
+    if record:
+        project = WB_RECORD_PROJECTORS[record]
+        items = [project(item) for item in items]
+    return meta, items
+
+
+def _fetch_world_bank_page(url, params, page, client=None, record=None):
+    """جلب صفحة واحدة من API البنك الدولي وإرجاع (البيانات الوصفية، العناصر)"""
+    
+    response = http_get(url, params={**params, "page": page}, timeout=30, client=client)
+    
+    if response is None or response.status_code != 200:
+        return {}, []
+    
+    return _decode_world_bank_page(response.content, record)
+
+
+def _page_count(meta):
+    """عدد الصفحات الكلي من البيانات الوصفية (data[0]) للاستجابة"""
+    try:
+        return max(1, int(meta.get("pages", 1) or 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _expected_total(meta):
+    """عدد العناصر الكلي المعلن في البيانات الوصفية، أو None إذا لم يُذكر"""
+    try:
+        return int(meta.get("total"))
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_world_bank_pages(url, params, per_page=WB_PAGE_SIZE, record=None):
+    """
+    جلب جميع صفحات استعلام من API البنك الدولي
+    تُقرأ الصفحة الأولى لمعرفة عدد الصفحات، ثم تُجلب بقية الصفحات بالتوازي
+    وتُعاد العناصر صفحة بصفحة فور وصولها (مولّد)
+    فشل أي صفحة، أو عدد عناصر أقل من total المعلن، يرفع RuntimeError بدلاً من إرجاع نتيجة ناقصة بصمت
+    """
+    client = get_http_client()
+    params = {**params, "format": "json", "per_page": per_page}
+    meta, items = _fetch_world_bank_page(url, params, 1, client, record)
+    if not meta:
+        raise RuntimeError(f"World Bank page 1 failed: {url}")
+    expected = _expected_total(meta)
+    received = len(items)
+    yield items
+    
+    pages = _page_count(meta)
+    if pages > 1:
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_FETCH_WORKERS, pages - 1))) as executor:
+            futures = {
+                executor.submit(_fetch_world_bank_page, url, params, page, client, record): page
+                for page in range(2, pages + 1)
+            }
+            for future in as_completed(futures):
+                meta, items = future.result()
+                if not meta:
+                    for pending in futures:
+                        pending.cancel()
+                    raise RuntimeError(f"World Bank page {futures[future]}/{pages} failed: {url}")
+                received += len(items)
+                yield items
+    
+    if expected is not None and received < expected:
+        raise RuntimeError(f"World Bank result incomplete: {received}/{expected} items from {url}")
+
+
 @st.cache_data(ttl=86400, show_spinner=False)
 def fetch_all_indicators_from_api():
     """
     جلب جميع المؤشرات المتاحة من البنك الدولي (أكثر من 16,000 مؤشر)
+    يرفع استثناءً إذا تعذر جلب أي صفحة: لا يُخزَّن كتالوج ناقص في الذاكرة المؤقتة
     """
-    try:
-        url = "https://api.worldbank.org/v2/indicator"
-        params = {"format": "json", "per_page": 20000}
-        response = requests.get(url, params=params, timeout=60)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if isinstance(data, list) and len(data) > 1 and data[1]:
-                indicators = []
-                for item in data[1]:
-                    indicators.append({
-                        "code": item.get("id", ""),
-                        "name": item.get("name", ""),
-                        "source": item.get("source", {}).get("value", "") if item.get("source") else ""
-                    })
-                return pd.DataFrame(indicators)
-        return pd.DataFrame()
-    except Exception as e:
-        print(f"Error fetching indicators: {e}")
-        return pd.DataFrame()
+    url = f"{WORLD_BANK_API_URL}/indicator"
+    indicators = []
+    for page_items in fetch_world_bank_pages(url, {}, record="indicator"):
+        indicators.extend(page_items)
+    return pd.DataFrame(indicators, columns=["code", "name", "source"])
 
 
 @st.cache_data(ttl=86400, show_spinner=False)
 def fetch_all_countries_from_api():
     """
     جلب جميع الدول والمناطق من البنك الدولي (أكثر من 300 دولة)
+    يرفع استثناءً إذا تعذر جلب أي صفحة: لا تُخزَّن قائمة ناقصة في الذاكرة المؤقتة
+    """
+    url = f"{WORLD_BANK_API_URL}/country"
+    countries = []
+    for page_items in fetch_world_bank_pages(url, {}, per_page=500, record="country"):
+        countries.extend(page_items)
+    return pd.DataFrame(countries, columns=["code", "name", "region", "incomeLevel"])
+
+
+@st.cache_resource(show_spinner=False)
+def _countries_catalogue_state():
+    """وقت آخر فشل في جلب قائمة الدول (مشترك بين الجلسات) لتجنب تكرار المحاولة مع كل بحث"""
+    return {"failed_at": 0.0}
+
+
+def load_countries_catalogue():
     """
+    قائمة الدول من API، أو None إذا تعذر جلبها كاملة (يُكتفى حينها بقاعدة الدول المحلية)
+    بعد الفشل لا يُعاد الجلب قبل COUNTRY_CATALOGUE_RETRY_SECONDS: API غير المتاح يكلف
+    إعادة المحاولة مع التراجع (ثوانٍ) في كل بحث
+    """
+    state = _countries_catalogue_state()
+    if time.time() - state["failed_at"] < COUNTRY_CATALOGUE_RETRY_SECONDS:
+        return None
     try:
-        url = "https://api.worldbank.org/v2/country"
-        params = {"format": "json", "per_page": 500}
-        response = requests.get(url, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if isinstance(data, list) and len(data) > 1 and data[1]:
-                countries = []
-                for item in data[1]:
-                    region_value = item.get("region", {}).get("value", "") if item.get("region") else ""
-                    income_value = item.get("incomeLevel", {}).get("value", "") if item.get("incomeLevel") else ""
-                    countries.append({
-                        "code": item.get("id", ""),
-                        "name": item.get("name", ""),
-                        "region": region_value,
-                        "incomeLevel": income_value
-                    })
-                return pd.DataFrame(countries)
-        return pd.DataFrame()
+        return fetch_all_countries_from_api()
     except Exception as e:
         print(f"Error fetching countries: {e}")
-        return pd.DataFrame()
+        state["failed_at"] = time.time()
+        return None
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -770,568 +1112,763 @@ COUNTRIES_DATABASE = {
 # 3. البحث المحلي الذكي (بدون API)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def smart_local_search(query):
+# قاموس موسع للدول (عربي + إنجليزي + أكواد) - أكثر من 200 دولة
+COUNTRY_ALIASES = {
+    # ═══════════════════════════════════════════════════════════════════════
+    # الدول العربية
+    # ═══════════════════════════════════════════════════════════════════════
+    "الجزائر": "DZA", "جزائر": "DZA", "algeria": "DZA", "dza": "DZA",
+    "المغرب": "MAR", "مغرب": "MAR", "morocco": "MAR", "mar": "MAR",
+    "تونس": "TUN", "tunisia": "TUN", "tun": "TUN",
+    "مصر": "EGY", "egypt": "EGY", "egy": "EGY",
+    "السعودية": "SAU", "سعودية": "SAU", "saudi": "SAU", "saudi arabia": "SAU", "sau": "SAU",
+    "الإمارات": "ARE", "امارات": "ARE", "الامارات": "ARE", "uae": "ARE", "emirates": "ARE", "are": "ARE",
+    "الكويت": "KWT", "كويت": "KWT", "kuwait": "KWT", "kwt": "KWT",
+    "قطر": "QAT", "qatar": "QAT", "qat": "QAT",
+    "البحرين": "BHR", "بحرين": "BHR", "bahrain": "BHR", "bhr": "BHR",
+    "عمان": "OMN", "oman": "OMN", "omn": "OMN",
+    "العراق": "IRQ", "عراق": "IRQ", "iraq": "IRQ", "irq": "IRQ",
+    "الأردن": "JOR", "اردن": "JOR", "jordan": "JOR", "jor": "JOR",
+    "لبنان": "LBN", "lebanon": "LBN", "lbn": "LBN",
+    "سوريا": "SYR", "syria": "SYR", "syr": "SYR",
+    "فلسطين": "PSE", "palestine": "PSE", "pse": "PSE",
+    "اليمن": "YEM", "يمن": "YEM", "yemen": "YEM", "yem": "YEM",
+    "ليبيا": "LBY", "libya": "LBY", "lby": "LBY",
+    "السودان": "SDN", "سودان": "SDN", "sudan": "SDN", "sdn": "SDN",
+    "موريتانيا": "MRT", "mauritania": "MRT", "mrt": "MRT",
+    "الصومال": "SOM", "صومال": "SOM", "somalia": "SOM", "som": "SOM",
+    "جيبوتي": "DJI", "djibouti": "DJI", "dji": "DJI",
+    "جزر القمر": "COM", "comoros": "COM", "com": "COM",
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # أفريقيا (جنوب الصحراء)
+    # ═══════════════════════════════════════════════════════════════════════
+    "جنوب افريقيا": "ZAF", "جنوب أفريقيا": "ZAF", "south africa": "ZAF", "zaf": "ZAF",
+    "نيجيريا": "NGA", "nigeria": "NGA", "nga": "NGA",
+    "تنزانيا": "TZA", "tanzania": "TZA", "tza": "TZA",
+    "كينيا": "KEN", "kenya": "KEN", "ken": "KEN",
+    "إثيوبيا": "ETH", "اثيوبيا": "ETH", "ethiopia": "ETH", "eth": "ETH",
+    "غانا": "GHA", "ghana": "GHA", "gha": "GHA",
+    "أوغندا": "UGA", "اوغندا": "UGA", "uganda": "UGA", "uga": "UGA",
+    "موزمبيق": "MOZ", "mozambique": "MOZ", "moz": "MOZ",
+    "أنغولا": "AGO", "انغولا": "AGO", "angola": "AGO", "ago": "AGO",
+    "الكاميرون": "CMR", "cameroon": "CMR", "cmr": "CMR",
+    "كوت ديفوار": "CIV", "ساحل العاج": "CIV", "ivory coast": "CIV", "cote d'ivoire": "CIV", "civ": "CIV",
+    "السنغال": "SEN", "senegal": "SEN", "sen": "SEN",
+    "زيمبابوي": "ZWE", "zimbabwe": "ZWE", "zwe": "ZWE",
+    "زامبيا": "ZMB", "zambia": "ZMB", "zmb": "ZMB",
+    "رواندا": "RWA", "rwanda": "RWA", "rwa": "RWA",
+    "الكونغو": "COD", "كونغو": "COD", "congo": "COD", "drc": "COD", "cod": "COD",
+    "مدغشقر": "MDG", "madagascar": "MDG", "mdg": "MDG",
+    "مالي": "MLI", "mali": "MLI", "mli": "MLI",
+    "بوركينا فاسو": "BFA", "burkina faso": "BFA", "bfa": "BFA",
+    "النيجر": "NER", "niger": "NER", "ner": "NER",
+    "تشاد": "TCD", "chad": "TCD", "tcd": "TCD",
+    "بنين": "BEN", "benin": "BEN", "ben": "BEN",
+    "توغو": "TGO", "togo": "TGO", "tgo": "TGO",
+    "موريشيوس": "MUS", "mauritius": "MUS", "mus": "MUS",
+    "بوتسوانا": "BWA", "botswana": "BWA", "bwa": "BWA",
+    "ناميبيا": "NAM", "namibia": "NAM", "nam": "NAM",
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # آسيا
+    # ═══════════════════════════════════════════════════════════════════════
+    "الصين": "CHN", "صين": "CHN", "china": "CHN", "chn": "CHN",
+    "الهند": "IND", "هند": "IND", "india": "IND", "ind": "IND",
+    "اليابان": "JPN", "يابان": "JPN", "japan": "JPN", "jpn": "JPN",
+    "كوريا": "KOR", "كوريا الجنوبية": "KOR", "south korea": "KOR", "korea": "KOR", "kor": "KOR",
+    "كوريا الشمالية": "PRK", "north korea": "PRK", "prk": "PRK",
+    "إندونيسيا": "IDN", "اندونيسيا": "IDN", "indonesia": "IDN", "idn": "IDN",
+    "باكستان": "PAK", "pakistan": "PAK", "pak": "PAK",
+    "بنغلاديش": "BGD", "bangladesh": "BGD", "bgd": "BGD",
+    "فيتنام": "VNM", "vietnam": "VNM", "vnm": "VNM",
+    "تايلاند": "THA", "thailand": "THA", "tha": "THA",
+    "ماليزيا": "MYS", "malaysia": "MYS", "mys": "MYS",
+    "سنغافورة": "SGP", "singapore": "SGP", "sgp": "SGP",
+    "الفلبين": "PHL", "فلبين": "PHL", "philippines": "PHL", "phl": "PHL",
+    "ميانمار": "MMR", "بورما": "MMR", "myanmar": "MMR", "burma": "MMR", "mmr": "MMR",
+    "سريلانكا": "LKA", "sri lanka": "LKA", "lka": "LKA",
+    "نيبال": "NPL", "nepal": "NPL", "npl": "NPL",
+    "كمبوديا": "KHM", "cambodia": "KHM", "khm": "KHM",
+    "لاوس": "LAO", "laos": "LAO", "lao": "LAO",
+    "منغوليا": "MNG", "mongolia": "MNG", "mng": "MNG",
+    "تايوان": "TWN", "taiwan": "TWN", "twn": "TWN",
+    "هونغ كونغ": "HKG", "hong kong": "HKG", "hkg": "HKG",
+    "ماكاو": "MAC", "macau": "MAC", "mac": "MAC",
+    "أفغانستان": "AFG", "افغانستان": "AFG", "afghanistan": "AFG", "afg": "AFG",
+    "كازاخستان": "KAZ", "kazakhstan": "KAZ", "kaz": "KAZ",
+    "أوزبكستان": "UZB", "uzbekistan": "UZB", "uzb": "UZB",
+    "تركمانستان": "TKM", "turkmenistan": "TKM", "tkm": "TKM",
+    "طاجيكستان": "TJK", "tajikistan": "TJK", "tjk": "TJK",
+    "قيرغيزستان": "KGZ", "kyrgyzstan": "KGZ", "kgz": "KGZ",
+    "أذربيجان": "AZE", "azerbaijan": "AZE", "aze": "AZE",
+    "جورجيا": "GEO", "georgia": "GEO", "geo": "GEO",
+    "أرمينيا": "ARM", "armenia": "ARM", "arm": "ARM",
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الشرق الأوسط
+    # ═══════════════════════════════════════════════════════════════════════
+    "إيران": "IRN", "ايران": "IRN", "iran": "IRN", "irn": "IRN",
+    "تركيا": "TUR", "turkey": "TUR", "turkiye": "TUR", "tur": "TUR",
+    "إسرائيل": "ISR", "اسرائيل": "ISR", "israel": "ISR", "isr": "ISR",
+    "قبرص": "CYP", "cyprus": "CYP", "cyp": "CYP",
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # أوروبا
+    # ═══════════════════════════════════════════════════════════════════════
+    "ألمانيا": "DEU", "المانيا": "DEU", "germany": "DEU", "deu": "DEU",
+    "فرنسا": "FRA", "france": "FRA", "fra": "FRA",
+    "بريطانيا": "GBR", "المملكة المتحدة": "GBR", "uk": "GBR", "britain": "GBR", "united kingdom": "GBR", "gbr": "GBR",
+    "إيطاليا": "ITA", "ايطاليا": "ITA", "italy": "ITA", "ita": "ITA",
+    "إسبانيا": "ESP", "اسبانيا": "ESP", "spain": "ESP", "esp": "ESP",
+    "هولندا": "NLD", "netherlands": "NLD", "holland": "NLD", "nld": "NLD",
+    "بلجيكا": "BEL", "belgium": "BEL", "bel": "BEL",
+    "السويد": "SWE", "sweden": "SWE", "swe": "SWE",
+    "النرويج": "NOR", "norway": "NOR", "nor": "NOR",
+    "الدنمارك": "DNK", "denmark": "DNK", "dnk": "DNK",
+    "فنلندا": "FIN", "finland": "FIN", "fin": "FIN",
+    "سويسرا": "CHE", "switzerland": "CHE", "che": "CHE",
+    "النمسا": "AUT", "austria": "AUT", "aut": "AUT",
+    "البرتغال": "PRT", "portugal": "PRT", "prt": "PRT",
+    "اليونان": "GRC", "greece": "GRC", "grc": "GRC",
+    "بولندا": "POL", "poland": "POL", "pol": "POL",
+    "التشيك": "CZE", "czech": "CZE", "czechia": "CZE", "cze": "CZE",
+    "رومانيا": "ROU", "romania": "ROU", "rou": "ROU",
+    "المجر": "HUN", "hungary": "HUN", "hun": "HUN",
+    "بلغاريا": "BGR", "bulgaria": "BGR", "bgr": "BGR",
+    "أوكرانيا": "UKR", "اوكرانيا": "UKR", "ukraine": "UKR", "ukr": "UKR",
+    "روسيا": "RUS", "russia": "RUS", "rus": "RUS",
+    "بيلاروسيا": "BLR", "belarus": "BLR", "blr": "BLR",
+    "أيرلندا": "IRL", "ايرلندا": "IRL", "ireland": "IRL", "irl": "IRL",
+    "سلوفاكيا": "SVK", "slovakia": "SVK", "svk": "SVK",
+    "سلوفينيا": "SVN", "slovenia": "SVN", "svn": "SVN",
+    "كرواتيا": "HRV", "croatia": "HRV", "hrv": "HRV",
+    "صربيا": "SRB", "serbia": "SRB", "srb": "SRB",
+    "ألبانيا": "ALB", "albania": "ALB", "alb": "ALB",
+    "مقدونيا": "MKD", "macedonia": "MKD", "mkd": "MKD",
+    "البوسنة": "BIH", "bosnia": "BIH", "bih": "BIH",
+    "الجبل الأسود": "MNE", "montenegro": "MNE", "mne": "MNE",
+    "لاتفيا": "LVA", "latvia": "LVA", "lva": "LVA",
+    "ليتوانيا": "LTU", "lithuania": "LTU", "ltu": "LTU",
+    "إستونيا": "EST", "estonia": "EST", "est": "EST",
+    "لوكسمبورغ": "LUX", "luxembourg": "LUX", "lux": "LUX",
+    "مالطا": "MLT", "malta": "MLT", "mlt": "MLT",
+    "أيسلندا": "ISL", "iceland": "ISL", "isl": "ISL",
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الأمريكتان
+    # ═══════════════════════════════════════════════════════════════════════
+    "أمريكا": "USA", "امريكا": "USA", "الولايات المتحدة": "USA", "usa": "USA", "america": "USA", "united states": "USA", "us": "USA",
+    "كندا": "CAN", "canada": "CAN", "can": "CAN",
+    "المكسيك": "MEX", "مكسيك": "MEX", "mexico": "MEX", "mex": "MEX",
+    "البرازيل": "BRA", "برازيل": "BRA", "brazil": "BRA", "bra": "BRA",
+    "الأرجنتين": "ARG", "ارجنتين": "ARG", "argentina": "ARG", "arg": "ARG",
+    "كولومبيا": "COL", "colombia": "COL", "col": "COL",
+    "تشيلي": "CHL", "chile": "CHL", "chl": "CHL",
+    "بيرو": "PER", "peru": "PER", "per": "PER",
+    "فنزويلا": "VEN", "venezuela": "VEN", "ven": "VEN",
+    "الإكوادور": "ECU", "ecuador": "ECU", "ecu": "ECU",
+    "بوليفيا": "BOL", "bolivia": "BOL", "bol": "BOL",
+    "باراغواي": "PRY", "paraguay": "PRY", "pry": "PRY",
+    "أوروغواي": "URY", "uruguay": "URY", "ury": "URY",
+    "كوبا": "CUB", "cuba": "CUB", "cub": "CUB",
+    "جامايكا": "JAM", "jamaica": "JAM", "jam": "JAM",
+    "بنما": "PAN", "panama": "PAN", "pan": "PAN",
+    "كوستاريكا": "CRI", "costa rica": "CRI", "cri": "CRI",
+    "غواتيمالا": "GTM", "guatemala": "GTM", "gtm": "GTM",
+    "هندوراس": "HND", "honduras": "HND", "hnd": "HND",
+    "السلفادور": "SLV", "el salvador": "SLV", "slv": "SLV",
+    "نيكاراغوا": "NIC", "nicaragua": "NIC", "nic": "NIC",
+    "جمهورية الدومينيكان": "DOM", "dominican republic": "DOM", "dom": "DOM",
+    "هايتي": "HTI", "haiti": "HTI", "hti": "HTI",
+    "ترينيداد": "TTO", "trinidad": "TTO", "tto": "TTO",
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # أوقيانوسيا
+    # ═══════════════════════════════════════════════════════════════════════
+    "أستراليا": "AUS", "استراليا": "AUS", "australia": "AUS", "aus": "AUS",
+    "نيوزيلندا": "NZL", "new zealand": "NZL", "nzl": "NZL",
+    "بابوا غينيا": "PNG", "papua new guinea": "PNG", "png": "PNG",
+    "فيجي": "FJI", "fiji": "FJI", "fji": "FJI",
+}
+
+# مجموعات الدول الموسعة
+COUNTRY_GROUPS = {
+    # العربية
+    "الدول العربية": ["DZA", "MAR", "TUN", "EGY", "SAU", "ARE", "KWT", "QAT", "BHR", "OMN", "IRQ", "JOR", "LBN", "SYR", "PSE", "YEM", "LBY", "SDN", "MRT"],
+    "العربية": ["DZA", "MAR", "TUN", "EGY", "SAU", "ARE", "KWT", "QAT", "BHR", "OMN", "IRQ", "JOR", "LBN"],
+    "arab": ["DZA", "MAR", "TUN", "EGY", "SAU", "ARE", "KWT", "QAT", "BHR", "OMN", "IRQ", "JOR", "LBN"],
+    "arab countries": ["DZA", "MAR", "TUN", "EGY", "SAU", "ARE", "KWT", "QAT", "BHR", "OMN", "IRQ", "JOR", "LBN"],
+    # الخليج
+    "الخليج": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
+    "خليج": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
+    "دول الخليج": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
+    "gulf": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
+    "gcc": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
+    "gulf countries": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
+    # شمال أفريقيا
+    "المغرب العربي": ["DZA", "MAR", "TUN", "LBY", "MRT"],
+    "شمال افريقيا": ["DZA", "MAR", "TUN", "LBY", "EGY"],
+    "شمال أفريقيا": ["DZA", "MAR", "TUN", "LBY", "EGY"],
+    "north africa": ["DZA", "MAR", "TUN", "LBY", "EGY"],
+    "maghreb": ["DZA", "MAR", "TUN", "LBY", "MRT"],
+    # أفريقيا
+    "أفريقيا": ["DZA", "EGY", "NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "MAR"],
+    "افريقيا": ["DZA", "EGY", "NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "MAR"],
+    "africa": ["DZA", "EGY", "NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "MAR"],
+    "african countries": ["DZA", "EGY", "NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "MAR"],
+    "sub-saharan africa": ["NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "UGA", "SEN", "CIV"],
+    # مجموعات اقتصادية
+    "g7": ["USA", "GBR", "FRA", "DEU", "ITA", "CAN", "JPN"],
+    "g20": ["USA", "CHN", "JPN", "DEU", "GBR", "FRA", "ITA", "BRA", "IND", "RUS", "AUS", "KOR", "MEX", "IDN", "SAU", "TUR", "ARG", "ZAF"],
+    "brics": ["BRA", "RUS", "IND", "CHN", "ZAF"],
+    "brics+": ["BRA", "RUS", "IND", "CHN", "ZAF", "EGY", "ETH", "IRN", "SAU", "ARE"],
+    # آسيا
+    "آسيا": ["CHN", "JPN", "KOR", "IND", "IDN", "THA", "MYS", "SGP", "VNM", "PHL"],
+    "اسيا": ["CHN", "JPN", "KOR", "IND", "IDN", "THA", "MYS", "SGP", "VNM", "PHL"],
+    "asia": ["CHN", "JPN", "KOR", "IND", "IDN", "THA", "MYS", "SGP", "VNM", "PHL"],
+    "asian countries": ["CHN", "JPN", "KOR", "IND", "IDN", "THA", "MYS", "SGP", "VNM", "PHL"],
+    "southeast asia": ["IDN", "THA", "MYS", "SGP", "VNM", "PHL", "MMR", "KHM", "LAO"],
+    "asean": ["IDN", "THA", "MYS", "SGP", "VNM", "PHL", "MMR", "KHM", "LAO", "BRN"],
+    # أوروبا
+    "أوروبا": ["DEU", "FRA", "GBR", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT"],
+    "اوروبا": ["DEU", "FRA", "GBR", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT"],
+    "europe": ["DEU", "FRA", "GBR", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT"],
+    "european union": ["DEU", "FRA", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT", "GRC", "PRT", "IRL"],
+    "eu": ["DEU", "FRA", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT", "GRC", "PRT", "IRL"],
+    # أمريكا اللاتينية
+    "أمريكا اللاتينية": ["BRA", "MEX", "ARG", "COL", "CHL", "PER", "VEN", "ECU"],
+    "امريكا اللاتينية": ["BRA", "MEX", "ARG", "COL", "CHL", "PER", "VEN", "ECU"],
+    "latin america": ["BRA", "MEX", "ARG", "COL", "CHL", "PER", "VEN", "ECU"],
+    "south america": ["BRA", "ARG", "COL", "CHL", "PER", "VEN", "ECU", "BOL", "PRY", "URY"],
+    # الدول الكبرى
+    "الدول الكبرى": ["USA", "CHN", "DEU", "JPN", "GBR", "FRA", "IND"],
+    "major economies": ["USA", "CHN", "DEU", "JPN", "GBR", "FRA", "IND"],
+    "largest economies": ["USA", "CHN", "DEU", "JPN", "GBR", "FRA", "IND", "BRA", "ITA", "CAN"],
+    # النمور الآسيوية
+    "النمور الآسيوية": ["KOR", "SGP", "HKG", "TWN"],
+    "asian tigers": ["KOR", "SGP", "HKG", "TWN"],
+    # الأسواق الناشئة
+    "الأسواق الناشئة": ["CHN", "IND", "BRA", "RUS", "MEX", "IDN", "TUR", "ZAF"],
+    "emerging markets": ["CHN", "IND", "BRA", "RUS", "MEX", "IDN", "TUR", "ZAF"],
+}
+
+# قاموس موسع للمؤشرات
+INDICATOR_ALIASES = {
+    # ═══════════════════════════════════════════════════════════════════════
+    # الناتج المحلي الإجمالي GDP
+    # ═══════════════════════════════════════════════════════════════════════
+    "الناتج المحلي": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي (USD)"},
+    "الناتج المحلي الإجمالي": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي (USD)"},
+    "الناتج": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي"},
+    "ناتج محلي": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي"},
+    "ناتج": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي"},
+    "gdp": {"code": "NY.GDP.MKTP.CD", "name": "GDP (current US$)"},
+    "gross domestic product": {"code": "NY.GDP.MKTP.CD", "name": "GDP"},
+    # نمو الناتج المحلي
+    "نمو الناتج المحلي": {"code": "NY.GDP.MKTP.KD.ZG", "name": "نمو الناتج المحلي (%)"},
+    "نمو الناتج": {"code": "NY.GDP.MKTP.KD.ZG", "name": "نمو الناتج المحلي (%)"},
+    "النمو الاقتصادي": {"code": "NY.GDP.MKTP.KD.ZG", "name": "النمو الاقتصادي (%)"},
+    "معدل النمو": {"code": "NY.GDP.MKTP.KD.ZG", "name": "معدل النمو (%)"},
+    "النمو": {"code": "NY.GDP.MKTP.KD.ZG", "name": "نمو الناتج المحلي"},
+    "نمو": {"code": "NY.GDP.MKTP.KD.ZG", "name": "نمو الناتج المحلي"},
+    "gdp growth": {"code": "NY.GDP.MKTP.KD.ZG", "name": "GDP Growth (%)"},
+    "growth": {"code": "NY.GDP.MKTP.KD.ZG", "name": "GDP Growth"},
+    "economic growth": {"code": "NY.GDP.MKTP.KD.ZG", "name": "Economic Growth"},
+    # الناتج للفرد
+    "الناتج المحلي للفرد": {"code": "NY.GDP.PCAP.CD", "name": "الناتج المحلي للفرد (USD)"},
+    "الناتج للفرد": {"code": "NY.GDP.PCAP.CD", "name": "الناتج المحلي للفرد"},
+    "دخل الفرد": {"code": "NY.GDP.PCAP.CD", "name": "دخل الفرد"},
+    "للفرد": {"code": "NY.GDP.PCAP.CD", "name": "الناتج المحلي للفرد"},
+    "gdp per capita": {"code": "NY.GDP.PCAP.CD", "name": "GDP per Capita"},
+    "per capita": {"code": "NY.GDP.PCAP.CD", "name": "GDP per Capita"},
+    "income per capita": {"code": "NY.GDP.PCAP.CD", "name": "Income per Capita"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # التجارة الخارجية Trade
+    # ═══════════════════════════════════════════════════════════════════════
+    "الصادرات": {"code": "NE.EXP.GNFS.CD", "name": "الصادرات (USD)"},
+    "صادرات": {"code": "NE.EXP.GNFS.CD", "name": "الصادرات"},
+    "التصدير": {"code": "NE.EXP.GNFS.CD", "name": "الصادرات"},
+    "exports": {"code": "NE.EXP.GNFS.CD", "name": "Exports (current US$)"},
+    "export": {"code": "NE.EXP.GNFS.CD", "name": "Exports"},
+    "الواردات": {"code": "NE.IMP.GNFS.CD", "name": "الواردات (USD)"},
+    "واردات": {"code": "NE.IMP.GNFS.CD", "name": "الواردات"},
+    "الاستيراد": {"code": "NE.IMP.GNFS.CD", "name": "الواردات"},
+    "imports": {"code": "NE.IMP.GNFS.CD", "name": "Imports (current US$)"},
+    "import": {"code": "NE.IMP.GNFS.CD", "name": "Imports"},
+    "الميزان التجاري": {"code": "NE.RSB.GNFS.CD", "name": "الميزان التجاري"},
+    "ميزان تجاري": {"code": "NE.RSB.GNFS.CD", "name": "الميزان التجاري"},
+    "trade balance": {"code": "NE.RSB.GNFS.CD", "name": "Trade Balance"},
+    "التجارة": {"code": "NE.TRD.GNFS.ZS", "name": "التجارة (% من الناتج)"},
+    "حجم التجارة": {"code": "NE.TRD.GNFS.ZS", "name": "حجم التجارة"},
+    "trade": {"code": "NE.TRD.GNFS.ZS", "name": "Trade (% of GDP)"},
+    # نسب التجارة
+    "نسبة الصادرات": {"code": "NE.EXP.GNFS.ZS", "name": "الصادرات (% من الناتج)"},
+    "exports percent": {"code": "NE.EXP.GNFS.ZS", "name": "Exports (% of GDP)"},
+    "نسبة الواردات": {"code": "NE.IMP.GNFS.ZS", "name": "الواردات (% من الناتج)"},
+    "imports percent": {"code": "NE.IMP.GNFS.ZS", "name": "Imports (% of GDP)"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # التضخم والأسعار Inflation
+    # ═══════════════════════════════════════════════════════════════════════
+    "التضخم": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم (%)"},
+    "تضخم": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم"},
+    "معدل التضخم": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم (%)"},
+    "نسبة التضخم": {"code": "FP.CPI.TOTL.ZG", "name": "نسبة التضخم"},
+    "inflation": {"code": "FP.CPI.TOTL.ZG", "name": "Inflation Rate (%)"},
+    "inflation rate": {"code": "FP.CPI.TOTL.ZG", "name": "Inflation Rate"},
+    "cpi": {"code": "FP.CPI.TOTL.ZG", "name": "Consumer Price Index"},
+    "الأسعار": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم"},
+    "اسعار": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم"},
+    "مؤشر الأسعار": {"code": "FP.CPI.TOTL", "name": "مؤشر أسعار المستهلك"},
+    "consumer prices": {"code": "FP.CPI.TOTL", "name": "Consumer Price Index"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # البطالة وسوق العمل Unemployment
+    # ═══════════════════════════════════════════════════════════════════════
+    "البطالة": {"code": "SL.UEM.TOTL.ZS", "name": "معدل البطالة (%)"},
+    "بطالة": {"code": "SL.UEM.TOTL.ZS", "name": "معدل البطالة"},
+    "معدل البطالة": {"code": "SL.UEM.TOTL.ZS", "name": "معدل البطالة (%)"},
+    "نسبة البطالة": {"code": "SL.UEM.TOTL.ZS", "name": "نسبة البطالة"},
+    "unemployment": {"code": "SL.UEM.TOTL.ZS", "name": "Unemployment Rate (%)"},
+    "unemployment rate": {"code": "SL.UEM.TOTL.ZS", "name": "Unemployment Rate"},
+    "jobless": {"code": "SL.UEM.TOTL.ZS", "name": "Unemployment"},
+    "بطالة الشباب": {"code": "SL.UEM.1524.ZS", "name": "بطالة الشباب (%)"},
+    "youth unemployment": {"code": "SL.UEM.1524.ZS", "name": "Youth Unemployment (%)"},
+    "القوى العاملة": {"code": "SL.TLF.TOTL.IN", "name": "إجمالي القوى العاملة"},
+    "قوى عاملة": {"code": "SL.TLF.TOTL.IN", "name": "القوى العاملة"},
+    "labor force": {"code": "SL.TLF.TOTL.IN", "name": "Labor Force"},
+    "labour force": {"code": "SL.TLF.TOTL.IN", "name": "Labor Force"},
+    "workforce": {"code": "SL.TLF.TOTL.IN", "name": "Workforce"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # السكان Population
+    # ═══════════════════════════════════════════════════════════════════════
+    "السكان": {"code": "SP.POP.TOTL", "name": "إجمالي السكان"},
+    "سكان": {"code": "SP.POP.TOTL", "name": "إجمالي السكان"},
+    "عدد السكان": {"code": "SP.POP.TOTL", "name": "عدد السكان"},
+    "تعداد السكان": {"code": "SP.POP.TOTL", "name": "تعداد السكان"},
+    "population": {"code": "SP.POP.TOTL", "name": "Total Population"},
+    "نمو السكان": {"code": "SP.POP.GROW", "name": "نمو السكان (%)"},
+    "معدل نمو السكان": {"code": "SP.POP.GROW", "name": "معدل نمو السكان"},
+    "population growth": {"code": "SP.POP.GROW", "name": "Population Growth (%)"},
+    "الكثافة السكانية": {"code": "EN.POP.DNST", "name": "الكثافة السكانية"},
+    "كثافة سكانية": {"code": "EN.POP.DNST", "name": "الكثافة السكانية"},
+    "population density": {"code": "EN.POP.DNST", "name": "Population Density"},
+    "العمر المتوقع": {"code": "SP.DYN.LE00.IN", "name": "متوسط العمر المتوقع"},
+    "متوسط العمر": {"code": "SP.DYN.LE00.IN", "name": "متوسط العمر المتوقع"},
+    "life expectancy": {"code": "SP.DYN.LE00.IN", "name": "Life Expectancy"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الاستثمار Investment
+    # ═══════════════════════════════════════════════════════════════════════
+    "الاستثمار الأجنبي": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي المباشر (USD)"},
+    "الاستثمار الاجنبي": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي المباشر"},
+    "استثمار أجنبي": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي"},
+    "الاستثمار": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي"},
+    "استثمار": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي"},
+    "fdi": {"code": "BX.KLT.DINV.CD.WD", "name": "FDI Inflows (USD)"},
+    "foreign direct investment": {"code": "BX.KLT.DINV.CD.WD", "name": "FDI"},
+    "foreign investment": {"code": "BX.KLT.DINV.CD.WD", "name": "Foreign Investment"},
+    "investment": {"code": "BX.KLT.DINV.CD.WD", "name": "Investment"},
+    "تكوين رأس المال": {"code": "NE.GDI.TOTL.ZS", "name": "تكوين رأس المال (% من الناتج)"},
+    "gross capital formation": {"code": "NE.GDI.TOTL.ZS", "name": "Gross Capital Formation"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # المالية العامة Government Finance
+    # ═══════════════════════════════════════════════════════════════════════
+    "الدين الحكومي": {"code": "GC.DOD.TOTL.GD.ZS", "name": "الدين الحكومي (% من الناتج)"},
+    "الدين العام": {"code": "GC.DOD.TOTL.GD.ZS", "name": "الدين العام (% من الناتج)"},
+    "الدين": {"code": "GC.DOD.TOTL.GD.ZS", "name": "الدين الحكومي"},
+    "دين": {"code": "GC.DOD.TOTL.GD.ZS", "name": "الدين الحكومي"},
+    "debt": {"code": "GC.DOD.TOTL.GD.ZS", "name": "Government Debt (% of GDP)"},
+    "government debt": {"code": "GC.DOD.TOTL.GD.ZS", "name": "Government Debt"},
+    "public debt": {"code": "GC.DOD.TOTL.GD.ZS", "name": "Public Debt"},
+    "الإيرادات الحكومية": {"code": "GC.REV.XGRT.GD.ZS", "name": "الإيرادات (% من الناتج)"},
+    "إيرادات الحكومة": {"code": "GC.REV.XGRT.GD.ZS", "name": "الإيرادات الحكومية"},
+    "government revenue": {"code": "GC.REV.XGRT.GD.ZS", "name": "Government Revenue"},
+    "النفقات الحكومية": {"code": "GC.XPN.TOTL.GD.ZS", "name": "النفقات (% من الناتج)"},
+    "إنفاق الحكومة": {"code": "GC.XPN.TOTL.GD.ZS", "name": "النفقات الحكومية"},
+    "government expenditure": {"code": "GC.XPN.TOTL.GD.ZS", "name": "Government Expenditure"},
+    "government spending": {"code": "GC.XPN.TOTL.GD.ZS", "name": "Government Spending"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # التعليم Education
+    # ═══════════════════════════════════════════════════════════════════════
+    "الإنفاق على التعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "الإنفاق على التعليم (% من الناتج)"},
+    "الانفاق على التعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "الإنفاق على التعليم"},
+    "ميزانية التعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "ميزانية التعليم"},
+    "التعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "الإنفاق على التعليم"},
+    "تعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "الإنفاق على التعليم"},
+    "education": {"code": "SE.XPD.TOTL.GD.ZS", "name": "Education Expenditure (% of GDP)"},
+    "education spending": {"code": "SE.XPD.TOTL.GD.ZS", "name": "Education Spending"},
+    "الالتحاق بالتعليم": {"code": "SE.PRM.ENRR", "name": "معدل الالتحاق بالتعليم الابتدائي"},
+    "school enrollment": {"code": "SE.PRM.ENRR", "name": "School Enrollment Rate"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الصحة Health
+    # ═══════════════════════════════════════════════════════════════════════
+    "الإنفاق على الصحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "الإنفاق على الصحة (% من الناتج)"},
+    "الانفاق على الصحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "الإنفاق على الصحة"},
+    "ميزانية الصحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "ميزانية الصحة"},
+    "الصحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "الإنفاق على الصحة"},
+    "صحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "الإنفاق على الصحة"},
+    "health": {"code": "SH.XPD.CHEX.GD.ZS", "name": "Health Expenditure (% of GDP)"},
+    "health spending": {"code": "SH.XPD.CHEX.GD.ZS", "name": "Health Spending"},
+    "healthcare": {"code": "SH.XPD.CHEX.GD.ZS", "name": "Healthcare"},
+    "وفيات الرضع": {"code": "SP.DYN.IMRT.IN", "name": "معدل وفيات الرضع"},
+    "infant mortality": {"code": "SP.DYN.IMRT.IN", "name": "Infant Mortality Rate"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الطاقة Energy
+    # ═══════════════════════════════════════════════════════════════════════
+    "استهلاك الطاقة": {"code": "EG.USE.PCAP.KG.OE", "name": "استهلاك الطاقة للفرد"},
+    "الطاقة": {"code": "EG.USE.PCAP.KG.OE", "name": "استهلاك الطاقة للفرد"},
+    "طاقة": {"code": "EG.USE.PCAP.KG.OE", "name": "استهلاك الطاقة"},
+    "energy": {"code": "EG.USE.PCAP.KG.OE", "name": "Energy Use per Capita"},
+    "energy consumption": {"code": "EG.USE.PCAP.KG.OE", "name": "Energy Consumption"},
+    "الطاقة المتجددة": {"code": "EG.FEC.RNEW.ZS", "name": "الطاقة المتجددة (%)"},
+    "renewable energy": {"code": "EG.FEC.RNEW.ZS", "name": "Renewable Energy (%)"},
+    "الكهرباء": {"code": "EG.ELC.ACCS.ZS", "name": "الوصول للكهرباء (%)"},
+    "electricity": {"code": "EG.ELC.ACCS.ZS", "name": "Access to Electricity (%)"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # البيئة Environment
+    # ═══════════════════════════════════════════════════════════════════════
+    "انبعاثات CO2": {"code": "EN.ATM.CO2E.PC", "name": "انبعاثات CO2 للفرد (طن)"},
+    "الانبعاثات": {"code": "EN.ATM.CO2E.PC", "name": "انبعاثات CO2"},
+    "co2": {"code": "EN.ATM.CO2E.PC", "name": "CO2 Emissions per Capita"},
+    "carbon emissions": {"code": "EN.ATM.CO2E.PC", "name": "Carbon Emissions"},
+    "emissions": {"code": "EN.ATM.CO2E.PC", "name": "CO2 Emissions"},
+    "الغابات": {"code": "AG.LND.FRST.ZS", "name": "مساحة الغابات (%)"},
+    "forest": {"code": "AG.LND.FRST.ZS", "name": "Forest Area (%)"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # القطاع المالي والبنكي Financial
+    # ═══════════════════════════════════════════════════════════════════════
+    "سعر الصرف": {"code": "PA.NUS.FCRF", "name": "سعر الصرف الرسمي"},
+    "الصرف": {"code": "PA.NUS.FCRF", "name": "سعر الصرف"},
+    "exchange rate": {"code": "PA.NUS.FCRF", "name": "Official Exchange Rate"},
+    "currency": {"code": "PA.NUS.FCRF", "name": "Exchange Rate"},
+    "سعر الفائدة": {"code": "FR.INR.RINR", "name": "سعر الفائدة الحقيقي (%)"},
+    "الفائدة": {"code": "FR.INR.RINR", "name": "سعر الفائدة"},
+    "interest rate": {"code": "FR.INR.RINR", "name": "Real Interest Rate (%)"},
+    "الائتمان المحلي": {"code": "FS.AST.DOMS.GD.ZS", "name": "الائتمان المحلي (% من الناتج)"},
+    "domestic credit": {"code": "FS.AST.DOMS.GD.ZS", "name": "Domestic Credit (% of GDP)"},
+    "التحويلات المالية": {"code": "BX.TRF.PWKR.CD.DT", "name": "تحويلات العاملين (USD)"},
+    "remittances": {"code": "BX.TRF.PWKR.CD.DT", "name": "Personal Remittances"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الزراعة Agriculture
+    # ═══════════════════════════════════════════════════════════════════════
+    "الزراعة": {"code": "NV.AGR.TOTL.ZS", "name": "الزراعة (% من الناتج)"},
+    "زراعة": {"code": "NV.AGR.TOTL.ZS", "name": "الزراعة"},
+    "agriculture": {"code": "NV.AGR.TOTL.ZS", "name": "Agriculture (% of GDP)"},
+    "farming": {"code": "NV.AGR.TOTL.ZS", "name": "Agriculture"},
+    "الأراضي الزراعية": {"code": "AG.LND.ARBL.ZS", "name": "الأراضي الزراعية (%)"},
+    "agricultural land": {"code": "AG.LND.ARBL.ZS", "name": "Agricultural Land (%)"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الصناعة Industry
+    # ═══════════════════════════════════════════════════════════════════════
+    "الصناعة": {"code": "NV.IND.TOTL.ZS", "name": "الصناعة (% من الناتج)"},
+    "صناعة": {"code": "NV.IND.TOTL.ZS", "name": "الصناعة"},
+    "industry": {"code": "NV.IND.TOTL.ZS", "name": "Industry (% of GDP)"},
+    "manufacturing": {"code": "NV.IND.MANF.ZS", "name": "Manufacturing (% of GDP)"},
+    "التصنيع": {"code": "NV.IND.MANF.ZS", "name": "التصنيع (% من الناتج)"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الخدمات Services
+    # ═══════════════════════════════════════════════════════════════════════
+    "الخدمات": {"code": "NV.SRV.TOTL.ZS", "name": "الخدمات (% من الناتج)"},
+    "خدمات": {"code": "NV.SRV.TOTL.ZS", "name": "الخدمات"},
+    "services": {"code": "NV.SRV.TOTL.ZS", "name": "Services (% of GDP)"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # السياحة Tourism
+    # ═══════════════════════════════════════════════════════════════════════
+    "السياحة": {"code": "ST.INT.RCPT.CD", "name": "إيرادات السياحة (USD)"},
+    "سياحة": {"code": "ST.INT.RCPT.CD", "name": "إيرادات السياحة"},
+    "tourism": {"code": "ST.INT.RCPT.CD", "name": "Tourism Receipts"},
+    "السياح": {"code": "ST.INT.ARVL", "name": "عدد السياح الوافدين"},
+    "tourists": {"code": "ST.INT.ARVL", "name": "International Tourism Arrivals"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # التكنولوجيا والإنترنت Technology
+    # ═══════════════════════════════════════════════════════════════════════
+    "الإنترنت": {"code": "IT.NET.USER.ZS", "name": "مستخدمو الإنترنت (%)"},
+    "انترنت": {"code": "IT.NET.USER.ZS", "name": "مستخدمو الإنترنت"},
+    "internet": {"code": "IT.NET.USER.ZS", "name": "Internet Users (%)"},
+    "الهاتف المحمول": {"code": "IT.CEL.SETS.P2", "name": "اشتراكات الهاتف المحمول"},
+    "mobile": {"code": "IT.CEL.SETS.P2", "name": "Mobile Subscriptions"},
+    "البحث والتطوير": {"code": "GB.XPD.RSDV.GD.ZS", "name": "الإنفاق على البحث والتطوير"},
+    "r&d": {"code": "GB.XPD.RSDV.GD.ZS", "name": "R&D Expenditure (% of GDP)"},
+    "research": {"code": "GB.XPD.RSDV.GD.ZS", "name": "Research & Development"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # الفقر Poverty
+    # ═══════════════════════════════════════════════════════════════════════
+    "الفقر": {"code": "SI.POV.DDAY", "name": "نسبة الفقر (%)"},
+    "فقر": {"code": "SI.POV.DDAY", "name": "نسبة الفقر"},
+    "poverty": {"code": "SI.POV.DDAY", "name": "Poverty Rate (%)"},
+    "poverty rate": {"code": "SI.POV.DDAY", "name": "Poverty Headcount Ratio"},
+    "معامل جيني": {"code": "SI.POV.GINI", "name": "معامل جيني"},
+    "gini": {"code": "SI.POV.GINI", "name": "Gini Index"},
+    "inequality": {"code": "SI.POV.GINI", "name": "Inequality"},
+
+    # ═══════════════════════════════════════════════════════════════════════
+    # التنمية البشرية Human Development
+    # ═══════════════════════════════════════════════════════════════════════
+    "معدل الخصوبة": {"code": "SP.DYN.TFRT.IN", "name": "معدل الخصوبة"},
+    "fertility": {"code": "SP.DYN.TFRT.IN", "name": "Fertility Rate"},
+    "معدل الوفاة": {"code": "SP.DYN.CDRT.IN", "name": "معدل الوفاة"},
+    "mortality": {"code": "SP.DYN.CDRT.IN", "name": "Mortality Rate"},
+    "معدل المواليد": {"code": "SP.DYN.CBRT.IN", "name": "معدل المواليد"},
+    "birth rate": {"code": "SP.DYN.CBRT.IN", "name": "Birth Rate"},
+}
+
+# أكواد ISO قصيرة تطابق كلمات إنجليزية شائعة (per, can, are...) - تُقبل فقط إذا كُتبت بأحرف كبيرة
+AMBIGUOUS_CODE_ALIASES = {
+    "ago", "are", "arm", "ben", "bra", "can", "col", "com", "cub", "dom", "est", "fin", "geo",
+    "ind", "jam", "ken", "lao", "mac", "mar", "mus", "nam", "nor", "pan", "per", "sen", "som",
+    "tur", "us"
+}
+
+# السوابق العربية المتصلة (و، ف، ب، ل، ك، ال...) واللواحق النسبية (ية، ي...) المسموح بها حول الاسم
+# السوابق غير جشعة حتى يُجرَّب الاسم الكامل الأطول أولاً
+ARABIC_PROCLITICS = r"(?:[وف])??(?:بال|لل|وال|ال|[بلك])??"
+ARABIC_SUFFIXES = r"(?:ية|يه|يين|ين|ي)?"
+
+
+@st.cache_resource(show_spinner=False)
+def build_alias_matcher():
     """
-    بحث محلي ذكي يفهم الطلبات البسيطة بدون الحاجة لـ API
-    مثال: "الصادرات في تنزانيا" أو "GDP Tanzania 2015-2020"
+    بناء فهرس الأسماء المستعارة مرة واحدة لكل عملية: تعبير نمطي واحد مُجمَّع
+    (الأطول أولاً وبحدود كلمات) يستخرج المجموعات والدول والمؤشرات في مرور واحد على نص الطلب
+    """
+    
+    lookup = {}
+    for alias, indicator_data in INDICATOR_ALIASES.items():
+        lookup[alias.lower()] = ("indicator", indicator_data)
+    for alias, code in COUNTRY_ALIASES.items():
+        lookup[alias.lower()] = ("country", [code])
+    for alias, codes in COUNTRY_GROUPS.items():
+        lookup[alias.lower()] = ("group", codes)
+    
+    by_length = sorted(lookup, key=len, reverse=True)
+    arabic = [re.escape(a) for a in by_length if re.match(r"[\u0600-\u06FF]", a)]
+    latin = [re.escape(a) for a in by_length if not re.match(r"[\u0600-\u06FF]", a)]
+    
+    pattern = re.compile(
+        rf"(?<!\w){ARABIC_PROCLITICS}(?P<ar>{'|'.join(arabic)}){ARABIC_SUFFIXES}(?!\w)"
+        rf"|(?<!\w)(?P<en>{'|'.join(latin)})(?!\w)"
+    )
+    return {"pattern": pattern, "lookup": lookup}
+
+
+def match_aliases(query):
+    """
+    مرور واحد على نص الطلب يُرجع (الدول، المؤشرات) بترتيب ظهورها
+    عند التداخل يفوز الاسم الأطول (مثل "الناتج المحلي للفرد" قبل "الناتج المحلي")
     """
     
+    matcher = build_alias_matcher()
     query_lower = query.lower()
-    query_parts = query.replace(",", " ").replace("،", " ").replace("و", " ").split()
+    same_length = len(query_lower) == len(query)
+    
+    found_countries = []
+    found_indicators = []
+    
+    for match in matcher["pattern"].finditer(query_lower):
+        group = "ar" if match.group("ar") else "en"
+        alias = match.group(group)
+        
+        if alias in AMBIGUOUS_CODE_ALIASES:
+            original = query[match.start(group):match.end(group)] if same_length else alias
+            if not original.isupper():
+                continue
+        
+        kind, payload = matcher["lookup"][alias]
+        if kind == "indicator":
+            # تجنب التكرار
+            if not any(ind['code'] == payload['code'] for ind in found_indicators):
+                found_indicators.append(payload)
+        else:
+            found_countries.extend(payload)
+    
+    return list(dict.fromkeys(found_countries)), found_indicators
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# المطابقة التقريبية (تصحيح الأخطاء الإملائية) بدون الحاجة لـ Gemini
+# ───────────────────────────────────────────────────────────────────────────────
+
+ARABIC_DIACRITICS = re.compile(r"[\u0617-\u061A\u064B-\u0652\u0670\u0640]")
+ARABIC_LETTER_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه", "ى": "ي", "ؤ": "و", "ئ": "ي"
+})
+FUZZY_MIN_LENGTH = 4
+FUZZY_MIN_SIMILARITY = 0.4
+
+
+def normalize_arabic(text):
+    """توحيد الكتابة العربية: إزالة التشكيل والتطويل وتوحيد الألف والهمزات والتاء المربوطة والياء"""
+    return ARABIC_DIACRITICS.sub("", str(text)).translate(ARABIC_LETTER_MAP).lower().strip()
+
+
+def _trigrams(text):
+    """مجموعة الثلاثيات الحرفية لنص (مع حشو الحواف)"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, max_dist):
+    """مسافة التحرير (Levenshtein) مع التوقف المبكر إذا تجاوزت max_dist"""
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_dist:
+            return max_dist + 1
+        previous = current
+    return previous[-1]
+
+
+def _max_typos(length):
+    """عدد الأخطاء المسموح به حسب طول الكلمة"""
+    return 1 if length <= 5 else 2 if length <= 9 else 3
+
+
+@st.cache_resource(show_spinner=False)
+def build_fuzzy_index(extra_countries=()):
+    """
+    فهرس الثلاثيات الحرفية لجميع الأسماء المستعارة (بعد توحيد الكتابة العربية)
+    extra_countries: أزواج (الاسم، الكود) إضافية مثل قائمة دول API البنك الدولي
+    """
+    
+    entries = {}
+    for alias, indicator_data in INDICATOR_ALIASES.items():
+        entries.setdefault(normalize_arabic(alias), ("indicator", indicator_data))
+    for alias, code in list(COUNTRY_ALIASES.items()) + list(extra_countries):
+        entries.setdefault(normalize_arabic(alias), ("country", [code]))
+    for alias, codes in COUNTRY_GROUPS.items():
+        entries.setdefault(normalize_arabic(alias), ("group", codes))
+    
+    entries = {alias: hit for alias, hit in entries.items() if len(alias) >= FUZZY_MIN_LENGTH}
+    aliases = list(entries)
+    grams = {}
+    for alias_id, alias in enumerate(aliases):
+        for gram in _trigrams(alias):
+            grams.setdefault(gram, []).append(alias_id)
+    
+    return {"aliases": aliases, "entries": entries, "grams": grams}
+
+
+def fuzzy_match_aliases(query, kinds, extra_countries=()):
+    """
+    البحث التقريبي عن الدول/المؤشرات في الطلب: توليد المرشحين بالثلاثيات الحرفية
+    لكل كلمة أو عبارة من كلمتين أو ثلاث، ثم التحقق بمسافة التحرير
+    تُرجع (الدول، المؤشرات، التصحيحات [(النص المكتوب، الاسم المطابق)])
+    """
+    
+    index = build_fuzzy_index(tuple(extra_countries))
+    words = re.findall(r"[^\W\d_]+", normalize_arabic(query))
     
     found_countries = []
     found_indicators = []
+    corrections = []
+    used = set()
+    
+    # العبارات الأطول أولاً حتى لا تُطابق أجزاؤها بشكل منفصل
+    for size in (3, 2, 1):
+        for start in range(len(words) - size + 1):
+            positions = set(range(start, start + size))
+            if positions & used:
+                continue
+            span = " ".join(words[start:start + size])
+            exact_hit = index["entries"].get(span)
+            if len(span) < FUZZY_MIN_LENGTH or (exact_hit and exact_hit[0] not in kinds):
+                continue
+            
+            span_grams = _trigrams(span)
+            overlap = {}
+            for gram in span_grams:
+                for alias_id in index["grams"].get(gram, ()):
+                    overlap[alias_id] = overlap.get(alias_id, 0) + 1
+            
+            best = None
+            for alias_id, shared in sorted(overlap.items(), key=lambda item: -item[1])[:10]:
+                alias = index["aliases"][alias_id]
+                kind, payload = index["entries"][alias]
+                if kind not in kinds or 2 * shared / (len(span_grams) + len(_trigrams(alias))) < FUZZY_MIN_SIMILARITY:
+                    continue
+                max_dist = _max_typos(len(alias))
+                dist = _edit_distance(span, alias, max_dist)
+                if dist <= max_dist and (best is None or (dist, -len(alias)) < best[:2]):
+                    best = (dist, -len(alias), alias, kind, payload)
+            
+            if best is None:
+                continue
+            
+            _, _, alias, kind, payload = best
+            used |= positions
+            if best[0] > 0:
+                corrections.append((span, alias))
+            if kind == "indicator":
+                if not any(ind['code'] == payload['code'] for ind in found_indicators):
+                    found_indicators.append(payload)
+            else:
+                found_countries.extend(payload)
+    
+    return list(dict.fromkeys(found_countries)), found_indicators, corrections
+
+
+def smart_local_search(query, load_countries=None):
+    """
+    بحث محلي ذكي يفهم الطلبات البسيطة بدون الحاجة لـ API
+    مثال: "الصادرات في تنزانيا" أو "GDP Tanzania 2015-2020"
+    load_countries: دالة (اختيارية) تُرجع قائمة دول API البنك الدولي لتوسيع المطابقة التقريبية؛
+    لا تُستدعى إلا إذا لم تجد المطابقة الدقيقة والتقريبية المحلية أي دولة
+    """
+    
     start_year = 2010
     end_year = 2023
+    corrections = []
     
     # ═══════════════════════════════════════════════════════════════════════════
-    # 1. البحث عن الدول
+    # 1. البحث عن الدول والمجموعات والمؤشرات (مرور واحد على الفهرس المُجمَّع)
     # ═══════════════════════════════════════════════════════════════════════════
     
-    # قاموس موسع للدول (عربي + إنجليزي + أكواد) - أكثر من 200 دولة
-    country_aliases = {
-        # ═══════════════════════════════════════════════════════════════════════
-        # الدول العربية
-        # ═══════════════════════════════════════════════════════════════════════
-        "الجزائر": "DZA", "جزائر": "DZA", "algeria": "DZA", "dza": "DZA",
-        "المغرب": "MAR", "مغرب": "MAR", "morocco": "MAR", "mar": "MAR",
-        "تونس": "TUN", "tunisia": "TUN", "tun": "TUN",
-        "مصر": "EGY", "egypt": "EGY", "egy": "EGY",
-        "السعودية": "SAU", "سعودية": "SAU", "saudi": "SAU", "saudi arabia": "SAU", "sau": "SAU",
-        "الإمارات": "ARE", "امارات": "ARE", "الامارات": "ARE", "uae": "ARE", "emirates": "ARE", "are": "ARE",
-        "الكويت": "KWT", "كويت": "KWT", "kuwait": "KWT", "kwt": "KWT",
-        "قطر": "QAT", "qatar": "QAT", "qat": "QAT",
-        "البحرين": "BHR", "بحرين": "BHR", "bahrain": "BHR", "bhr": "BHR",
-        "عمان": "OMN", "oman": "OMN", "omn": "OMN",
-        "العراق": "IRQ", "عراق": "IRQ", "iraq": "IRQ", "irq": "IRQ",
-        "الأردن": "JOR", "اردن": "JOR", "jordan": "JOR", "jor": "JOR",
-        "لبنان": "LBN", "lebanon": "LBN", "lbn": "LBN",
-        "سوريا": "SYR", "syria": "SYR", "syr": "SYR",
-        "فلسطين": "PSE", "palestine": "PSE", "pse": "PSE",
-        "اليمن": "YEM", "يمن": "YEM", "yemen": "YEM", "yem": "YEM",
-        "ليبيا": "LBY", "libya": "LBY", "lby": "LBY",
-        "السودان": "SDN", "سودان": "SDN", "sudan": "SDN", "sdn": "SDN",
-        "موريتانيا": "MRT", "mauritania": "MRT", "mrt": "MRT",
-        "الصومال": "SOM", "صومال": "SOM", "somalia": "SOM", "som": "SOM",
-        "جيبوتي": "DJI", "djibouti": "DJI", "dji": "DJI",
-        "جزر القمر": "COM", "comoros": "COM", "com": "COM",
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # أفريقيا (جنوب الصحراء)
-        # ═══════════════════════════════════════════════════════════════════════
-        "جنوب افريقيا": "ZAF", "جنوب أفريقيا": "ZAF", "south africa": "ZAF", "zaf": "ZAF",
-        "نيجيريا": "NGA", "nigeria": "NGA", "nga": "NGA",
-        "تنزانيا": "TZA", "tanzania": "TZA", "tza": "TZA",
-        "كينيا": "KEN", "kenya": "KEN", "ken": "KEN",
-        "إثيوبيا": "ETH", "اثيوبيا": "ETH", "ethiopia": "ETH", "eth": "ETH",
-        "غانا": "GHA", "ghana": "GHA", "gha": "GHA",
-        "أوغندا": "UGA", "اوغندا": "UGA", "uganda": "UGA", "uga": "UGA",
-        "موزمبيق": "MOZ", "mozambique": "MOZ", "moz": "MOZ",
-        "أنغولا": "AGO", "انغولا": "AGO", "angola": "AGO", "ago": "AGO",
-        "الكاميرون": "CMR", "cameroon": "CMR", "cmr": "CMR",
-        "كوت ديفوار": "CIV", "ساحل العاج": "CIV", "ivory coast": "CIV", "cote d'ivoire": "CIV", "civ": "CIV",
-        "السنغال": "SEN", "senegal": "SEN", "sen": "SEN",
-        "زيمبابوي": "ZWE", "zimbabwe": "ZWE", "zwe": "ZWE",
-        "زامبيا": "ZMB", "zambia": "ZMB", "zmb": "ZMB",
-        "رواندا": "RWA", "rwanda": "RWA", "rwa": "RWA",
-        "الكونغو": "COD", "كونغو": "COD", "congo": "COD", "drc": "COD", "cod": "COD",
-        "مدغشقر": "MDG", "madagascar": "MDG", "mdg": "MDG",
-        "مالي": "MLI", "mali": "MLI", "mli": "MLI",
-        "بوركينا فاسو": "BFA", "burkina faso": "BFA", "bfa": "BFA",
-        "النيجر": "NER", "niger": "NER", "ner": "NER",
-        "تشاد": "TCD", "chad": "TCD", "tcd": "TCD",
-        "بنين": "BEN", "benin": "BEN", "ben": "BEN",
-        "توغو": "TGO", "togo": "TGO", "tgo": "TGO",
-        "موريشيوس": "MUS", "mauritius": "MUS", "mus": "MUS",
-        "بوتسوانا": "BWA", "botswana": "BWA", "bwa": "BWA",
-        "ناميبيا": "NAM", "namibia": "NAM", "nam": "NAM",
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # آسيا
-        # ═══════════════════════════════════════════════════════════════════════
-        "الصين": "CHN", "صين": "CHN", "china": "CHN", "chn": "CHN",
-        "الهند": "IND", "هند": "IND", "india": "IND", "ind": "IND",
-        "اليابان": "JPN", "يابان": "JPN", "japan": "JPN", "jpn": "JPN",
-        "كوريا": "KOR", "كوريا الجنوبية": "KOR", "south korea": "KOR", "korea": "KOR", "kor": "KOR",
-        "كوريا الشمالية": "PRK", "north korea": "PRK", "prk": "PRK",
-        "إندونيسيا": "IDN", "اندونيسيا": "IDN", "indonesia": "IDN", "idn": "IDN",
-        "باكستان": "PAK", "pakistan": "PAK", "pak": "PAK",
-        "بنغلاديش": "BGD", "bangladesh": "BGD", "bgd": "BGD",
-        "فيتنام": "VNM", "vietnam": "VNM", "vnm": "VNM",
-        "تايلاند": "THA", "thailand": "THA", "tha": "THA",
-        "ماليزيا": "MYS", "malaysia": "MYS", "mys": "MYS",
-        "سنغافورة": "SGP", "singapore": "SGP", "sgp": "SGP",
-        "الفلبين": "PHL", "فلبين": "PHL", "philippines": "PHL", "phl": "PHL",
-        "ميانمار": "MMR", "بورما": "MMR", "myanmar": "MMR", "burma": "MMR", "mmr": "MMR",
-        "سريلانكا": "LKA", "sri lanka": "LKA", "lka": "LKA",
-        "نيبال": "NPL", "nepal": "NPL", "npl": "NPL",
-        "كمبوديا": "KHM", "cambodia": "KHM", "khm": "KHM",
-        "لاوس": "LAO", "laos": "LAO", "lao": "LAO",
-        "منغوليا": "MNG", "mongolia": "MNG", "mng": "MNG",
-        "تايوان": "TWN", "taiwan": "TWN", "twn": "TWN",
-        "هونغ كونغ": "HKG", "hong kong": "HKG", "hkg": "HKG",
-        "ماكاو": "MAC", "macau": "MAC", "mac": "MAC",
-        "أفغانستان": "AFG", "افغانستان": "AFG", "afghanistan": "AFG", "afg": "AFG",
-        "كازاخستان": "KAZ", "kazakhstan": "KAZ", "kaz": "KAZ",
-        "أوزبكستان": "UZB", "uzbekistan": "UZB", "uzb": "UZB",
-        "تركمانستان": "TKM", "turkmenistan": "TKM", "tkm": "TKM",
-        "طاجيكستان": "TJK", "tajikistan": "TJK", "tjk": "TJK",
-        "قيرغيزستان": "KGZ", "kyrgyzstan": "KGZ", "kgz": "KGZ",
-        "أذربيجان": "AZE", "azerbaijan": "AZE", "aze": "AZE",
-        "جورجيا": "GEO", "georgia": "GEO", "geo": "GEO",
-        "أرمينيا": "ARM", "armenia": "ARM", "arm": "ARM",
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الشرق الأوسط
-        # ═══════════════════════════════════════════════════════════════════════
-        "إيران": "IRN", "ايران": "IRN", "iran": "IRN", "irn": "IRN",
-        "تركيا": "TUR", "turkey": "TUR", "turkiye": "TUR", "tur": "TUR",
-        "إسرائيل": "ISR", "اسرائيل": "ISR", "israel": "ISR", "isr": "ISR",
-        "قبرص": "CYP", "cyprus": "CYP", "cyp": "CYP",
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # أوروبا
-        # ═══════════════════════════════════════════════════════════════════════
-        "ألمانيا": "DEU", "المانيا": "DEU", "germany": "DEU", "deu": "DEU",
-        "فرنسا": "FRA", "france": "FRA", "fra": "FRA",
-        "بريطانيا": "GBR", "المملكة المتحدة": "GBR", "uk": "GBR", "britain": "GBR", "united kingdom": "GBR", "gbr": "GBR",
-        "إيطاليا": "ITA", "ايطاليا": "ITA", "italy": "ITA", "ita": "ITA",
-        "إسبانيا": "ESP", "اسبانيا": "ESP", "spain": "ESP", "esp": "ESP",
-        "هولندا": "NLD", "netherlands": "NLD", "holland": "NLD", "nld": "NLD",
-        "بلجيكا": "BEL", "belgium": "BEL", "bel": "BEL",
-        "السويد": "SWE", "sweden": "SWE", "swe": "SWE",
-        "النرويج": "NOR", "norway": "NOR", "nor": "NOR",
-        "الدنمارك": "DNK", "denmark": "DNK", "dnk": "DNK",
-        "فنلندا": "FIN", "finland": "FIN", "fin": "FIN",
-        "سويسرا": "CHE", "switzerland": "CHE", "che": "CHE",
-        "النمسا": "AUT", "austria": "AUT", "aut": "AUT",
-        "البرتغال": "PRT", "portugal": "PRT", "prt": "PRT",
-        "اليونان": "GRC", "greece": "GRC", "grc": "GRC",
-        "بولندا": "POL", "poland": "POL", "pol": "POL",
-        "التشيك": "CZE", "czech": "CZE", "czechia": "CZE", "cze": "CZE",
-        "رومانيا": "ROU", "romania": "ROU", "rou": "ROU",
-        "المجر": "HUN", "hungary": "HUN", "hun": "HUN",
-        "بلغاريا": "BGR", "bulgaria": "BGR", "bgr": "BGR",
-        "أوكرانيا": "UKR", "اوكرانيا": "UKR", "ukraine": "UKR", "ukr": "UKR",
-        "روسيا": "RUS", "russia": "RUS", "rus": "RUS",
-        "بيلاروسيا": "BLR", "belarus": "BLR", "blr": "BLR",
-        "أيرلندا": "IRL", "ايرلندا": "IRL", "ireland": "IRL", "irl": "IRL",
-        "سلوفاكيا": "SVK", "slovakia": "SVK", "svk": "SVK",
-        "سلوفينيا": "SVN", "slovenia": "SVN", "svn": "SVN",
-        "كرواتيا": "HRV", "croatia": "HRV", "hrv": "HRV",
-        "صربيا": "SRB", "serbia": "SRB", "srb": "SRB",
-        "ألبانيا": "ALB", "albania": "ALB", "alb": "ALB",
-        "مقدونيا": "MKD", "macedonia": "MKD", "mkd": "MKD",
-        "البوسنة": "BIH", "bosnia": "BIH", "bih": "BIH",
-        "الجبل الأسود": "MNE", "montenegro": "MNE", "mne": "MNE",
-        "لاتفيا": "LVA", "latvia": "LVA", "lva": "LVA",
-        "ليتوانيا": "LTU", "lithuania": "LTU", "ltu": "LTU",
-        "إستونيا": "EST", "estonia": "EST", "est": "EST",
-        "لوكسمبورغ": "LUX", "luxembourg": "LUX", "lux": "LUX",
-        "مالطا": "MLT", "malta": "MLT", "mlt": "MLT",
-        "أيسلندا": "ISL", "iceland": "ISL", "isl": "ISL",
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الأمريكتان
-        # ═══════════════════════════════════════════════════════════════════════
-        "أمريكا": "USA", "امريكا": "USA", "الولايات المتحدة": "USA", "usa": "USA", "america": "USA", "united states": "USA", "us": "USA",
-        "كندا": "CAN", "canada": "CAN", "can": "CAN",
-        "المكسيك": "MEX", "مكسيك": "MEX", "mexico": "MEX", "mex": "MEX",
-        "البرازيل": "BRA", "برازيل": "BRA", "brazil": "BRA", "bra": "BRA",
-        "الأرجنتين": "ARG", "ارجنتين": "ARG", "argentina": "ARG", "arg": "ARG",
-        "كولومبيا": "COL", "colombia": "COL", "col": "COL",
-        "تشيلي": "CHL", "chile": "CHL", "chl": "CHL",
-        "بيرو": "PER", "peru": "PER", "per": "PER",
-        "فنزويلا": "VEN", "venezuela": "VEN", "ven": "VEN",
-        "الإكوادور": "ECU", "ecuador": "ECU", "ecu": "ECU",
-        "بوليفيا": "BOL", "bolivia": "BOL", "bol": "BOL",
-        "باراغواي": "PRY", "paraguay": "PRY", "pry": "PRY",
-        "أوروغواي": "URY", "uruguay": "URY", "ury": "URY",
-        "كوبا": "CUB", "cuba": "CUB", "cub": "CUB",
-        "جامايكا": "JAM", "jamaica": "JAM", "jam": "JAM",
-        "بنما": "PAN", "panama": "PAN", "pan": "PAN",
-        "كوستاريكا": "CRI", "costa rica": "CRI", "cri": "CRI",
-        "غواتيمالا": "GTM", "guatemala": "GTM", "gtm": "GTM",
-        "هندوراس": "HND", "honduras": "HND", "hnd": "HND",
-        "السلفادور": "SLV", "el salvador": "SLV", "slv": "SLV",
-        "نيكاراغوا": "NIC", "nicaragua": "NIC", "nic": "NIC",
-        "جمهورية الدومينيكان": "DOM", "dominican republic": "DOM", "dom": "DOM",
-        "هايتي": "HTI", "haiti": "HTI", "hti": "HTI",
-        "ترينيداد": "TTO", "trinidad": "TTO", "tto": "TTO",
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # أوقيانوسيا
-        # ═══════════════════════════════════════════════════════════════════════
-        "أستراليا": "AUS", "استراليا": "AUS", "australia": "AUS", "aus": "AUS",
-        "نيوزيلندا": "NZL", "new zealand": "NZL", "nzl": "NZL",
-        "بابوا غينيا": "PNG", "papua new guinea": "PNG", "png": "PNG",
-        "فيجي": "FJI", "fiji": "FJI", "fji": "FJI",
-    }
-    
-    # مجموعات الدول الموسعة
-    country_groups = {
-        # العربية
-        "الدول العربية": ["DZA", "MAR", "TUN", "EGY", "SAU", "ARE", "KWT", "QAT", "BHR", "OMN", "IRQ", "JOR", "LBN", "SYR", "PSE", "YEM", "LBY", "SDN", "MRT"],
-        "العربية": ["DZA", "MAR", "TUN", "EGY", "SAU", "ARE", "KWT", "QAT", "BHR", "OMN", "IRQ", "JOR", "LBN"],
-        "arab": ["DZA", "MAR", "TUN", "EGY", "SAU", "ARE", "KWT", "QAT", "BHR", "OMN", "IRQ", "JOR", "LBN"],
-        "arab countries": ["DZA", "MAR", "TUN", "EGY", "SAU", "ARE", "KWT", "QAT", "BHR", "OMN", "IRQ", "JOR", "LBN"],
-        # الخليج
-        "الخليج": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
-        "خليج": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
-        "دول الخليج": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
-        "gulf": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
-        "gcc": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
-        "gulf countries": ["SAU", "ARE", "KWT", "QAT", "BHR", "OMN"],
-        # شمال أفريقيا
-        "المغرب العربي": ["DZA", "MAR", "TUN", "LBY", "MRT"],
-        "شمال افريقيا": ["DZA", "MAR", "TUN", "LBY", "EGY"],
-        "شمال أفريقيا": ["DZA", "MAR", "TUN", "LBY", "EGY"],
-        "north africa": ["DZA", "MAR", "TUN", "LBY", "EGY"],
-        "maghreb": ["DZA", "MAR", "TUN", "LBY", "MRT"],
-        # أفريقيا
-        "أفريقيا": ["DZA", "EGY", "NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "MAR"],
-        "افريقيا": ["DZA", "EGY", "NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "MAR"],
-        "africa": ["DZA", "EGY", "NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "MAR"],
-        "african countries": ["DZA", "EGY", "NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "MAR"],
-        "sub-saharan africa": ["NGA", "ZAF", "KEN", "ETH", "TZA", "GHA", "UGA", "SEN", "CIV"],
-        # مجموعات اقتصادية
-        "g7": ["USA", "GBR", "FRA", "DEU", "ITA", "CAN", "JPN"],
-        "g20": ["USA", "CHN", "JPN", "DEU", "GBR", "FRA", "ITA", "BRA", "IND", "RUS", "AUS", "KOR", "MEX", "IDN", "SAU", "TUR", "ARG", "ZAF"],
-        "brics": ["BRA", "RUS", "IND", "CHN", "ZAF"],
-        "brics+": ["BRA", "RUS", "IND", "CHN", "ZAF", "EGY", "ETH", "IRN", "SAU", "ARE"],
-        # آسيا
-        "آسيا": ["CHN", "JPN", "KOR", "IND", "IDN", "THA", "MYS", "SGP", "VNM", "PHL"],
-        "اسيا": ["CHN", "JPN", "KOR", "IND", "IDN", "THA", "MYS", "SGP", "VNM", "PHL"],
-        "asia": ["CHN", "JPN", "KOR", "IND", "IDN", "THA", "MYS", "SGP", "VNM", "PHL"],
-        "asian countries": ["CHN", "JPN", "KOR", "IND", "IDN", "THA", "MYS", "SGP", "VNM", "PHL"],
-        "southeast asia": ["IDN", "THA", "MYS", "SGP", "VNM", "PHL", "MMR", "KHM", "LAO"],
-        "asean": ["IDN", "THA", "MYS", "SGP", "VNM", "PHL", "MMR", "KHM", "LAO", "BRN"],
-        # أوروبا
-        "أوروبا": ["DEU", "FRA", "GBR", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT"],
-        "اوروبا": ["DEU", "FRA", "GBR", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT"],
-        "europe": ["DEU", "FRA", "GBR", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT"],
-        "european union": ["DEU", "FRA", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT", "GRC", "PRT", "IRL"],
-        "eu": ["DEU", "FRA", "ITA", "ESP", "NLD", "BEL", "POL", "SWE", "AUT", "GRC", "PRT", "IRL"],
-        # أمريكا اللاتينية
-        "أمريكا اللاتينية": ["BRA", "MEX", "ARG", "COL", "CHL", "PER", "VEN", "ECU"],
-        "امريكا اللاتينية": ["BRA", "MEX", "ARG", "COL", "CHL", "PER", "VEN", "ECU"],
-        "latin america": ["BRA", "MEX", "ARG", "COL", "CHL", "PER", "VEN", "ECU"],
-        "south america": ["BRA", "ARG", "COL", "CHL", "PER", "VEN", "ECU", "BOL", "PRY", "URY"],
-        # الدول الكبرى
-        "الدول الكبرى": ["USA", "CHN", "DEU", "JPN", "GBR", "FRA", "IND"],
-        "major economies": ["USA", "CHN", "DEU", "JPN", "GBR", "FRA", "IND"],
-        "largest economies": ["USA", "CHN", "DEU", "JPN", "GBR", "FRA", "IND", "BRA", "ITA", "CAN"],
-        # النمور الآسيوية
-        "النمور الآسيوية": ["KOR", "SGP", "HKG", "TWN"],
-        "asian tigers": ["KOR", "SGP", "HKG", "TWN"],
-        # الأسواق الناشئة
-        "الأسواق الناشئة": ["CHN", "IND", "BRA", "RUS", "MEX", "IDN", "TUR", "ZAF"],
-        "emerging markets": ["CHN", "IND", "BRA", "RUS", "MEX", "IDN", "TUR", "ZAF"],
-    }
-    
-    # البحث عن مجموعات أولاً
-    for group_name, group_codes in country_groups.items():
-        if group_name in query_lower:
-            found_countries.extend(group_codes)
-    
-    # البحث عن الدول الفردية
-    for alias, code in country_aliases.items():
-        if alias in query_lower and code not in found_countries:
-            found_countries.append(code)
-    
-    # البحث في أجزاء الطلب
-    for part in query_parts:
-        part_lower = part.lower().strip()
-        if part_lower in country_aliases and country_aliases[part_lower] not in found_countries:
-            found_countries.append(country_aliases[part_lower])
+    found_countries, found_indicators = match_aliases(query)
+    
+    # المطابقة التقريبية لما لم يُعثر عليه (أخطاء إملائية، اختلافات الهمزة والتاء المربوطة...)
+    missing_kinds = set()
+    if not found_countries:
+        missing_kinds |= {"country", "group"}
+    if not found_indicators:
+        missing_kinds.add("indicator")
+    
+    if missing_kinds:
+        fuzzy_countries, fuzzy_indicators, corrections = fuzzy_match_aliases(query, missing_kinds)
+        found_countries = found_countries or fuzzy_countries
+        found_indicators = found_indicators or fuzzy_indicators
+    
+    # قائمة دول API (شبكة) فقط عند الحاجة: دولة غير موجودة في القاعدة المحلية
+    if not found_countries and load_countries is not None:
+        countries_df = load_countries()
+        if countries_df is not None and not countries_df.empty:
+            extra_countries = tuple(zip(countries_df["name"], countries_df["code"]))
+            fuzzy_countries, _, country_corrections = fuzzy_match_aliases(query, {"country", "group"}, extra_countries)
+            found_countries = fuzzy_countries
+            corrections += country_corrections
     
     # ═══════════════════════════════════════════════════════════════════════════
-    # 2. البحث عن المؤشرات - قاموس موسع
-    # ═══════════════════════════════════════════════════════════════════════════
-    
-    indicator_aliases = {
-        # ═══════════════════════════════════════════════════════════════════════
-        # الناتج المحلي الإجمالي GDP
-        # ═══════════════════════════════════════════════════════════════════════
-        "الناتج المحلي": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي (USD)"},
-        "الناتج المحلي الإجمالي": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي (USD)"},
-        "الناتج": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي"},
-        "ناتج محلي": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي"},
-        "ناتج": {"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي"},
-        "gdp": {"code": "NY.GDP.MKTP.CD", "name": "GDP (current US$)"},
-        "gross domestic product": {"code": "NY.GDP.MKTP.CD", "name": "GDP"},
-        # نمو الناتج المحلي
-        "نمو الناتج المحلي": {"code": "NY.GDP.MKTP.KD.ZG", "name": "نمو الناتج المحلي (%)"},
-        "نمو الناتج": {"code": "NY.GDP.MKTP.KD.ZG", "name": "نمو الناتج المحلي (%)"},
-        "النمو الاقتصادي": {"code": "NY.GDP.MKTP.KD.ZG", "name": "النمو الاقتصادي (%)"},
-        "معدل النمو": {"code": "NY.GDP.MKTP.KD.ZG", "name": "معدل النمو (%)"},
-        "النمو": {"code": "NY.GDP.MKTP.KD.ZG", "name": "نمو الناتج المحلي"},
-        "نمو": {"code": "NY.GDP.MKTP.KD.ZG", "name": "نمو الناتج المحلي"},
-        "gdp growth": {"code": "NY.GDP.MKTP.KD.ZG", "name": "GDP Growth (%)"},
-        "growth": {"code": "NY.GDP.MKTP.KD.ZG", "name": "GDP Growth"},
-        "economic growth": {"code": "NY.GDP.MKTP.KD.ZG", "name": "Economic Growth"},
-        # الناتج للفرد
-        "الناتج المحلي للفرد": {"code": "NY.GDP.PCAP.CD", "name": "الناتج المحلي للفرد (USD)"},
-        "الناتج للفرد": {"code": "NY.GDP.PCAP.CD", "name": "الناتج المحلي للفرد"},
-        "دخل الفرد": {"code": "NY.GDP.PCAP.CD", "name": "دخل الفرد"},
-        "للفرد": {"code": "NY.GDP.PCAP.CD", "name": "الناتج المحلي للفرد"},
-        "gdp per capita": {"code": "NY.GDP.PCAP.CD", "name": "GDP per Capita"},
-        "per capita": {"code": "NY.GDP.PCAP.CD", "name": "GDP per Capita"},
-        "income per capita": {"code": "NY.GDP.PCAP.CD", "name": "Income per Capita"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # التجارة الخارجية Trade
-        # ═══════════════════════════════════════════════════════════════════════
-        "الصادرات": {"code": "NE.EXP.GNFS.CD", "name": "الصادرات (USD)"},
-        "صادرات": {"code": "NE.EXP.GNFS.CD", "name": "الصادرات"},
-        "التصدير": {"code": "NE.EXP.GNFS.CD", "name": "الصادرات"},
-        "exports": {"code": "NE.EXP.GNFS.CD", "name": "Exports (current US$)"},
-        "export": {"code": "NE.EXP.GNFS.CD", "name": "Exports"},
-        "الواردات": {"code": "NE.IMP.GNFS.CD", "name": "الواردات (USD)"},
-        "واردات": {"code": "NE.IMP.GNFS.CD", "name": "الواردات"},
-        "الاستيراد": {"code": "NE.IMP.GNFS.CD", "name": "الواردات"},
-        "imports": {"code": "NE.IMP.GNFS.CD", "name": "Imports (current US$)"},
-        "import": {"code": "NE.IMP.GNFS.CD", "name": "Imports"},
-        "الميزان التجاري": {"code": "NE.RSB.GNFS.CD", "name": "الميزان التجاري"},
-        "ميزان تجاري": {"code": "NE.RSB.GNFS.CD", "name": "الميزان التجاري"},
-        "trade balance": {"code": "NE.RSB.GNFS.CD", "name": "Trade Balance"},
-        "التجارة": {"code": "NE.TRD.GNFS.ZS", "name": "التجارة (% من الناتج)"},
-        "حجم التجارة": {"code": "NE.TRD.GNFS.ZS", "name": "حجم التجارة"},
-        "trade": {"code": "NE.TRD.GNFS.ZS", "name": "Trade (% of GDP)"},
-        # نسب التجارة
-        "نسبة الصادرات": {"code": "NE.EXP.GNFS.ZS", "name": "الصادرات (% من الناتج)"},
-        "exports percent": {"code": "NE.EXP.GNFS.ZS", "name": "Exports (% of GDP)"},
-        "نسبة الواردات": {"code": "NE.IMP.GNFS.ZS", "name": "الواردات (% من الناتج)"},
-        "imports percent": {"code": "NE.IMP.GNFS.ZS", "name": "Imports (% of GDP)"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # التضخم والأسعار Inflation
-        # ═══════════════════════════════════════════════════════════════════════
-        "التضخم": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم (%)"},
-        "تضخم": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم"},
-        "معدل التضخم": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم (%)"},
-        "نسبة التضخم": {"code": "FP.CPI.TOTL.ZG", "name": "نسبة التضخم"},
-        "inflation": {"code": "FP.CPI.TOTL.ZG", "name": "Inflation Rate (%)"},
-        "inflation rate": {"code": "FP.CPI.TOTL.ZG", "name": "Inflation Rate"},
-        "cpi": {"code": "FP.CPI.TOTL.ZG", "name": "Consumer Price Index"},
-        "الأسعار": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم"},
-        "اسعار": {"code": "FP.CPI.TOTL.ZG", "name": "معدل التضخم"},
-        "مؤشر الأسعار": {"code": "FP.CPI.TOTL", "name": "مؤشر أسعار المستهلك"},
-        "consumer prices": {"code": "FP.CPI.TOTL", "name": "Consumer Price Index"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # البطالة وسوق العمل Unemployment
-        # ═══════════════════════════════════════════════════════════════════════
-        "البطالة": {"code": "SL.UEM.TOTL.ZS", "name": "معدل البطالة (%)"},
-        "بطالة": {"code": "SL.UEM.TOTL.ZS", "name": "معدل البطالة"},
-        "معدل البطالة": {"code": "SL.UEM.TOTL.ZS", "name": "معدل البطالة (%)"},
-        "نسبة البطالة": {"code": "SL.UEM.TOTL.ZS", "name": "نسبة البطالة"},
-        "unemployment": {"code": "SL.UEM.TOTL.ZS", "name": "Unemployment Rate (%)"},
-        "unemployment rate": {"code": "SL.UEM.TOTL.ZS", "name": "Unemployment Rate"},
-        "jobless": {"code": "SL.UEM.TOTL.ZS", "name": "Unemployment"},
-        "بطالة الشباب": {"code": "SL.UEM.1524.ZS", "name": "بطالة الشباب (%)"},
-        "youth unemployment": {"code": "SL.UEM.1524.ZS", "name": "Youth Unemployment (%)"},
-        "القوى العاملة": {"code": "SL.TLF.TOTL.IN", "name": "إجمالي القوى العاملة"},
-        "قوى عاملة": {"code": "SL.TLF.TOTL.IN", "name": "القوى العاملة"},
-        "labor force": {"code": "SL.TLF.TOTL.IN", "name": "Labor Force"},
-        "labour force": {"code": "SL.TLF.TOTL.IN", "name": "Labor Force"},
-        "workforce": {"code": "SL.TLF.TOTL.IN", "name": "Workforce"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # السكان Population
-        # ═══════════════════════════════════════════════════════════════════════
-        "السكان": {"code": "SP.POP.TOTL", "name": "إجمالي السكان"},
-        "سكان": {"code": "SP.POP.TOTL", "name": "إجمالي السكان"},
-        "عدد السكان": {"code": "SP.POP.TOTL", "name": "عدد السكان"},
-        "تعداد السكان": {"code": "SP.POP.TOTL", "name": "تعداد السكان"},
-        "population": {"code": "SP.POP.TOTL", "name": "Total Population"},
-        "نمو السكان": {"code": "SP.POP.GROW", "name": "نمو السكان (%)"},
-        "معدل نمو السكان": {"code": "SP.POP.GROW", "name": "معدل نمو السكان"},
-        "population growth": {"code": "SP.POP.GROW", "name": "Population Growth (%)"},
-        "الكثافة السكانية": {"code": "EN.POP.DNST", "name": "الكثافة السكانية"},
-        "كثافة سكانية": {"code": "EN.POP.DNST", "name": "الكثافة السكانية"},
-        "population density": {"code": "EN.POP.DNST", "name": "Population Density"},
-        "العمر المتوقع": {"code": "SP.DYN.LE00.IN", "name": "متوسط العمر المتوقع"},
-        "متوسط العمر": {"code": "SP.DYN.LE00.IN", "name": "متوسط العمر المتوقع"},
-        "life expectancy": {"code": "SP.DYN.LE00.IN", "name": "Life Expectancy"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الاستثمار Investment
-        # ═══════════════════════════════════════════════════════════════════════
-        "الاستثمار الأجنبي": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي المباشر (USD)"},
-        "الاستثمار الاجنبي": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي المباشر"},
-        "استثمار أجنبي": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي"},
-        "الاستثمار": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي"},
-        "استثمار": {"code": "BX.KLT.DINV.CD.WD", "name": "الاستثمار الأجنبي"},
-        "fdi": {"code": "BX.KLT.DINV.CD.WD", "name": "FDI Inflows (USD)"},
-        "foreign direct investment": {"code": "BX.KLT.DINV.CD.WD", "name": "FDI"},
-        "foreign investment": {"code": "BX.KLT.DINV.CD.WD", "name": "Foreign Investment"},
-        "investment": {"code": "BX.KLT.DINV.CD.WD", "name": "Investment"},
-        "تكوين رأس المال": {"code": "NE.GDI.TOTL.ZS", "name": "تكوين رأس المال (% من الناتج)"},
-        "gross capital formation": {"code": "NE.GDI.TOTL.ZS", "name": "Gross Capital Formation"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # المالية العامة Government Finance
-        # ═══════════════════════════════════════════════════════════════════════
-        "الدين الحكومي": {"code": "GC.DOD.TOTL.GD.ZS", "name": "الدين الحكومي (% من الناتج)"},
-        "الدين العام": {"code": "GC.DOD.TOTL.GD.ZS", "name": "الدين العام (% من الناتج)"},
-        "الدين": {"code": "GC.DOD.TOTL.GD.ZS", "name": "الدين الحكومي"},
-        "دين": {"code": "GC.DOD.TOTL.GD.ZS", "name": "الدين الحكومي"},
-        "debt": {"code": "GC.DOD.TOTL.GD.ZS", "name": "Government Debt (% of GDP)"},
-        "government debt": {"code": "GC.DOD.TOTL.GD.ZS", "name": "Government Debt"},
-        "public debt": {"code": "GC.DOD.TOTL.GD.ZS", "name": "Public Debt"},
-        "الإيرادات الحكومية": {"code": "GC.REV.XGRT.GD.ZS", "name": "الإيرادات (% من الناتج)"},
-        "إيرادات الحكومة": {"code": "GC.REV.XGRT.GD.ZS", "name": "الإيرادات الحكومية"},
-        "government revenue": {"code": "GC.REV.XGRT.GD.ZS", "name": "Government Revenue"},
-        "النفقات الحكومية": {"code": "GC.XPN.TOTL.GD.ZS", "name": "النفقات (% من الناتج)"},
-        "إنفاق الحكومة": {"code": "GC.XPN.TOTL.GD.ZS", "name": "النفقات الحكومية"},
-        "government expenditure": {"code": "GC.XPN.TOTL.GD.ZS", "name": "Government Expenditure"},
-        "government spending": {"code": "GC.XPN.TOTL.GD.ZS", "name": "Government Spending"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # التعليم Education
-        # ═══════════════════════════════════════════════════════════════════════
-        "الإنفاق على التعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "الإنفاق على التعليم (% من الناتج)"},
-        "الانفاق على التعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "الإنفاق على التعليم"},
-        "ميزانية التعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "ميزانية التعليم"},
-        "التعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "الإنفاق على التعليم"},
-        "تعليم": {"code": "SE.XPD.TOTL.GD.ZS", "name": "الإنفاق على التعليم"},
-        "education": {"code": "SE.XPD.TOTL.GD.ZS", "name": "Education Expenditure (% of GDP)"},
-        "education spending": {"code": "SE.XPD.TOTL.GD.ZS", "name": "Education Spending"},
-        "الالتحاق بالتعليم": {"code": "SE.PRM.ENRR", "name": "معدل الالتحاق بالتعليم الابتدائي"},
-        "school enrollment": {"code": "SE.PRM.ENRR", "name": "School Enrollment Rate"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الصحة Health
-        # ═══════════════════════════════════════════════════════════════════════
-        "الإنفاق على الصحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "الإنفاق على الصحة (% من الناتج)"},
-        "الانفاق على الصحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "الإنفاق على الصحة"},
-        "ميزانية الصحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "ميزانية الصحة"},
-        "الصحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "الإنفاق على الصحة"},
-        "صحة": {"code": "SH.XPD.CHEX.GD.ZS", "name": "الإنفاق على الصحة"},
-        "health": {"code": "SH.XPD.CHEX.GD.ZS", "name": "Health Expenditure (% of GDP)"},
-        "health spending": {"code": "SH.XPD.CHEX.GD.ZS", "name": "Health Spending"},
-        "healthcare": {"code": "SH.XPD.CHEX.GD.ZS", "name": "Healthcare"},
-        "وفيات الرضع": {"code": "SP.DYN.IMRT.IN", "name": "معدل وفيات الرضع"},
-        "infant mortality": {"code": "SP.DYN.IMRT.IN", "name": "Infant Mortality Rate"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الطاقة Energy
-        # ═══════════════════════════════════════════════════════════════════════
-        "استهلاك الطاقة": {"code": "EG.USE.PCAP.KG.OE", "name": "استهلاك الطاقة للفرد"},
-        "الطاقة": {"code": "EG.USE.PCAP.KG.OE", "name": "استهلاك الطاقة للفرد"},
-        "طاقة": {"code": "EG.USE.PCAP.KG.OE", "name": "استهلاك الطاقة"},
-        "energy": {"code": "EG.USE.PCAP.KG.OE", "name": "Energy Use per Capita"},
-        "energy consumption": {"code": "EG.USE.PCAP.KG.OE", "name": "Energy Consumption"},
-        "الطاقة المتجددة": {"code": "EG.FEC.RNEW.ZS", "name": "الطاقة المتجددة (%)"},
-        "renewable energy": {"code": "EG.FEC.RNEW.ZS", "name": "Renewable Energy (%)"},
-        "الكهرباء": {"code": "EG.ELC.ACCS.ZS", "name": "الوصول للكهرباء (%)"},
-        "electricity": {"code": "EG.ELC.ACCS.ZS", "name": "Access to Electricity (%)"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # البيئة Environment
-        # ═══════════════════════════════════════════════════════════════════════
-        "انبعاثات CO2": {"code": "EN.ATM.CO2E.PC", "name": "انبعاثات CO2 للفرد (طن)"},
-        "الانبعاثات": {"code": "EN.ATM.CO2E.PC", "name": "انبعاثات CO2"},
-        "co2": {"code": "EN.ATM.CO2E.PC", "name": "CO2 Emissions per Capita"},
-        "carbon emissions": {"code": "EN.ATM.CO2E.PC", "name": "Carbon Emissions"},
-        "emissions": {"code": "EN.ATM.CO2E.PC", "name": "CO2 Emissions"},
-        "الغابات": {"code": "AG.LND.FRST.ZS", "name": "مساحة الغابات (%)"},
-        "forest": {"code": "AG.LND.FRST.ZS", "name": "Forest Area (%)"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # القطاع المالي والبنكي Financial
-        # ═══════════════════════════════════════════════════════════════════════
-        "سعر الصرف": {"code": "PA.NUS.FCRF", "name": "سعر الصرف الرسمي"},
-        "الصرف": {"code": "PA.NUS.FCRF", "name": "سعر الصرف"},
-        "exchange rate": {"code": "PA.NUS.FCRF", "name": "Official Exchange Rate"},
-        "currency": {"code": "PA.NUS.FCRF", "name": "Exchange Rate"},
-        "سعر الفائدة": {"code": "FR.INR.RINR", "name": "سعر الفائدة الحقيقي (%)"},
-        "الفائدة": {"code": "FR.INR.RINR", "name": "سعر الفائدة"},
-        "interest rate": {"code": "FR.INR.RINR", "name": "Real Interest Rate (%)"},
-        "الائتمان المحلي": {"code": "FS.AST.DOMS.GD.ZS", "name": "الائتمان المحلي (% من الناتج)"},
-        "domestic credit": {"code": "FS.AST.DOMS.GD.ZS", "name": "Domestic Credit (% of GDP)"},
-        "التحويلات المالية": {"code": "BX.TRF.PWKR.CD.DT", "name": "تحويلات العاملين (USD)"},
-        "remittances": {"code": "BX.TRF.PWKR.CD.DT", "name": "Personal Remittances"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الزراعة Agriculture
-        # ═══════════════════════════════════════════════════════════════════════
-        "الزراعة": {"code": "NV.AGR.TOTL.ZS", "name": "الزراعة (% من الناتج)"},
-        "زراعة": {"code": "NV.AGR.TOTL.ZS", "name": "الزراعة"},
-        "agriculture": {"code": "NV.AGR.TOTL.ZS", "name": "Agriculture (% of GDP)"},
-        "farming": {"code": "NV.AGR.TOTL.ZS", "name": "Agriculture"},
-        "الأراضي الزراعية": {"code": "AG.LND.ARBL.ZS", "name": "الأراضي الزراعية (%)"},
-        "agricultural land": {"code": "AG.LND.ARBL.ZS", "name": "Agricultural Land (%)"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الصناعة Industry
-        # ═══════════════════════════════════════════════════════════════════════
-        "الصناعة": {"code": "NV.IND.TOTL.ZS", "name": "الصناعة (% من الناتج)"},
-        "صناعة": {"code": "NV.IND.TOTL.ZS", "name": "الصناعة"},
-        "industry": {"code": "NV.IND.TOTL.ZS", "name": "Industry (% of GDP)"},
-        "manufacturing": {"code": "NV.IND.MANF.ZS", "name": "Manufacturing (% of GDP)"},
-        "التصنيع": {"code": "NV.IND.MANF.ZS", "name": "التصنيع (% من الناتج)"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الخدمات Services
-        # ═══════════════════════════════════════════════════════════════════════
-        "الخدمات": {"code": "NV.SRV.TOTL.ZS", "name": "الخدمات (% من الناتج)"},
-        "خدمات": {"code": "NV.SRV.TOTL.ZS", "name": "الخدمات"},
-        "services": {"code": "NV.SRV.TOTL.ZS", "name": "Services (% of GDP)"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # السياحة Tourism
-        # ═══════════════════════════════════════════════════════════════════════
-        "السياحة": {"code": "ST.INT.RCPT.CD", "name": "إيرادات السياحة (USD)"},
-        "سياحة": {"code": "ST.INT.RCPT.CD", "name": "إيرادات السياحة"},
-        "tourism": {"code": "ST.INT.RCPT.CD", "name": "Tourism Receipts"},
-        "السياح": {"code": "ST.INT.ARVL", "name": "عدد السياح الوافدين"},
-        "tourists": {"code": "ST.INT.ARVL", "name": "International Tourism Arrivals"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # التكنولوجيا والإنترنت Technology
-        # ═══════════════════════════════════════════════════════════════════════
-        "الإنترنت": {"code": "IT.NET.USER.ZS", "name": "مستخدمو الإنترنت (%)"},
-        "انترنت": {"code": "IT.NET.USER.ZS", "name": "مستخدمو الإنترنت"},
-        "internet": {"code": "IT.NET.USER.ZS", "name": "Internet Users (%)"},
-        "الهاتف المحمول": {"code": "IT.CEL.SETS.P2", "name": "اشتراكات الهاتف المحمول"},
-        "mobile": {"code": "IT.CEL.SETS.P2", "name": "Mobile Subscriptions"},
-        "البحث والتطوير": {"code": "GB.XPD.RSDV.GD.ZS", "name": "الإنفاق على البحث والتطوير"},
-        "r&d": {"code": "GB.XPD.RSDV.GD.ZS", "name": "R&D Expenditure (% of GDP)"},
-        "research": {"code": "GB.XPD.RSDV.GD.ZS", "name": "Research & Development"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # الفقر Poverty
-        # ═══════════════════════════════════════════════════════════════════════
-        "الفقر": {"code": "SI.POV.DDAY", "name": "نسبة الفقر (%)"},
-        "فقر": {"code": "SI.POV.DDAY", "name": "نسبة الفقر"},
-        "poverty": {"code": "SI.POV.DDAY", "name": "Poverty Rate (%)"},
-        "poverty rate": {"code": "SI.POV.DDAY", "name": "Poverty Headcount Ratio"},
-        "معامل جيني": {"code": "SI.POV.GINI", "name": "معامل جيني"},
-        "gini": {"code": "SI.POV.GINI", "name": "Gini Index"},
-        "inequality": {"code": "SI.POV.GINI", "name": "Inequality"},
-        
-        # ═══════════════════════════════════════════════════════════════════════
-        # التنمية البشرية Human Development
-        # ═══════════════════════════════════════════════════════════════════════
-        "معدل الخصوبة": {"code": "SP.DYN.TFRT.IN", "name": "معدل الخصوبة"},
-        "fertility": {"code": "SP.DYN.TFRT.IN", "name": "Fertility Rate"},
-        "معدل الوفاة": {"code": "SP.DYN.CDRT.IN", "name": "معدل الوفاة"},
-        "mortality": {"code": "SP.DYN.CDRT.IN", "name": "Mortality Rate"},
-        "معدل المواليد": {"code": "SP.DYN.CBRT.IN", "name": "معدل المواليد"},
-        "birth rate": {"code": "SP.DYN.CBRT.IN", "name": "Birth Rate"},
-    }
-    
-    # البحث عن المؤشرات في النص
-    for alias, indicator_data in indicator_aliases.items():
-        if alias in query_lower:
-            # تجنب التكرار
-            if not any(ind['code'] == indicator_data['code'] for ind in found_indicators):
-                found_indicators.append(indicator_data)
-    
-    # ═══════════════════════════════════════════════════════════════════════════
-    # 3. استخراج السنوات
+    # 2. استخراج السنوات
     # ═══════════════════════════════════════════════════════════════════════════
     
     # البحث عن نمط السنوات (2010-2023 أو من 2010 إلى 2023)
@@ -1360,46 +1897,234 @@ def smart_local_search(query):
                 end_year = 2023
     
     # ═══════════════════════════════════════════════════════════════════════════
-    # 4. القيم الافتراضية إذا لم يتم العثور على شيء
+    # 3. القيم الافتراضية إذا لم يتم العثور على شيء
     # ═══════════════════════════════════════════════════════════════════════════
     
     # إذا لم يتم العثور على مؤشرات، أضف الناتج المحلي كافتراضي
-    if not found_indicators:
+    default_indicator = not found_indicators
+    if default_indicator:
         found_indicators = [{"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي"}]
     
     # إذا لم يتم العثور على دول، ارجع None
     if not found_countries:
         return None
     
-    # إزالة التكرارات مع الحفاظ على الترتيب
-    found_countries = list(dict.fromkeys(found_countries))
-    
     return {
         "countries": found_countries,
         "indicators": found_indicators,
         "start": start_year,
-        "end": end_year
+        "end": end_year,
+        "corrections": corrections,
+        "default_indicator": default_indicator
+    }
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# البحث في كتالوج البنك الدولي الكامل (فهرس معكوس مع ترتيب BM25)
+# ───────────────────────────────────────────────────────────────────────────────
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_MATCH_WEIGHT = 0.8
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def _tokenize(text):
+    """تقطيع النص إلى كلمات صغيرة الأحرف (الأكواد مثل NY.GDP.MKTP.CD تُقطَّع إلى أجزائها)"""
+    return re.findall(r"\w+", str(text).lower())
+
+
+def build_indicator_index(catalogue):
+    """
+    بناء فهرس معكوس على الكود والاسم والمصدر لكل مؤشر في الكتالوج
+    يحفظ لكل كلمة مصفوفتي (أرقام المستندات، التكرار) لحساب BM25 بعمليات numpy
+    """
+    
+    codes = catalogue["code"].fillna("").astype(str).tolist()
+    names = catalogue["name"].fillna("").astype(str).tolist()
+    sources = catalogue["source"].fillna("").astype(str).tolist() if "source" in catalogue else [""] * len(codes)
+    
+    postings = {}
+    doc_len = np.zeros(len(codes), dtype=np.float32)
+    
+    for doc_id, (code, name, source) in enumerate(zip(codes, names, sources)):
+        tokens = _tokenize(code) + [code.lower()] + _tokenize(name) + _tokenize(source)
+        doc_len[doc_id] = len(tokens)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            postings.setdefault(token, []).append((doc_id, tf))
+    
+    postings = {
+        token: (np.array([d for d, _ in docs], dtype=np.int32), np.array([tf for _, tf in docs], dtype=np.float32))
+        for token, docs in postings.items()
     }
+    
+    return {
+        "fingerprint": _catalogue_fingerprint(catalogue),
+        "codes": codes,
+        "names": names,
+        "sources": sources,
+        "code_lookup": {code.upper(): i for i, code in enumerate(codes)},
+        "vocab": sorted(postings),
+        "postings": postings,
+        "doc_len": doc_len,
+        "avgdl": float(doc_len.mean()) if len(doc_len) else 0.0,
+    }
+
 
+def _catalogue_fingerprint(catalogue):
+    """بصمة الكتالوج لمعرفة ما إذا كان الفهرس المحفوظ ما زال صالحاً"""
+    digest = hashlib.sha1()
+    for code, name in zip(catalogue["code"].astype(str), catalogue["name"].astype(str)):
+        digest.update(f"{code}\t{name}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_persisted_index():
+    """قراءة الفهرس المحفوظ على القرص (إن وجد)"""
+    try:
+        with open(INDICATOR_INDEX_PATH, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def _indicator_index_state():
+    """حالة فهرس الكتالوج المشتركة بين إعادات التشغيل: هل أصبح جاهزاً في هذه العملية"""
+    return {"ready": False}
+
+
+@st.cache_resource(show_spinner=False)
+def get_indicator_index():
+    """
+    فهرس الكتالوج الكامل: يُبنى مرة واحدة لكل عملية ويُحفظ على القرص
+    ويُعاد استخدام النسخة المحفوظة إذا لم يتغير الكتالوج (أو إذا تعذر جلبه)
+    لا يُبنى ولا يُستبدل الفهرس المحفوظ إلا من كتالوج كامل: جلب ناقص (صفحة فاشلة
+    أو عناصر أقل من total المعلن) يرفع استثناءً فيُستخدم الفهرس السابق كما هو
+    """
+    
+    try:
+        catalogue = fetch_all_indicators_from_api()
+    except Exception as e:
+        print(f"Error fetching indicators: {e}")
+        catalogue = pd.DataFrame()
+    persisted = _load_persisted_index()
+    
+    if catalogue.empty:
+        if persisted is None:
+            raise RuntimeError("Indicator catalogue is unavailable")
+        _indicator_index_state()["ready"] = True
+        return persisted
+    
+    if persisted is not None and persisted.get("fingerprint") == _catalogue_fingerprint(catalogue):
+        _indicator_index_state()["ready"] = True
+        return persisted
+    
+    index = build_indicator_index(catalogue)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{INDICATOR_INDEX_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, INDICATOR_INDEX_PATH)
+    except OSError as e:
+        print(f"Could not persist indicator index: {e}")
+    _indicator_index_state()["ready"] = True
+    return index
+
+
+def search_indicator_index(index, query, limit=20):
+    """
+    البحث في الفهرس: مطابقة الكلمات الكاملة والبادئات (للكلمات غير المكتملة) وترتيب النتائج بـ BM25
+    تُرجع DataFrame بالأعمدة code, name, source, score
+    """
+    
+    tokens = _tokenize(query)
+    n_docs = len(index["codes"])
+    if not tokens or n_docs == 0:
+        return pd.DataFrame(columns=["code", "name", "source", "score"])
+    
+    scores = np.zeros(n_docs, dtype=np.float32)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * index["doc_len"] / max(index["avgdl"], 1e-9))
+    vocab = index["vocab"]
+    
+    for token in tokens:
+        token_scores = np.zeros(n_docs, dtype=np.float32)
+        
+        # الكلمة نفسها ثم الكلمات التي تبدأ بها
+        start = bisect.bisect_left(vocab, token)
+        for term in vocab[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            doc_ids, tf = index["postings"][term]
+            idf = np.log1p((n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            term_scores = idf * tf * (BM25_K1 + 1) / (tf + norm[doc_ids])
+            if term != token:
+                term_scores *= PREFIX_MATCH_WEIGHT
+            np.maximum.at(token_scores, doc_ids, term_scores)
+        
+        scores += token_scores
+    
+    # الكود المطابق تماماً يأتي أولاً
+    exact = index["code_lookup"].get(query.strip().upper())
+    if exact is not None:
+        scores[exact] = scores.max() + 1
+    
+    top = np.flatnonzero(scores > 0)
+    top = top[np.argsort(-scores[top], kind="stable")[:limit]]
+    
+    return pd.DataFrame({
+        "code": [index["codes"][i] for i in top],
+        "name": [index["names"][i] for i in top],
+        "source": [index["sources"][i] for i in top],
+        "score": scores[top]
+    })
+
+
+def search_indicator_catalogue(query, limit=20, build=True):
+    """
+    بحث سريع في كامل كتالوج مؤشرات البنك الدولي (DataFrame فارغ إذا لم يتوفر الكتالوج)
+    build=False: البحث فقط إذا كان الفهرس جاهزاً في الذاكرة، دون جلب الكتالوج أو بناء الفهرس
+    """
+    if not build and not _indicator_index_state()["ready"]:
+        return pd.DataFrame(columns=["code", "name", "source", "score"])
+    try:
+        index = get_indicator_index()
+    except RuntimeError:
+        return pd.DataFrame(columns=["code", "name", "source", "score"])
+    return search_indicator_index(index, query, limit)
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 4. تهيئة Gemini Client - Gemini 3.0 Flash Preview
 # ═══════════════════════════════════════════════════════════════════════════════
 
+@st.cache_resource(show_spinner=False)
+def get_gemini_client(api_key):
+    """عميل Gemini مشترك لكل مفتاح عبر الجلسات (الإنشاء محلي ولا يتصل بالشبكة)"""
+    return genai.Client(api_key=api_key)
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _validate_gemini_key(api_key):
+    """
+    التحقق من المفتاح بطلب بيانات النموذج (بدون توليد محتوى أو استهلاك حصة)
+    يرفع استثناء عند الفشل حتى لا تُخزَّن النتيجة الفاشلة
+    """
+    return get_gemini_client(api_key).models.get(model=GEMINI_MODEL_NAME).name
+
+
 def configure_gemini(api_key):
     """Configure Gemini 3.0 Flash Preview API with new SDK"""
     if not GENAI_AVAILABLE:
         return None, False, "❌ مكتبة google-genai غير مثبتة. قم بتثبيتها:\npip install google-genai"
     
     try:
-        # إنشاء العميل باستخدام SDK الجديد
-        client = genai.Client(api_key=api_key)
-        
-        # اختبار الاتصال
-        response = client.models.generate_content(
-            model=GEMINI_MODEL_NAME,
-            contents="مرحبا"
-        )
+        # عميل مخزن مؤقتاً + تحقق خفيف من المفتاح
+        client = get_gemini_client(api_key)
+        _validate_gemini_key(api_key)
         
         return client, True, "✅ تم الاتصال بنجاح!"
     except Exception as e:
@@ -1408,16 +2133,124 @@ def configure_gemini(api_key):
             return None, False, "❌ مفتاح API غير صالح. احصل على مفتاح من:\nhttps://aistudio.google.com/apikey"
         return None, False, f"❌ خطأ في تكوين Gemini: {error_msg}"
 
+
+def apply_api_key(api_key):
+    """تطبيق مفتاح API المُدخل (من الشريط الجانبي أو من قسم البحث) على حالة الجلسة"""
+    
+    if not api_key or api_key == st.session_state.get('api_key', ''):
+        return
+    
+    st.session_state['api_key'] = api_key
+    
+    if not GENAI_AVAILABLE:
+        st.error("❌ مكتبة google-genai غير مثبتة")
+        return
+    
+    client, success, message = configure_gemini(api_key)
+    if success:
+        st.session_state['client'] = client
+        st.session_state['gemini_configured'] = True
+        st.success(message)
+    else:
+        st.session_state['gemini_configured'] = False
+        st.error(message)
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # 4. محلل الطلبات الذكي باستخدام Gemini
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def parse_query_with_ai(client, query):
-    """تحليل طلب المستخدم باستخدام Gemini لاستخراج المؤشرات والدول"""
+def _group_prompt_catalogue():
+    """
+    كتالوج مضغوط لطلب Gemini: سطر واحد لكل كود مع أسمائه المستعارة
+    بدلاً من سطر لكل اسم (كثير من الأسماء تشير إلى الكود نفسه)
+    """
+    
+    indicators = {}
+    for alias, info in INDICATORS_DATABASE.items():
+        entry = indicators.setdefault(info['code'], {"name_en": info['name_en'], "aliases": []})
+        if alias != entry["name_en"] and alias not in entry["aliases"]:
+            entry["aliases"].append(alias)
+    
+    countries = {}
+    for alias, code in COUNTRIES_DATABASE.items():
+        aliases = countries.setdefault(code, [])
+        if alias not in aliases:
+            aliases.append(alias)
+    
+    indicator_lines = {
+        code: f"- {code}: {entry['name_en']}" + (f" | {'، '.join(entry['aliases'])}" if entry['aliases'] else "")
+        for code, entry in indicators.items()
+    }
+    country_lines = {code: f"- {code}: {'، '.join(aliases)}" for code, aliases in countries.items()}
+    return indicator_lines, country_lines
+
+
+# يُحسب مرة واحدة عند التحميل
+PROMPT_INDICATOR_LINES, PROMPT_COUNTRY_LINES = _group_prompt_catalogue()
+PROMPT_INDICATORS_BLOCK = "\n".join(PROMPT_INDICATOR_LINES.values())
+PROMPT_COUNTRIES_BLOCK = "\n".join(PROMPT_COUNTRY_LINES.values())
+
+# حجم القائمة الكاملة القديمة (سطر لكل اسم مستعار) للمقارنة في الواجهة
+LEGACY_PROMPT_CATALOGUE_CHARS = (
+    sum(len(f"- {k}: {v['code']} ({v['name_en']})") + 1 for k, v in INDICATORS_DATABASE.items())
+    + sum(len(f"- {k}: {v}") + 1 for k, v in COUNTRIES_DATABASE.items())
+)
+
+
+def _prompt_candidates(query):
+    """
+    المؤشرات والدول المرشحة للطلب من الفهارس المحلية (المطابقة الدقيقة والتقريبية وكتالوج BM25)
+    مرشحو BM25 يُضافون فقط إذا كان فهرس الكتالوج مبنياً مسبقاً: هذا الوضع لتقليل زمن أول رمز،
+    فلا يُجلب الكتالوج الكامل (~16 ألف مؤشر) ولا يُبنى الفهرس قبل استدعاء Gemini
+    تُرجع قاموسين {الكود: سطر الكتالوج}
+    """
+    
+    countries, indicators = match_aliases(query)
+    fuzzy_countries, fuzzy_indicators, _ = fuzzy_match_aliases(query, {"country", "group", "indicator"})
+    
+    indicator_lines = {}
+    for ind in indicators + fuzzy_indicators:
+        indicator_lines[ind['code']] = PROMPT_INDICATOR_LINES.get(ind['code'], f"- {ind['code']}: {ind['name']}")
+    for row in search_indicator_catalogue(query, limit=10, build=False).itertuples(index=False):
+        indicator_lines.setdefault(row.code, f"- {row.code}: {row.name}")
+    
+    country_lines = {code: PROMPT_COUNTRY_LINES.get(code, f"- {code}") for code in countries + fuzzy_countries}
+    return indicator_lines, country_lines
+
+
+def normalize_query(query):
+    """مفتاح موحد للطلب: توحيد الكتابة العربية وحالة الأحرف ودمج علامات الترقيم والمسافات"""
+    normalized = normalize_arabic(query).casefold()
+    normalized = re.sub(r"[^\w\s]|_", " ", normalized)
+    return " ".join(normalized.split())
+
+
+def get_cached_query_parse(query):
+    """نتيجة تحليل سابقة لطلب مماثل (بعد التوحيد) من الذاكرة الدائمة، أو None"""
+    return cache_get("query_parse", normalize_query(query), QUERY_PARSE_CACHE_TTL_SECONDS)
+
+
+def parse_query_with_ai(client, query, candidates_only=False):
+    """
+    تحليل طلب المستخدم باستخدام Gemini لاستخراج المؤشرات والدول (مع ذاكرة دائمة للنتائج)
+    candidates_only: إرسال المرشحين من الفهارس المحلية فقط بدلاً من الكتالوج المضغوط الكامل
+    تُحفظ مقاييس الطلب (الحجم، الرموز، زمن أول رمز) في st.session_state['ai_parse_stats']
+    """
+    
+    cached = get_cached_query_parse(query)
+    if cached:
+        return cached
     
-    # إنشاء قائمة المؤشرات المتاحة
-    indicators_list = "\n".join([f"- {k}: {v['code']} ({v['name_en']})" for k, v in INDICATORS_DATABASE.items()])
-    countries_list = "\n".join([f"- {k}: {v}" for k, v in COUNTRIES_DATABASE.items()])
+    # الكتالوج المضغوط (مُحضَّر مسبقاً) أو المرشحون فقط
+    indicators_list = PROMPT_INDICATORS_BLOCK
+    countries_list = PROMPT_COUNTRIES_BLOCK
+    
+    if candidates_only:
+        candidate_indicators, candidate_countries = _prompt_candidates(query)
+        if candidate_indicators:
+            indicators_list = "\n".join(candidate_indicators.values())
+        if candidate_countries:
+            countries_list = "\n".join(candidate_countries.values())
     
     prompt = f"""
 أنت خبير في تحليل البيانات الاقتصادية من البنك الدولي. مهمتك تحليل طلب المستخدم واستخراج المعلومات المطلوبة بدقة.
@@ -1427,10 +2260,10 @@ def parse_query_with_ai(client, query):
 "{query}"
 ═══════════════════════════════════════
 
-قاعدة بيانات المؤشرات المتاحة:
+قاعدة بيانات المؤشرات المتاحة (الكود: الاسم | أسماء أخرى):
 {indicators_list}
 
-قاعدة بيانات الدول المتاحة:
+قاعدة بيانات الدول المتاحة (الكود: الأسماء):
 {countries_list}
 
 ═══════════════════════════════════════
@@ -1440,16 +2273,7 @@ def parse_query_with_ai(client, query):
 3. حدد الفترة الزمنية (إذا لم تذكر، استخدم 2010-2023)
 4. إذا ذكر "الدول العربية" أضف: DZA, MAR, TUN, EGY, SAU, ARE
 5. إذا ذكر "دول الخليج" أضف: SAU, ARE, KWT, QAT, BHR, OMN
-
-أهم أكواد المؤشرات (استخدمها بالضبط):
-- الناتج المحلي GDP: NY.GDP.MKTP.CD
-- الصادرات Exports: NE.EXP.GNFS.CD
-- الواردات Imports: NE.IMP.GNFS.CD
-- التضخم Inflation: FP.CPI.TOTL.ZG
-- البطالة Unemployment: SL.UEM.TOTL.ZS
-- السكان Population: SP.POP.TOTL
-- نمو الناتج GDP Growth: NY.GDP.MKTP.KD.ZG
-- الاستثمار الأجنبي FDI: BX.KLT.DINV.CD.WD
+6. استخدم أكواد المؤشرات من القائمة أعلاه بالضبط
 
 ═══════════════════════════════════════
 
@@ -1466,20 +2290,42 @@ def parse_query_with_ai(client, query):
 """
 
     try:
-        response = client.models.generate_content(
+        # البث يسمح بقياس زمن وصول أول رمز
+        started = time.perf_counter()
+        first_token_ms = None
+        usage = None
+        chunks = []
+        
+        for chunk in client.models.generate_content_stream(
             model=GEMINI_MODEL_NAME,
             contents=prompt,
             config=types.GenerateContentConfig(
                 temperature=0.1,
                 max_output_tokens=2000
             )
-        )
+        ):
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - started) * 1000
+            if chunk.text:
+                chunks.append(chunk.text)
+            usage = getattr(chunk, "usage_metadata", None) or usage
         
-        if not response.text:
+        st.session_state['ai_parse_stats'] = {
+            "prompt_chars": len(prompt),
+            "catalogue_chars": len(indicators_list) + len(countries_list),
+            "legacy_catalogue_chars": LEGACY_PROMPT_CATALOGUE_CHARS,
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "first_token_ms": first_token_ms,
+            "total_ms": (time.perf_counter() - started) * 1000,
+            "candidates_only": candidates_only
+        }
+        
+        response_text = "".join(chunks)
+        if not response_text:
             return None
             
         # تنظيف الاستجابة
-        clean_text = response.text.strip()
+        clean_text = response_text.strip()
         clean_text = re.sub(r"```json\s*", "", clean_text)
         clean_text = re.sub(r"```\s*", "", clean_text)
         clean_text = clean_text.strip()
@@ -1490,6 +2336,10 @@ def parse_query_with_ai(client, query):
             clean_text = json_match.group()
         
         parsed = json.loads(clean_text)
+        
+        if isinstance(parsed, dict) and parsed.get('countries'):
+            cache_put("query_parse", normalize_query(query), parsed, QUERY_PARSE_CACHE_MAX_ENTRIES)
+        
         return parsed
         
     except json.JSONDecodeError as e:
@@ -1503,12 +2353,470 @@ def parse_query_with_ai(client, query):
 # 5. جلب البيانات من البنك الدولي
 # ═══════════════════════════════════════════════════════════════════════════════
 
-@st.cache_data(ttl=3600, show_spinner=False)
+# ───────────────────────────────────────────────────────────────────────────────
+# مخزن المشاهدات المحلي (SQLite) - يُقرأ قبل أي طلب شبكي
+# كل خلية (مؤشر، دولة، سنة) تُحفظ مرة واحدة؛ القيمة NULL تعني أن البنك الدولي لا يملك بيانات لها
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _observation_store():
+    """فتح اتصال بمخزن المشاهدات المحلي وإنشاء الجدول عند الحاجة"""
+    
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(OBSERVATION_STORE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS observations (
+            indicator TEXT NOT NULL,
+            country TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            country_name TEXT,
+            value REAL,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (indicator, country, year)
+        ) WITHOUT ROWID
+    """)
+    return conn
+
+
+def load_cached_observations(code, countries, start_year, end_year):
+    """
+    قراءة خلايا مؤشر واحد المحفوظة محلياً (غير المنتهية الصلاحية)
+    تُرجع قائمة (الدولة، اسم الدولة، السنة، القيمة) بما فيها الخلايا الفارغة
+    """
+    
+    if not countries:
+        return []
+    
+    try:
+        conn = _observation_store()
+        try:
+            placeholders = ",".join("?" * len(countries))
+            return conn.execute(
+                f"""
+                SELECT country, country_name, year, value FROM observations
+                WHERE indicator = ? AND country IN ({placeholders})
+                  AND year BETWEEN ? AND ? AND fetched_at >= ?
+                """,
+                [code, *countries, start_year, end_year, time.time() - OBSERVATION_TTL_SECONDS]
+            ).fetchall()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Observation store read failed: {e}")
+        return []
+
+
+def save_observations(code, chunks, countries, start_year, end_year):
+    """
+    حفظ مشاهدات مؤشر (دفعات عمودية) في المخزن المحلي، مع تسجيل الخلايا المطلوبة التي لا قيمة لها
+    حتى لا يُعاد طلبها من الشبكة
+    """
+    
+    now = time.time()
+    cells = {
+        (country, year): (country, None, year, None)
+        for country in countries if len(country) == 3 and country.isalpha()
+        for year in range(start_year, end_year + 1)
+    }
+    for chunk in chunks:
+        for country, name, year, value in zip(
+            chunk["codes"].tolist(), chunk["names"].tolist(), chunk["years"].tolist(), chunk["values"].tolist()
+        ):
+            cells[(country, year)] = (country, name, year, value)
+    
+    try:
+        conn = _observation_store()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?)",
+                    [(code, country, year, name, value, now) for country, name, year, value in cells.values()]
+                )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Observation store write failed: {e}")
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# استيراد ملف WDI المجمع (CSV أو ZIP) إلى مخزن المشاهدات
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _open_wdi_source(source):
+    """
+    مسار ملف WDI محلي، أو تنزيل الرابط بالبث إلى ملف مؤقت
+    تُرجع (المسار، هل هو ملف مؤقت يجب حذفه)
+    """
+    
+    if urlparse(source).scheme not in ("http", "https"):
+        return source, False
+    
+    suffix = os.path.splitext(urlparse(source).path)[1] or ".zip"
+    with get_http_client()["session"].get(source, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            for block in response.iter_content(chunk_size=1 << 20):
+                tmp.write(block)
+    return tmp.name, True
+
+
+def _wdi_data_member(archive):
+    """ملف البيانات الرئيسي داخل الأرشيف (WDICSV.csv أو WDIData.csv، وإلا أكبر ملف CSV)"""
+    
+    members = [info for info in archive.infolist() if info.filename.lower().endswith(".csv")]
+    for info in members:
+        if re.search(r"wdi(csv|data)\.csv$", info.filename.lower()):
+            return info
+    return max(members, key=lambda info: info.file_size) if members else None
+
+
+def _ingest_wdi_csv(raw, total_bytes, indicator_codes=None, on_progress=None):
+    """
+    قراءة CSV بصيغة WDI (دولة × مؤشر في كل سطر والسنوات أعمدة) سطراً بسطر وكتابته في المخزن على دفعات
+    الخلايا الفارغة تُحفظ كـ NULL حتى لا تُطلب لاحقاً من API
+    """
+    
+    reader = csv.reader(TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+    header = [name.strip() for name in next(reader)]
+    columns = {name: i for i, name in enumerate(header)}
+    try:
+        name_col, country_col, indicator_col = columns["Country Name"], columns["Country Code"], columns["Indicator Code"]
+    except KeyError:
+        raise ValueError("الملف ليس بصيغة WDI (الأعمدة Country Name / Country Code / Indicator Code مفقودة)")
+    year_cols = [(i, int(name)) for i, name in enumerate(header) if re.fullmatch(r"(19|20)\d{2}", name)]
+    
+    wanted = {code.strip().upper() for code in indicator_codes} if indicator_codes else None
+    now = time.time()
+    stats = {"rows": 0, "cells": 0, "values": 0, "indicators": set(), "countries": set()}
+    batch = []
+    
+    conn = _observation_store()
+    try:
+        def flush():
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?)", batch)
+            batch.clear()
+            if on_progress and total_bytes:
+                on_progress(min(1.0, raw.tell() / total_bytes))
+        
+        for row in reader:
+            if len(row) <= indicator_col:
+                continue
+            code = row[indicator_col].strip()
+            if wanted is not None and code.upper() not in wanted:
+                continue
+            country, name = row[country_col].strip(), row[name_col].strip()
+            
+            for i, year in year_cols:
+                cell = row[i].strip() if i < len(row) else ""
+                try:
+                    value = float(cell) if cell else None
+                except ValueError:
+                    value = None  # مثل ".." في بعض الإصدارات
+                batch.append((code, country, year, name, value, now))
+                stats["values"] += value is not None
+            
+            stats["rows"] += 1
+            stats["cells"] += len(year_cols)
+            stats["indicators"].add(code)
+            stats["countries"].add(country)
+            
+            if len(batch) >= WDI_INGEST_BATCH_ROWS:
+                flush()
+        
+        if batch:
+            flush()
+    finally:
+        conn.close()
+    
+    stats["indicators"] = len(stats["indicators"])
+    stats["countries"] = len(stats["countries"])
+    return stats
+
+
+def ingest_wdi_archive(source=WDI_BULK_URL, indicator_codes=None, on_progress=None):
+    """
+    استيراد بيانات WDI المجمعة إلى مخزن المشاهدات المحلي (بدلاً من آلاف طلبات REST)
+    source: مسار ملف ZIP أو CSV محلي، أو رابط (الموقع الرسمي أو نسخة مرآة)
+    indicator_codes: استيراد هذه المؤشرات فقط (الكل إذا لم تُحدد)
+    on_progress: دالة تُستدعى بنسبة التقدم (0-1)
+    تُرجع إحصائيات الاستيراد: الأسطر، الخلايا، القيم، عدد المؤشرات والدول
+    """
+    
+    path, temporary = _open_wdi_source(source)
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                info = _wdi_data_member(archive)
+                if info is None:
+                    raise ValueError("لا يوجد ملف CSV داخل الأرشيف")
+                with archive.open(info) as raw:
+                    return _ingest_wdi_csv(raw, info.file_size, indicator_codes, on_progress)
+        
+        with open(path, "rb") as raw:
+            return _ingest_wdi_csv(raw, os.path.getsize(path), indicator_codes, on_progress)
+    finally:
+        if temporary:
+            os.remove(path)
+
+
+def ingest_wdi_cli(argv):
+    """
+    نقطة دخول المشغّل للاستيراد المجمع (مهمة ليلية مثلاً)، وليست عنصراً في واجهة اللوحة:
+    المخزن مشترك بين جميع الجلسات، فلا يُسمح للزوار بقراءة مسارات محلية أو تنزيل روابط إليه
+    
+        python wbb5.py ingest-wdi [--source WDI_CSV.zip|URL] [--indicators NY.GDP.MKTP.CD ...]
+    
+    البيانات المستوردة تظهر فوراً في اللوحة العاملة (البحث يقرأ من المخزن مباشرة)
+    """
+    
+    parser = argparse.ArgumentParser(prog="wbb5.py ingest-wdi", description="استيراد بيانات WDI المجمعة إلى مخزن المشاهدات")
+    parser.add_argument("--source", default=WDI_BULK_URL, help="مسار ملف WDI (ZIP/CSV) أو رابط")
+    parser.add_argument("--indicators", nargs="*", default=None, help="أكواد مؤشرات محددة (الكل إذا لم تُحدد)")
+    args = parser.parse_args(argv)
+    
+    def report(fraction):
+        print(f"\r{fraction:6.1%}", end="", flush=True)
+    
+    result = ingest_wdi_archive(args.source, args.indicators or None, on_progress=report)
+    print(
+        f"\n{result['values']:,} values ({result['cells']:,} cells, {result['indicators']:,} indicators x "
+        f"{result['countries']:,} countries) -> {OBSERVATION_STORE_PATH}"
+    )
+    return 0
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# ذاكرة تخزين دائمة عامة (مفتاح/قيمة) مع صلاحية زمنية وإزالة الأقدم استخداماً (LRU)
+# ───────────────────────────────────────────────────────────────────────────────
+
+def _kv_store():
+    """فتح اتصال بذاكرة التخزين العامة وإنشاء الجدول عند الحاجة"""
+    
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(KV_CACHE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS kv_cache (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS kv_cache_lru ON kv_cache (namespace, last_used)")
+    return conn
+
+
+def cache_get(namespace, key, ttl_seconds):
+    """قراءة قيمة (JSON) من الذاكرة العامة، أو None إذا لم توجد أو انتهت صلاحيتها"""
+    
+    try:
+        conn = _kv_store()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM kv_cache WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] < time.time() - ttl_seconds:
+                    conn.execute("DELETE FROM kv_cache WHERE namespace = ? AND key = ?", (namespace, key))
+                    return None
+                conn.execute(
+                    "UPDATE kv_cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                    (time.time(), namespace, key)
+                )
+                return json.loads(row[0])
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError, ValueError) as e:
+        print(f"Cache read failed ({namespace}): {e}")
+        return None
+
+
+def cache_put(namespace, key, value, max_entries):
+    """حفظ قيمة (JSON) في الذاكرة العامة مع إزالة الأقدم استخداماً عند تجاوز max_entries"""
+    
+    now = time.time()
+    try:
+        conn = _kv_store()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kv_cache VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value, ensure_ascii=False), now, now)
+                )
+                conn.execute(
+                    """
+                    DELETE FROM kv_cache WHERE namespace = ? AND key IN (
+                        SELECT key FROM kv_cache WHERE namespace = ?
+                        ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (namespace, namespace, max_entries)
+                )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+        print(f"Cache write failed ({namespace}): {e}")
+
+
+def plan_observation_requests(cached, country_codes, start_year, end_year):
+    """
+    مخطط الخلايا: تقسيم طلب مؤشر إلى خلايا (دولة، سنة) وإرجاع الطلبات اللازمة للخلايا الناقصة فقط
+    كل دولة تُجلب لها فترات السنوات الناقصة المتصلة، وتُجمع الدول ذات الفترة نفسها في طلب واحد
+    تُرجع قائمة (الدول، سنة البداية، سنة النهاية)
+    """
+    
+    known = {}
+    for country, _, year, _ in cached:
+        known.setdefault(country, set()).add(year)
+    
+    gaps = {}
+    for country in country_codes:
+        have = known.get(country, set())
+        run_start = None
+        for year in range(start_year, end_year + 2):
+            missing = year <= end_year and year not in have
+            if missing and run_start is None:
+                run_start = year
+            elif not missing and run_start is not None:
+                gaps.setdefault((run_start, year - 1), []).append(country)
+                run_start = None
+    
+    plan = []
+    for (gap_start, gap_end), group in gaps.items():
+        for i in range(0, len(group), COUNTRIES_PER_REQUEST):
+            plan.append((group[i:i + COUNTRIES_PER_REQUEST], gap_start, gap_end))
+    return plan
+
+
+def _observation_chunk(indicator, codes, names, years, values):
+    """دفعة مشاهدات عمودية مُنمَّطة لمؤشر واحد (بدلاً من قاموس لكل مشاهدة)"""
+    return {"indicator": indicator, "codes": codes, "names": names, "years": years, "values": values}
+
+
+def _fetch_indicator_page(country_str, code, name, start_year, end_year, page, client):
+    """
+    جلب صفحة واحدة من مشاهدات مؤشر لدفعة من الدول (يُنفَّذ داخل مجمّع الخيوط)
+    تُكتب القيم مباشرة في أعمدة مُخصصة مسبقاً (int16 للسنة و float64 للقيمة)
+    تُرجع (البيانات الوصفية، الدفعة، عدد العناصر المستلمة بما فيها الفارغة) لمقارنته بـ total
+    """
+    
+    url = f"{WORLD_BANK_API_URL}/country/{country_str}/indicator/{code}"
+    params = {
+        "date": f"{start_year}:{end_year}",
+        "format": "json",
+        "per_page": WB_PAGE_SIZE
+    }
+    
+    meta, items = _fetch_world_bank_page(url, params, page, client, record="observation")
+    
+    size = len(items)
+    codes = np.empty(size, dtype=object)
+    names = np.empty(size, dtype=object)
+    years = np.empty(size, dtype=np.int16)
+    values = np.empty(size, dtype=np.float64)
+    count = 0
+    
+    for iso_code, country_name, date, value in items:
+        if value is None:
+            continue
+        
+        codes[count] = iso_code
+        names[count] = country_name
+        years[count] = int(date)
+        values[count] = value
+        count += 1
+    
+    return meta, _observation_chunk(name, codes[:count], names[:count], years[:count], values[:count]), size
+
+
+def _cached_observation_chunk(name, cached):
+    """تحويل خلايا المخزن المحلي (غير الفارغة) إلى دفعة عمودية"""
+    
+    present = [row for row in cached if row[3] is not None]
+    if not present:
+        return None
+    
+    codes, names, years, values = zip(*present)
+    return _observation_chunk(
+        name,
+        np.array(codes, dtype=object),
+        np.array([n or c for n, c in zip(names, codes)], dtype=object),
+        np.array(years, dtype=np.int16),
+        np.array(values, dtype=np.float64)
+    )
+
+
+def build_observation_frame(chunks):
+    """
+    تجميع الدفعات العمودية في إطار طويل مُنمَّط (دول ومؤشرات فئوية) ثم تحويله إلى الصيغة الواسعة
+    عبر unstack بدلاً من pivot_table
+    """
+    
+    chunks = [chunk for chunk in chunks if chunk is not None and len(chunk["values"])]
+    if not chunks:
+        return pd.DataFrame()
+    
+    indicators = sorted({chunk["indicator"] for chunk in chunks})
+    positions = {indicator: i for i, indicator in enumerate(indicators)}
+    
+    df_long = pd.DataFrame({
+        "الدولة": pd.Categorical(np.concatenate([chunk["names"] for chunk in chunks])),
+        "CountryCode": pd.Categorical(np.concatenate([chunk["codes"] for chunk in chunks])),
+        "السنة": np.concatenate([chunk["years"] for chunk in chunks]),
+        "المؤشر": pd.Categorical.from_codes(
+            np.repeat([positions[chunk["indicator"]] for chunk in chunks], [len(chunk["values"]) for chunk in chunks]),
+            categories=indicators
+        ),
+        "القيمة": np.concatenate([chunk["values"] for chunk in chunks])
+    })
+    
+    keys = ["الدولة", "CountryCode", "السنة", "المؤشر"]
+    
+    # تحويل إلى صيغة واسعة (أول قيمة لكل خلية كما في aggfunc='first')
+    try:
+        df_wide = (
+            df_long.drop_duplicates(subset=keys)
+            .set_index(keys)["القيمة"]
+            .unstack("المؤشر")
+            .sort_index()
+        )
+        df_wide.columns = pd.Index(df_wide.columns.astype(str), name="المؤشر")
+        df_wide = df_wide.reset_index()
+        df_wide["الدولة"] = df_wide["الدولة"].astype(str)
+        df_wide["CountryCode"] = df_wide["CountryCode"].astype(str)
+        
+        return df_wide
+        
+    except Exception:
+        return df_long
+
+
 def fetch_world_bank_data(countries, indicators, start_year, end_year):
-    """جلب البيانات من API البنك الدولي"""
+    """
+    جلب البيانات من API البنك الدولي (جميع المؤشرات ودفعات الدول وصفحاتها بالتوازي)
+    الخلايا المحفوظة في المخزن المحلي تُقرأ منه، ولا تُطلب من الشبكة إلا الدول والسنوات الناقصة
+    تُرجع (البيانات، عدد الطلبات التي فشلت في هذا الاستدعاء) ليُبلَّغ المستخدم عن نقص بياناته هو فقط
+    بدون st.cache_data: المخزن المحلي يجعل التكرار سريعاً، ونتيجة ناقصة لا تُحفظ فيُعاد طلب ما فشل في البحث التالي
+    """
     
-    all_data = []
-    country_str = ";".join([c.strip() for c in countries])
+    chunks = []
+    country_codes = list(dict.fromkeys(c.strip().upper() for c in countries))
+    
+    # أولاً: المخزن المحلي، ثم تخطيط الخلايا الناقصة
+    tasks = []
+    for ind in indicators:
+        cached = load_cached_observations(ind['code'], country_codes, start_year, end_year)
+        chunks.append(_cached_observation_chunk(ind['name'], cached))
+        
+        for batch, gap_start, gap_end in plan_observation_requests(cached, country_codes, start_year, end_year):
+            tasks.append((ind, batch, gap_start, gap_end))
     
     progress_container = st.container()
     
@@ -1516,94 +2824,277 @@ def fetch_world_bank_data(countries, indicators, start_year, end_year):
         progress_bar = st.progress(0)
         status_text = st.empty()
     
-    for i, ind in enumerate(indicators):
-        code = ind['code']
-        name = ind['name']
-        
-        status_text.markdown(f"📥 **جاري جلب:** {name}...")
-        progress_bar.progress((i + 1) / len(indicators))
+    fetched_chunks = [[] for _ in tasks]
+    expected_items = [None] * len(tasks)
+    received_items = [0] * len(tasks)
+    failed_tasks = set()
+    
+    if tasks:
+        status_text.markdown(f"📥 **جاري جلب {len(tasks)} طلب بالتوازي...**")
+        client = get_http_client()
         
-        url = f"https://api.worldbank.org/v2/country/{country_str}/indicator/{code}"
-        params = {
-            "date": f"{start_year}:{end_year}",
-            "format": "json",
-            "per_page": 10000
-        }
+        def submit(executor, task_id, page):
+            ind, batch, gap_start, gap_end = tasks[task_id]
+            return executor.submit(
+                _fetch_indicator_page, ";".join(batch), ind['code'], ind['name'], gap_start, gap_end, page, client
+            )
         
-        try:
-            response = requests.get(url, params=params, timeout=30)
-            
-            if response.status_code != 200:
-                continue
-            
-            data = response.json()
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_FETCH_WORKERS, len(tasks)))) as executor:
+            pending = {submit(executor, task_id, 1): (task_id, 1) for task_id in range(len(tasks))}
+            total = len(pending)
+            done = 0
             
-            if isinstance(data, list) and len(data) > 1 and data[1]:
-                for item in data[1]:
-                    if item.get('value') is not None:
-                        iso_code = item.get('countryiso3code', '')
-                        if not iso_code:
-                            iso_code = item.get('country', {}).get('id', '')
+            # تحديث شريط التقدم عند اكتمال كل صفحة، وإضافة الصفحات المتبقية فور معرفة عددها
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task_id, page = pending.pop(future)
+                    name = tasks[task_id][0]['name']
+                    done += 1
+                    try:
+                        meta, chunk, item_count = future.result()
+                        if not meta:
+                            failed_tasks.add(task_id)
+                        fetched_chunks[task_id].append(chunk)
+                        chunks.append(chunk)
+                        received_items[task_id] += item_count
                         
-                        all_data.append({
-                            "الدولة": item['country']['value'],
-                            "CountryCode": iso_code,
-                            "السنة": int(item['date']),
-                            "المؤشر": name,
-                            "القيمة": float(item['value'])
-                        })
-                        
-        except Exception as e:
-            print(f"Error fetching {name}: {e}")
-            continue
+                        if page == 1:
+                            expected_items[task_id] = _expected_total(meta)
+                            for next_page in range(2, _page_count(meta) + 1):
+                                pending[submit(executor, task_id, next_page)] = (task_id, next_page)
+                                total += 1
+                    except Exception as e:
+                        failed_tasks.add(task_id)
+                        print(f"Error fetching {name} (page {page}): {e}")
+                    
+                    status_text.markdown(f"📥 **تم جلب:** {name} ({done}/{total})")
+                    progress_bar.progress(done / total)
+        
+        # صفحة مقتطعة: عدد العناصر المستلمة أقل من total المعلن فلا يُعد الطلب مكتملاً
+        for task_id, expected in enumerate(expected_items):
+            if expected is not None and received_items[task_id] < expected:
+                print(f"Incomplete {tasks[task_id][0]['name']}: {received_items[task_id]}/{expected} items")
+                failed_tasks.add(task_id)
+        
+        # حفظ الطلبات المكتملة فقط في المخزن المحلي
+        for task_id, (ind, batch, gap_start, gap_end) in enumerate(tasks):
+            if task_id not in failed_tasks:
+                save_observations(ind['code'], fetched_chunks[task_id], batch, gap_start, gap_end)
+    
+    progress_bar.empty()
+    status_text.empty()
+    
+    return build_observation_frame(chunks), len(failed_tasks)
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# 6. إنشاء التقرير التحليلي بالذكاء الاصطناعي
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _stream_text(start_stream, empty_message, error_prefix, on_complete=None):
+    """
+    تحويل بث Gemini إلى مولّد نصوص (يصلح لـ st.write_stream)
+    start_stream: دالة تبدأ البث (تُستدعى داخل المولّد لالتقاط أخطاء الاتصال أيضاً)
+    الأخطاء وحالة الاستجابة الفارغة تُرجع كنص بدلاً من استثناء
+    on_complete: تُستدعى بالنص الكامل فقط عند نجاح البث
+    """
+    
+    parts = []
+    try:
+        for chunk in start_stream():
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+    except Exception as e:
+        yield f"{error_prefix}: {e}"
+        return
+    
+    if not parts:
+        yield empty_message
+    elif on_complete:
+        on_complete("".join(parts))
+
+
+def _report_cache_key(prompt):
+    """مفتاح التقرير: بصمة المحتوى المرسل (الإحصائيات، النمو، الدول، المؤشرات) والنموذج"""
+    return hashlib.sha256(f"{GEMINI_MODEL_NAME}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def compute_growth_stats(df):
+    """
+    إحصائيات النمو لكل دولة ومؤشر في مرور واحد متجه على جميع المؤشرات:
+    القيمة الأولى والأخيرة، التغير الكلي، معدل النمو السنوي المركب (CAGR)، الأدنى، الأعلى، والتقلب
+    (الانحراف المعياري للتغير السنوي %). تُستخدم في طلب التقرير وتقرير HTML وملف Excel
+    """
+    
+    columns = ['المؤشر', 'الدولة', 'سنة البداية', 'سنة النهاية', 'القيمة الأولى', 'القيمة الأخيرة',
+               'التغير %', 'CAGR %', 'الأدنى', 'الأعلى', 'التقلب %']
+    
+    numeric_cols = [c for c in df.select_dtypes(include=[np.number]).columns if c != 'السنة']
+    if not numeric_cols or 'السنة' not in df.columns or 'الدولة' not in df.columns:
+        return pd.DataFrame(columns=columns)
     
-    progress_bar.empty()
-    status_text.empty()
+    # ترتيب الإطار العريض الصغير يكفي: melt يحافظ عليه داخل كل مؤشر
+    long = (
+        df.sort_values(['الدولة', 'السنة'], kind='stable')
+        .melt(id_vars=['الدولة', 'السنة'], value_vars=numeric_cols, var_name='المؤشر', value_name='القيمة')
+        .dropna(subset=['القيمة'])
+    )
+    if long.empty:
+        return pd.DataFrame(columns=columns)
+    
+    grouped = long.groupby(['المؤشر', 'الدولة'], sort=False)
+    long['التغير السنوي'] = grouped['القيمة'].pct_change() * 100
+    
+    stats = grouped.agg(
+        first_year=('السنة', 'first'),
+        last_year=('السنة', 'last'),
+        first=('القيمة', 'first'),
+        last=('القيمة', 'last'),
+        minimum=('القيمة', 'min'),
+        maximum=('القيمة', 'max'),
+        volatility=('التغير السنوي', 'std')
+    )
     
-    if not all_data:
-        return pd.DataFrame()
+    span = stats['last_year'] - stats['first_year']
+    change = (stats['last'] - stats['first']) / stats['first'].abs() * 100
+    growth_valid = (stats['first'] > 0) & (stats['last'] > 0) & (span > 0)
+    cagr = ((stats['last'] / stats['first'].where(growth_valid)) ** (1 / span.where(growth_valid)) - 1) * 100
+    
+    result = pd.DataFrame({
+        'سنة البداية': stats['first_year'],
+        'سنة النهاية': stats['last_year'],
+        'القيمة الأولى': stats['first'],
+        'القيمة الأخيرة': stats['last'],
+        'التغير %': change.where(stats['first'] != 0),
+        'CAGR %': cagr,
+        'الأدنى': stats['minimum'],
+        'الأعلى': stats['maximum'],
+        'التقلب %': stats['volatility']
+    }).reset_index()
+    
+    return result[columns]
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def compute_trend_stats(df, col):
+    """
+    خط الاتجاه الخطي (المربعات الصغرى) لكل دولة في مرور مجمّع واحد بدلاً من np.polyfit لكل دولة:
+    الميل والمقطع من المجاميع المغلقة Σdx·dy / Σdx² حول متوسط كل دولة (أدق عددياً من Σx·y الخام
+    مع قيم كبيرة مثل الناتج المحلي)، ومعامل التحديد R²، ومعدل النمو السنوي المركب (CAGR)
+    """
     
-    df_long = pd.DataFrame(all_data)
+    columns = ['الدولة', 'عدد السنوات', 'سنة البداية', 'سنة النهاية', 'الميل (سنوياً)', 'المقطع', 'R²', 'CAGR %']
+    
+    if col not in df.columns or 'الدولة' not in df.columns or 'السنة' not in df.columns:
+        return pd.DataFrame(columns=columns)
+    
+    data = df[['الدولة', 'السنة', col]].dropna().sort_values(['الدولة', 'السنة'], kind='stable')
+    if data.empty:
+        return pd.DataFrame(columns=columns)
+    
+    x = data['السنة'].astype(float)
+    y = data[col].astype(float)
+    grouped = data.groupby('الدولة', sort=False)
+    dx = x - grouped['السنة'].transform('mean')
+    dy = y - grouped[col].transform('mean')
+    
+    sums = pd.DataFrame({
+        'n': 1, 'x': x, 'y': y, 'dxx': dx * dx, 'dxy': dx * dy, 'dyy': dy * dy
+    }).groupby(data['الدولة'], sort=False).sum()
+    ends = grouped.agg(
+        first_year=('السنة', 'first'),
+        last_year=('السنة', 'last'),
+        first=(col, 'first'),
+        last=(col, 'last')
+    )
     
-    # تحويل إلى صيغة واسعة
-    try:
-        df_wide = df_long.pivot_table(
-            index=['الدولة', 'CountryCode', 'السنة'],
-            columns='المؤشر',
-            values='القيمة',
-            aggfunc='first'
-        ).reset_index()
-        
-        return df_wide
-        
-    except Exception:
-        return df_long
+    fit_valid = (sums['n'] >= 2) & (sums['dxx'] > 0)
+    slope = (sums['dxy'] / sums['dxx']).where(fit_valid)
+    intercept = sums['y'] / sums['n'] - slope * sums['x'] / sums['n']
+    r2 = (sums['dxy'] ** 2 / (sums['dxx'] * sums['dyy'])).where(fit_valid & (sums['dyy'] > 0))
+    
+    span = ends['last_year'] - ends['first_year']
+    growth_valid = (ends['first'] > 0) & (ends['last'] > 0) & (span > 0)
+    cagr = ((ends['last'] / ends['first'].where(growth_valid)) ** (1 / span.where(growth_valid)) - 1) * 100
+    
+    result = pd.DataFrame({
+        'عدد السنوات': sums['n'],
+        'سنة البداية': ends['first_year'],
+        'سنة النهاية': ends['last_year'],
+        'الميل (سنوياً)': slope,
+        'المقطع': intercept,
+        'R²': r2,
+        'CAGR %': cagr
+    }).reset_index()
+    
+    return result[columns]
+
+
+def trend_line_traces(trends, countries, colors):
+    """
+    خطوط الاتجاه كمسار واحد لكل لون بدلاً من مسار لكل دولة: لكل دولة نقطتان فقط
+    (سنة البداية والنهاية) مفصولتان بـ None، واللون حسب ترتيب الدولة كما في الرسم النقطي
+    """
+    
+    fitted = trends.dropna(subset=['الميل (سنوياً)'])
+    if fitted.empty:
+        return []
+    
+    x0 = fitted['سنة البداية'].to_numpy(dtype=float)
+    x1 = fitted['سنة النهاية'].to_numpy(dtype=float)
+    slope = fitted['الميل (سنوياً)'].to_numpy(dtype=float)
+    intercept = fitted['المقطع'].to_numpy(dtype=float)
+    color_index = pd.Index(countries).get_indexer(fitted['الدولة']) % len(colors)
+    
+    traces = []
+    for i, color in enumerate(colors):
+        mask = color_index == i
+        if not mask.any():
+            continue
+        # [x0, x1, None] لكل دولة في مصفوفة واحدة
+        xs = np.column_stack([x0[mask], x1[mask], np.full(mask.sum(), np.nan)]).ravel()
+        ys = np.column_stack([intercept[mask] + slope[mask] * x0[mask], intercept[mask] + slope[mask] * x1[mask],
+                              np.full(mask.sum(), np.nan)]).ravel()
+        traces.append(go.Scatter(
+            x=xs, y=ys,
+            mode='lines',
+            name='اتجاه',
+            line=dict(color=color, dash='dash', width=2),
+            connectgaps=False,
+            hoverinfo='skip',
+            showlegend=False
+        ))
+    
+    return traces
 
-# ═══════════════════════════════════════════════════════════════════════════════
-# 6. إنشاء التقرير التحليلي بالذكاء الاصطناعي
-# ═══════════════════════════════════════════════════════════════════════════════
 
-def generate_ai_analysis(client, df, countries, indicators, query_type="full"):
-    """توليد تحليل شامل باستخدام Gemini"""
+def generate_ai_analysis(client, df, countries, indicators, query_type="full", stream=False, use_cache=True):
+    """
+    توليد تحليل شامل باستخدام Gemini
+    stream=True: تُرجع مولّد أجزاء النص فور وصولها بدلاً من النص الكامل
+    use_cache=False: تجاهل التقرير المحفوظ لنفس البيانات وإعادة توليده
+    يُسجَّل مصدر التقرير (ذاكرة أو توليد) في st.session_state['analysis_from_cache']
+    """
     
     # إعداد ملخص البيانات
     stats_summary = df.describe().to_string()
     
-    # حساب بعض الإحصائيات المهمة
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    numeric_cols = [c for c in numeric_cols if c != 'السنة']
+    # نمو كل مؤشر: متوسط الدول في أول وآخر سنة متاحة، ووسيط CAGR بين الدول
+    growth_stats = compute_growth_stats(df)
+    by_indicator = growth_stats.groupby('المؤشر', sort=False).agg(
+        first=('القيمة الأولى', 'mean'),
+        last=('القيمة الأخيرة', 'mean'),
+        cagr=('CAGR %', 'median')
+    )
     
     growth_analysis = ""
-    if len(numeric_cols) > 0 and 'السنة' in df.columns:
-        for col in numeric_cols[:5]:  # أول 5 مؤشرات
-            try:
-                first_val = df.groupby('الدولة')[col].first().mean()
-                last_val = df.groupby('الدولة')[col].last().mean()
-                if first_val > 0:
-                    growth = ((last_val - first_val) / first_val) * 100
-                    growth_analysis += f"\n- {col}: نمو {growth:.1f}%"
-            except:
-                pass
+    for col, row in by_indicator[by_indicator['first'] > 0].iterrows():
+        growth = ((row['last'] - row['first']) / row['first']) * 100
+        growth_analysis += f"\n- {col}: نمو {growth:.1f}%"
+        if pd.notna(row['cagr']):
+            growth_analysis += f" (وسيط النمو السنوي المركب {row['cagr']:.1f}%)"
     
     prompt = f"""
 أنت محلل اقتصادي خبير. اكتب تقريراً تحليلياً شاملاً ومهنياً باللغة العربية.
@@ -1646,16 +3137,39 @@ def generate_ai_analysis(client, df, countries, indicators, query_type="full"):
 استخدم أرقاماً ونسباً محددة من البيانات. اكتب بأسلوب أكاديمي ومهني.
 """
 
+    # تقرير محفوظ لنفس محتوى الطلب
+    cache_key = _report_cache_key(prompt)
+    cached = cache_get("reports", cache_key, REPORT_CACHE_TTL_SECONDS) if use_cache else None
+    st.session_state['analysis_from_cache'] = cached is not None
+    if cached is not None:
+        return iter([cached]) if stream else cached
+    
+    def remember(text):
+        cache_put("reports", cache_key, text, REPORT_CACHE_MAX_ENTRIES)
+    
+    config = types.GenerateContentConfig(
+        temperature=0.7,
+        max_output_tokens=4000
+    )
+    
+    if stream:
+        return _stream_text(
+            lambda: client.models.generate_content_stream(model=GEMINI_MODEL_NAME, contents=prompt, config=config),
+            "تعذر توليد التقرير.",
+            "خطأ في توليد التقرير",
+            on_complete=remember
+        )
+    
     try:
         response = client.models.generate_content(
             model=GEMINI_MODEL_NAME,
             contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=0.7,
-                max_output_tokens=4000
-            )
+            config=config
         )
-        return response.text if response.text else "تعذر توليد التقرير."
+        if not response.text:
+            return "تعذر توليد التقرير."
+        remember(response.text)
+        return response.text
         
     except Exception as e:
         return f"خطأ في توليد التقرير: {e}"
@@ -1664,129 +3178,645 @@ def generate_ai_analysis(client, df, countries, indicators, query_type="full"):
 # 7. الدردشة التفاعلية مع البيانات
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def chat_with_data(client, df, user_question, chat_history):
-    """محادثة تفاعلية حول البيانات"""
-    
-    # تحضير سياق البيانات
-    data_summary = f"""
-البيانات المتاحة:
-- الدول: {', '.join(df['الدولة'].unique())}
-- الأعمدة: {', '.join(df.columns.tolist())}
-- الفترة: {df['السنة'].min()} - {df['السنة'].max()}
-- عدد السجلات: {len(df)}
+# ───────────────────────────────────────────────────────────────────────────────
+# الإجابة المحلية على الأسئلة الشائعة (بدون Gemini)
+# ───────────────────────────────────────────────────────────────────────────────
 
-إحصائيات مختصرة:
-{df.describe().to_string()[:2000]}
-"""
+# "معدل" لا تعني المتوسط هنا (معدل التضخم، معدل البطالة) فلا تُستخدم كنية
+LOCAL_INTENT_PATTERNS = {
+    "growth": re.compile(r"نمو|النمو|تغير|التغير|تغيّر|زيادة|ارتفاع|تطور|\bgrowth\b|\bchange[ds]?\b|\bincrease[ds]?\b|\bgrew\b"),
+    "rank": re.compile(r"ترتيب|رتب|\brank(?:ing|ed)?\b|\bsort(?:ed)?\b|\border\b"),
+    "mean": re.compile(r"متوسط|\baverage\b|\bmean\b|\bavg\b"),
+    "max": re.compile(r"أعلى|الأعلى|أكبر|الأكبر|أكثر|\bhighest\b|\blargest\b|\bbiggest\b|\bmax(?:imum)?\b|\btop\b|\bmost(?!\s+(?:recent|latest|current)\b)\b"),
+    "min": re.compile(r"أدنى|الأدنى|أقل|الأقل|أصغر|الأصغر|\blowest\b|\bsmallest\b|\bmin(?:imum)?\b|\bleast\b"),
+}
+# "أحدث/آخر قيمة" ليست سؤالاً عن الأعلى ("most recent GDP"): تُحال إلى Gemini
+LOCAL_LATEST_PATTERN = re.compile(
+    r"أحدث|الأحدث|آخر\s+(?:قيمة|قيم|سنة|بيانات|رقم)|حالياً|حاليا|الحالي|"
+    r"\blatest\b|\brecent(?:ly)?\b|\bcurrent(?:ly)?\b|\bnow\b"
+)
+# أسئلة لا تُجاب محلياً وتُحال إلى Gemini: التفسير والأسباب، والتصفية (المقارنة بعتبة أو بالمتوسط، واستثناء دول)
+LOCAL_OPEN_ENDED_PATTERN = re.compile(
+    r"لماذا|لما\s*ذا|ليش|كيف|ف[سّ]+ر|اشرح|وضّ?ح|علّ?ل|سبب|أسباب|اسباب|"
+    r"\bwhy\b|\bhow\b|\bexplain\w*|\breasons?\b|\bcaus(?:e[ds]?|ing)\b"
+)
+LOCAL_THRESHOLD_PATTERN = re.compile(
+    r"(?<![\u0600-\u06FF])(?:أقل|اقل|أكثر|اكثر|أكبر|اكبر|أصغر|اصغر|أعلى|اعلى|أدنى|ادنى|يزيد|تزيد|يقل|تقل)\s+(?:من|عن)(?![\u0600-\u06FF])|"
+    r"(?<![\u0600-\u06FF])(?:يتجاوز|تتجاوز|فوق|تحت|دون|بدون|عدا|باستثناء)(?![\u0600-\u06FF])|\bexcept\w*|\bexclud\w*|\bwithout\b|"
+    r"\b(?:less|more|greater|higher|lower|fewer|bigger|smaller)\s+than\b|\babove\b|\bbelow\b|\bexceed\w*|\bunder\b|\bover\s+\d|[<>≤≥]"
+)
+LOCAL_YEAR_PATTERN = re.compile(r"(?<!\d)(19\d{2}|20\d{2})(?!\d)")
+ARABIC_INDIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+
+
+def _resolve_question_column(df, question, parsed):
+    """تحديد عمود المؤشر المقصود في السؤال (الأسماء المستعارة ثم اسم العمود ثم العمود الوحيد)"""
     
-    # بناء سياق المحادثة
-    history_context = "\n".join([f"المستخدم: {h['user']}\nالمساعد: {h['assistant']}" for h in chat_history[-5:]])
+    numeric_cols = [c for c in df.select_dtypes(include=[np.number]).columns if c != 'السنة']
+    if not numeric_cols:
+        return None
     
-    prompt = f"""
-أنت مساعد تحليل بيانات اقتصادية ذكي. أجب على سؤال المستخدم بناءً على البيانات المتاحة.
+    code_to_column = {ind['code']: ind['name'] for ind in (parsed or {}).get('indicators', [])}
+    _, indicators = match_aliases(question)
+    for ind in indicators:
+        column = code_to_column.get(ind['code'])
+        if column in numeric_cols:
+            return column
+    
+    question_lower = question.lower()
+    for column in sorted(numeric_cols, key=len, reverse=True):
+        if str(column).lower() in question_lower:
+            return column
+    
+    return numeric_cols[0] if len(numeric_cols) == 1 else None
 
-{data_summary}
 
-المحادثة السابقة:
-{history_context}
+def answer_locally(df, question, parsed=None):
+    """
+    إجابة فورية ودقيقة على أسئلة التجميع الشائعة (الأعلى، الأدنى، المتوسط، النمو، الترتيب)
+    بعمليات pandas متجهة على البيانات المحمّلة
+    الأعلى/الأدنى لدولة واحدة يُحسب عبر سنواتها مع ذكر السنة
+    تُرجع None إذا لم يكن السؤال من هذه الأنواع ليُحال إلى Gemini
+    (ومنها أسئلة التفسير "لماذا/كيف/فسر" والمقارنة بعتبة "أقل من 5" أو "أعلى من المتوسط" وطلب "أحدث قيمة")
+    """
+    
+    question = question.translate(ARABIC_INDIC_DIGITS)
+    question_lower = question.lower()
+    if any(p.search(question_lower) for p in (LOCAL_OPEN_ENDED_PATTERN, LOCAL_THRESHOLD_PATTERN, LOCAL_LATEST_PATTERN)):
+        return None
+    
+    # إزالة أسماء الدول والمؤشرات قبل كشف النية ("نمو الناتج" مؤشر وليس سؤالاً عن النمو)
+    stripped = build_alias_matcher()["pattern"].sub(" ", question.lower())
+    intents = {name for name, pattern in LOCAL_INTENT_PATTERNS.items() if pattern.search(stripped)}
+    years = sorted({int(y) for y in LOCAL_YEAR_PATTERN.findall(question)})
+    
+    # فترة صريحة مع كلمة نمو تعني التغير عبر الفترة ("GDP growth from 2010 to 2023")
+    if len(years) >= 2 and LOCAL_INTENT_PATTERNS["growth"].search(question.lower()):
+        intents.add("growth")
+    # "نمو" بدون فترة أو مقارنة قد تعني مؤشر النمو نفسه
+    if intents == {"growth"} and len(years) < 2:
+        return None
+    if not intents:
+        return None
+    
+    column = _resolve_question_column(df, question, parsed)
+    if column is None and "growth" in intents:
+        column = _resolve_question_column(df, LOCAL_INTENT_PATTERNS["growth"].sub(" ", question), parsed)
+    if column is None:
+        return None
+    
+    data = df[['الدولة', 'CountryCode', 'السنة', column]].dropna(subset=[column]) if 'CountryCode' in df.columns \
+        else df[['الدولة', 'السنة', column]].dropna(subset=[column])
+    
+    countries, _ = match_aliases(question)
+    if countries and 'CountryCode' in data.columns:
+        data = data[data['CountryCode'].isin(countries)]
+    if years:
+        data = data[data['السنة'].between(years[0], years[-1])]
+    if data.empty:
+        return None
+    
+    data = data.sort_values('السنة')
+    grouped = data.groupby('الدولة', sort=False)
+    header = "⚡ إجابة محسوبة محلياً من البيانات المحمّلة"
+    
+    # الأعلى/الأدنى لدولة واحدة: القيمة القصوى عبر السنوات (وليس آخر قيمة) مع سنتها
+    if ("max" in intents) != ("min" in intents) and "growth" not in intents and "mean" not in intents \
+            and len(years) != 1 and data['الدولة'].nunique() == 1:
+        row = data.loc[data[column].idxmax() if "max" in intents else data[column].idxmin()]
+        word = "أعلى" if "max" in intents else "أدنى"
+        period = f"{data['السنة'].min()} - {data['السنة'].max()}"
+        return (
+            f"{header}\n\n{word} قيمة لـ {column} في **{row['الدولة']}** خلال {period}: "
+            f"**{row[column]:,.2f}** (سنة {row['السنة']})"
+        )
+    
+    if "growth" in intents:
+        first = grouped[column].first()
+        last = grouped[column].last()
+        first_year = grouped['السنة'].first()
+        last_year = grouped['السنة'].last()
+        values = ((last - first) / first.abs() * 100).where(first != 0).dropna()
+        if values.empty:
+            return None
+        label = f"نمو {column} (%)"
+        details = {c: f"{values[c]:+,.2f}% ({first_year[c]} → {last_year[c]})" for c in values.index}
+    elif len(years) == 1:
+        values = grouped[column].last()
+        label = f"{column} في {years[0]}"
+        details = {c: f"{values[c]:,.2f}" for c in values.index}
+    elif "mean" in intents:
+        values = grouped[column].mean()
+        period = f"{data['السنة'].min()} - {data['السنة'].max()}"
+        label = f"متوسط {column} ({period})"
+        details = {c: f"{values[c]:,.2f}" for c in values.index}
+    else:
+        values = grouped[column].last()
+        latest_year = grouped['السنة'].last()
+        label = f"{column} (آخر قيمة متاحة)"
+        details = {c: f"{values[c]:,.2f} ({latest_year[c]})" for c in values.index}
+    
+    ranked = values.sort_values(ascending="min" in intents and "max" not in intents)
+    
+    if "rank" in intents or ("max" not in intents and "min" not in intents and len(ranked) > 1 and "mean" not in intents):
+        lines = [f"{i}. {country}: {details[country]}" for i, country in enumerate(ranked.index, 1)]
+        return f"{header}\n\n**ترتيب الدول حسب {label}:**\n\n" + "\n".join(lines)
+    
+    if "max" in intents or "min" in intents:
+        best = ranked.index[0]
+        word = "الأعلى" if "max" in intents else "الأدنى"
+        answer = f"{header}\n\n**{best}** هي {word} في {label}: **{details[best]}**"
+        if len(ranked) > 1:
+            others = ", ".join(f"{c}: {details[c]}" for c in ranked.index[1:4])
+            answer += f"\n\nتليها: {others}"
+        return answer
+    
+    # المتوسط (أو قيمة لدولة واحدة)
+    if len(values) == 1:
+        country = values.index[0]
+        return f"{header}\n\n{label} - **{country}**: **{details[country]}**"
+    
+    lines = [f"- {country}: {details[country]}" for country in ranked.index]
+    overall = f"\n\nمتوسط جميع الدول: **{values.mean():,.2f}**" if "mean" in intents or len(years) == 1 else ""
+    return f"{header}\n\n**{label}:**\n\n" + "\n".join(lines) + overall
 
-سؤال المستخدم الحالي: {user_question}
 
+CHAT_SYSTEM_INSTRUCTION = """
+أنت مساعد تحليل بيانات اقتصادية ذكي. أجب على أسئلة المستخدم بناءً على البيانات المتاحة.
 أجب بشكل مختصر ومفيد. استخدم أرقاماً محددة من البيانات عند الإمكان.
 إذا طُلب منك إجراء حسابات، قم بها بدقة.
 """
 
-    try:
-        response = client.models.generate_content(
+
+def _df_fingerprint(df):
+    """بصمة محتوى DataFrame (القيم والأعمدة) لاكتشاف تغيّر البيانات المحمّلة"""
+    
+    digest = hashlib.sha256("|".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def _estimate_tokens(text):
+    """تقدير تقريبي لعدد الرموز (النص العربي أكثف من الإنجليزي)"""
+    return len(text) // 3 + 1
+
+
+def _format_number(value):
+    """عرض مختصر للأرقام في سياق الدردشة"""
+    if pd.isna(value):
+        return "-"
+    return f"{value:,.4g}" if abs(value) < 1e6 else f"{value:,.0f}"
+
+
+def _lines_within_budget(lines, budget):
+    """أكبر عدد من الأسطر الأولى لا يتجاوز مجموع رموزها الميزانية، مع عدد ما لم يتسع"""
+    used = 0
+    for i, line in enumerate(lines):
+        used += _estimate_tokens(line)
+        if used > budget:
+            return lines[:i], len(lines) - i
+    return lines, 0
+
+
+def build_chat_context(df, token_budget=CHAT_CONTEXT_TOKEN_BUDGET):
+    """
+    ملخص مضغوط للبيانات يُرسل مرة واحدة كتعليمات نظام لجلسة الدردشة
+    كل قسم ضمن الميزانية: قائمة الدول (حتى ربعها) ← إحصائيات المؤشرات (حتى نصف المتبقي)
+    ← آخر قيمة لكل دولة بما تبقى؛ وما لا يتسع يُختصر إلى عدد العناصر المحذوفة
+    """
+    
+    numeric_cols = [c for c in df.select_dtypes(include=[np.number]).columns if c != 'السنة']
+    countries = [str(c) for c in df['الدولة'].unique()]
+    
+    lines = [
+        "البيانات المتاحة:",
+        f"- الفترة: {df['السنة'].min()} - {df['السنة'].max()} | عدد السجلات: {len(df)} | الدول: {len(countries)} | المؤشرات: {len(numeric_cols)}"
+    ]
+    remaining = token_budget - _estimate_tokens("\n".join(lines))
+    
+    # قائمة الدول
+    names, dropped = _lines_within_budget(countries, max(0, min(remaining, token_budget // 4)))
+    country_line = f"- الدول: {', '.join(names)}" + (f" … و{dropped} أخرى" if dropped else "")
+    lines.append(country_line)
+    remaining -= _estimate_tokens(country_line)
+    
+    # إحصائيات المؤشرات
+    summary = df[numeric_cols].agg(['min', 'mean', 'max']).T
+    indicator_lines = [
+        f"- {col}: {_format_number(row['min'])} / {_format_number(row['mean'])} / {_format_number(row['max'])}"
+        for col, row in summary.iterrows()
+    ]
+    indicator_lines, dropped = _lines_within_budget(indicator_lines, max(0, remaining // 2))
+    if indicator_lines:
+        lines += ["", "المؤشرات (الأدنى / المتوسط / الأعلى):"] + indicator_lines
+    if dropped:
+        lines.append(f"- … و{dropped} مؤشر آخر")
+    remaining = token_budget - _estimate_tokens("\n".join(lines))
+    
+    # آخر قيمة متاحة لكل دولة ومؤشر مع سنتها (قد تختلف السنة من مؤشر لآخر)
+    latest = (
+        df[['الدولة', 'السنة'] + numeric_cols]
+        .melt(id_vars=['الدولة', 'السنة'], var_name='المؤشر', value_name='القيمة')
+        .dropna(subset=['القيمة'])
+        .sort_values('السنة', kind='stable')
+        .groupby(['الدولة', 'المؤشر'], sort=False)
+        .last()
+    )
+    country_lines = []
+    for country in df['الدولة'].unique():
+        if country not in latest.index.get_level_values(0):
+            continue
+        values = latest.loc[country]
+        year = values['السنة'].max()
+        country_lines.append(f"- {country} ({year}): " + ", ".join(
+            f"{col}={_format_number(values.at[col, 'القيمة'])}"
+            + ("" if values.at[col, 'السنة'] == year else f" ({values.at[col, 'السنة']})")
+            for col in numeric_cols if col in values.index
+        ))
+    
+    country_lines, dropped = _lines_within_budget(country_lines, remaining - _estimate_tokens("آخر القيم لكل دولة:") - 1)
+    if country_lines:
+        lines += ["", "آخر القيم لكل دولة:"] + country_lines
+        if dropped:
+            lines.append(f"- … و{dropped} دولة أخرى")
+    
+    return "\n".join(lines)
+
+
+def get_chat_session(client, df, chat_history):
+    """
+    جلسة دردشة Gemini محفوظة في st.session_state لكل DataFrame محمّل
+    سياق البيانات يُحسب مرة واحدة ويُرسل كتعليمات نظام، ثم تُرسل الأسئلة الجديدة فقط
+    عند تجاوز CHAT_HISTORY_WINDOW دوراً تُبنى جلسة جديدة من آخر الأدوار (نافذة منزلقة)
+    """
+    
+    fingerprint = _df_fingerprint(df)
+    session = st.session_state.get('chat_session')
+    
+    if (
+        session is None
+        or session['fingerprint'] != fingerprint
+        or session['client'] is not client
+        or session['turns'] >= CHAT_HISTORY_WINDOW
+    ):
+        if session is None or session['fingerprint'] != fingerprint or session['client'] is not client:
+            context = build_chat_context(df)
+        else:
+            context = session['context']
+        
+        # بذر الجلسة الجديدة بنصف النافذة من الأدوار الأخيرة
+        seed_turns = chat_history[-(CHAT_HISTORY_WINDOW // 2):] if chat_history else []
+        history = []
+        for turn in seed_turns:
+            history.append(types.Content(role="user", parts=[types.Part(text=turn['user'])]))
+            history.append(types.Content(role="model", parts=[types.Part(text=turn['assistant'])]))
+        
+        chat = client.chats.create(
             model=GEMINI_MODEL_NAME,
-            contents=prompt,
             config=types.GenerateContentConfig(
+                system_instruction=f"{CHAT_SYSTEM_INSTRUCTION}\n{context}",
                 temperature=0.5,
                 max_output_tokens=1500
-            )
+            ),
+            history=history
+        )
+        session = {
+            "fingerprint": fingerprint,
+            "client": client,
+            "context": context,
+            "chat": chat,
+            "turns": len(seed_turns),
+            "pending_local": []
+        }
+        st.session_state['chat_session'] = session
+    
+    return session
+
+
+def record_local_answer(question, answer):
+    """
+    إضافة سؤال أُجيب محلياً إلى جلسة الدردشة الحالية ليراه النموذج في الأدوار التالية
+    (يُرسل مع السؤال التالي إلى Gemini؛ الجلسة الجديدة تُبذر من سجل المحادثة مباشرة)
+    """
+    session = st.session_state.get('chat_session')
+    if session is not None:
+        session['pending_local'] = (session.get('pending_local', []) + [(question, answer)])[-CHAT_HISTORY_WINDOW:]
+
+
+def chat_with_data(client, df, user_question, chat_history, stream=False):
+    """
+    محادثة تفاعلية حول البيانات (عبر جلسة دردشة تحتفظ بالسياق)
+    stream=True: تُرجع مولّد أجزاء الإجابة فور وصولها
+    عدّاد الأدوار لا يزيد والإجابات المحلية المعلّقة لا تُحذف إلا عند نجاح الإجابة
+    """
+    
+    try:
+        session = get_chat_session(client, df, chat_history)
+    except Exception as e:
+        return iter([f"خطأ: {e}"]) if stream else f"خطأ: {e}"
+    
+    pending = list(session.get('pending_local', []))
+    message = user_question
+    if pending:
+        answered = "\n\n".join(f"س: {question}\nج: {answer}" for question, answer in pending)
+        message = f"أسئلة سابقة في هذه المحادثة أُجيبت محلياً من البيانات (للسياق):\n\n{answered}\n\nالسؤال: {user_question}"
+    
+    def on_success(_text=None):
+        session['turns'] += 1
+        session['pending_local'] = session.get('pending_local', [])[len(pending):]
+    
+    if stream:
+        return _stream_text(
+            lambda: session['chat'].send_message_stream(message),
+            "عذراً، لم أستطع الإجابة.",
+            "خطأ",
+            on_complete=on_success
         )
-        return response.text if response.text else "عذراً، لم أستطع الإجابة."
+    
+    try:
+        response = session['chat'].send_message(message)
+        if not response.text:
+            return "عذراً، لم أستطع الإجابة."
+        on_success()
+        return response.text
         
     except Exception as e:
         return f"خطأ: {e}"
 
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # 8. إنشاء الرسوم البيانية الاحترافية
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def create_professional_charts(df, chart_type="line"):
-    """إنشاء رسوم بيانية احترافية بألوان دافئة"""
+# لوحة ألوان دافئة ذهبية
+WARM_COLORS = [
+    '#D4AF37', '#B8960C', '#996515', '#CD853F', 
+    '#8B7355', '#A0522D', '#D2691E', '#E8C872',
+    '#C17F59', '#6B5B45', '#5D4E37', '#DEB887'
+]
+
+
+def lttb_indices(x, y, threshold):
+    """
+    اختيار threshold نقطة من سلسلة بخوارزمية LTTB (Largest-Triangle-Three-Buckets)
+    تحافظ على شكل المنحنى (القمم والقيعان) مع تقليل عدد النقاط
+    """
     
-    # لوحة ألوان دافئة ذهبية
-    warm_colors = [
-        '#D4AF37', '#B8960C', '#996515', '#CD853F', 
-        '#8B7355', '#A0522D', '#D2691E', '#E8C872',
-        '#C17F59', '#6B5B45', '#5D4E37', '#DEB887'
-    ]
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
     
-    numeric_cols = [c for c in df.columns if c not in ['الدولة', 'CountryCode', 'السنة']]
-    charts = []
-    
-    for col in numeric_cols:
-        if chart_type == "line":
-            fig = px.line(
-                df, 
-                x='السنة', 
-                y=col, 
-                color='الدولة',
-                markers=True,
-                title=f"📈 تطور {col} عبر الزمن",
-                color_discrete_sequence=warm_colors
-            )
-        elif chart_type == "bar":
-            fig = px.bar(
-                df, 
-                x='السنة', 
-                y=col, 
-                color='الدولة',
-                barmode='group',
-                title=f"📊 مقارنة {col}",
-                color_discrete_sequence=warm_colors
-            )
-        elif chart_type == "area":
-            fig = px.area(
-                df, 
-                x='السنة', 
-                y=col, 
-                color='الدولة',
-                title=f"📈 {col} (مخطط مساحي)",
-                color_discrete_sequence=warm_colors
-            )
+    bucket = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anchor = 0
+    
+    for i in range(threshold - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, n)
         
-        # تنسيق الرسم
-        fig.update_layout(
-            font=dict(family="Cairo, Arial", size=14, color='#5D4E37'),
-            title=dict(font=dict(size=18, color='#996515')),
-            paper_bgcolor='rgba(255, 248, 231, 0.8)',
-            plot_bgcolor='rgba(255, 254, 249, 0.9)',
-            legend=dict(
-                bgcolor='rgba(255, 248, 231, 0.8)',
-                bordercolor='#D4AF37',
-                borderwidth=1
-            ),
-            xaxis=dict(
-                gridcolor='rgba(212, 175, 55, 0.3)',
-                title=dict(font=dict(color='#5D4E37'))
-            ),
-            yaxis=dict(
-                gridcolor='rgba(212, 175, 55, 0.3)',
-                title=dict(font=dict(color='#5D4E37'))
-            ),
-            hoverlabel=dict(
-                bgcolor='#5D4E37',
-                font_size=14,
-                font_family="Cairo"
-            )
+        # متوسط الدلو التالي (أو النقطة الأخيرة)
+        if end < next_end:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        
+        area = np.abs(
+            (x[anchor] - avg_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (avg_y - y[anchor])
+        )
+        anchor = start + int(area.argmax())
+        indices[i + 1] = anchor
+    
+    return indices
+
+
+def downsample_panel(df, col, points_budget):
+    """
+    إرجاع (البيانات، هل هي كبيرة) لرسم مؤشر: إذا تجاوز عدد النقاط الميزانية
+    تُختصر سلسلة كل دولة بخوارزمية LTTB إلى نصيبها من الميزانية
+    """
+    
+    data = df[['الدولة', 'السنة', col]].dropna(subset=[col])
+    if not points_budget or len(data) <= points_budget:
+        return df, False
+    
+    data = data.sort_values(['الدولة', 'السنة'], kind='stable')
+    per_series = max(3, points_budget // max(1, data['الدولة'].nunique()))
+    
+    keep = []
+    for _, series in data.groupby('الدولة', sort=False):
+        if len(series) > per_series:
+            picked = lttb_indices(series['السنة'].to_numpy(dtype=float), series[col].to_numpy(dtype=float), per_series)
+            keep.append(series.index.to_numpy()[picked])
+        else:
+            keep.append(series.index.to_numpy())
+    
+    return df.loc[np.concatenate(keep)], True
+
+
+def create_indicator_chart(df, col, chart_type="line", points_budget=None):
+    """
+    إنشاء رسم بياني احترافي لمؤشر واحد بألوان دافئة
+    points_budget: فوق هذا العدد من النقاط يُفعَّل وضع البيانات الكبيرة (WebGL بدون علامات مع اختصار LTTB)
+    """
+    
+    df, large = downsample_panel(df, col, points_budget)
+    
+    if chart_type == "bar":
+        fig = px.bar(
+            df, 
+            x='السنة', 
+            y=col, 
+            color='الدولة',
+            barmode='group',
+            title=f"📊 مقارنة {col}",
+            color_discrete_sequence=WARM_COLORS
+        )
+    elif chart_type == "area":
+        fig = px.area(
+            df, 
+            x='السنة', 
+            y=col, 
+            color='الدولة',
+            title=f"📈 {col} (مخطط مساحي)",
+            color_discrete_sequence=WARM_COLORS
         )
+    else:
+        fig = px.line(
+            df, 
+            x='السنة', 
+            y=col, 
+            color='الدولة',
+            markers=not large,
+            render_mode='webgl' if large else 'auto',
+            title=f"📈 تطور {col} عبر الزمن",
+            color_discrete_sequence=WARM_COLORS
+        )
+    
+    # تنسيق الرسم
+    fig.update_layout(
+        font=dict(family="Cairo, Arial", size=14, color='#5D4E37'),
+        title=dict(font=dict(size=18, color='#996515')),
+        paper_bgcolor='rgba(255, 248, 231, 0.8)',
+        plot_bgcolor='rgba(255, 254, 249, 0.9)',
+        legend=dict(
+            bgcolor='rgba(255, 248, 231, 0.8)',
+            bordercolor='#D4AF37',
+            borderwidth=1
+        ),
+        xaxis=dict(
+            gridcolor='rgba(212, 175, 55, 0.3)',
+            title=dict(font=dict(color='#5D4E37'))
+        ),
+        yaxis=dict(
+            gridcolor='rgba(212, 175, 55, 0.3)',
+            title=dict(font=dict(color='#5D4E37'))
+        ),
+        hoverlabel=dict(
+            bgcolor='#5D4E37',
+            font_size=14,
+            font_family="Cairo"
+        )
+    )
+    
+    return fig
+
+
+def create_small_multiples(df, cols, chart_type="line", points_budget=None):
+    """
+    شبكة مصغرة: شكل واحد (make_subplots) بلوحة لكل مؤشر بدلاً من شكل مستقل لكل مؤشر
+    محور السنوات مشترك، ووسيلة إيضاح واحدة بلون ثابت لكل دولة في جميع اللوحات،
+    ومحور القيم مستقل لكل لوحة. ميزانية النقاط تُقسَّم على اللوحات (مع حد أدنى لكل لوحة)
+    """
+    
+    cols = list(cols)[:SMALL_MULTIPLES_MAX_FACETS]
+    n_cols = 1 if len(cols) == 1 else 2 if len(cols) <= 4 else 3
+    n_rows = max(1, -(-len(cols) // n_cols))
+    facet_budget = max(SMALL_MULTIPLES_MIN_FACET_POINTS, points_budget // len(cols)) if points_budget and cols else None
+    
+    fig = make_subplots(
+        rows=n_rows,
+        cols=n_cols,
+        shared_xaxes=True,
+        subplot_titles=cols,
+        vertical_spacing=min(0.12, 0.5 / n_rows),
+        horizontal_spacing=0.06
+    )
+    
+    countries = list(dict.fromkeys(df['الدولة']))
+    colors = {country: WARM_COLORS[i % len(WARM_COLORS)] for i, country in enumerate(countries)}
+    in_legend = set()
+    traces, rows, columns = [], [], []
+    
+    for i, col in enumerate(cols):
+        data, large = downsample_panel(df, col, facet_budget)
+        data = data[['الدولة', 'السنة', col]].dropna(subset=[col])
+        row, column = i // n_cols + 1, i % n_cols + 1
         
-        charts.append((col, fig))
+        for country, series in data.groupby('الدولة', sort=False):
+            trace_args = dict(
+                x=series['السنة'].to_numpy(),
+                y=series[col].to_numpy(dtype=float),
+                name=country,
+                legendgroup=country,
+                showlegend=country not in in_legend,
+                hovertemplate=f"{country}<br>%{{x}}: %{{y:,.2f}}<extra>{col}</extra>"
+            )
+            in_legend.add(country)
+            
+            if chart_type == "bar":
+                trace = go.Bar(marker_color=colors[country], **trace_args)
+            elif chart_type == "area":
+                trace = go.Scatter(mode='lines', stackgroup=f"facet{i}", line=dict(color=colors[country]), **trace_args)
+            else:
+                scatter = go.Scattergl if large else go.Scatter
+                trace = scatter(mode='lines' if large else 'lines+markers', line=dict(color=colors[country]), **trace_args)
+            
+            traces.append(trace)
+            rows.append(row)
+            columns.append(column)
+    
+    # إضافة جميع المسارات دفعة واحدة (add_trace لكل مسار يعيد التحقق من الشكل كله في كل مرة)
+    if traces:
+        fig.add_traces(traces, rows=rows, cols=columns)
+    
+    # تنسيق الرسم (مرة واحدة للشكل كله)
+    fig.update_layout(
+        height=n_rows * SMALL_MULTIPLES_ROW_HEIGHT + 120,
+        barmode='group',
+        title=dict(text=f"🧩 شبكة مصغرة ({len(cols)} مؤشر)", font=dict(size=18, color='#996515')),
+        font=dict(family="Cairo, Arial", size=12, color='#5D4E37'),
+        paper_bgcolor='rgba(255, 248, 231, 0.8)',
+        plot_bgcolor='rgba(255, 254, 249, 0.9)',
+        legend=dict(
+            bgcolor='rgba(255, 248, 231, 0.8)',
+            bordercolor='#D4AF37',
+            borderwidth=1
+        ),
+        hoverlabel=dict(
+            bgcolor='#5D4E37',
+            font_size=14,
+            font_family="Cairo"
+        ),
+        margin=dict(t=90)
+    )
+    fig.update_annotations(font=dict(size=13, color='#996515'))
+    fig.update_xaxes(gridcolor='rgba(212, 175, 55, 0.3)', showticklabels=True)
+    fig.update_yaxes(gridcolor='rgba(212, 175, 55, 0.3)', autorange=True)
+    
+    return fig
+
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    """ذاكرة الرسوم المشتركة بين إعادات التشغيل والجلسات: كائن الشكل مع إزالة الأقدم استخداماً"""
+    return {"lock": threading.Lock(), "entries": OrderedDict(), "hits": 0, "misses": 0}
+
+
+def _cached_figure(key, build):
+    """
+    إرجاع الشكل من ذاكرة الرسوم أو بناؤه بـ build() وحفظه مع إزالة الأقدم استخداماً
+    يُحفظ كائن go.Figure نفسه (مشترك بين الجلسات فلا يُعدَّل بعد إرجاعه): st.plotly_chart ينسخه
+    بـ to_dict دون تحقق، بينما JSON يتطلب فك الترميز والتحقق الكامل عند كل إصابة
+    """
+    
+    cache = get_figure_cache()
+    
+    with cache["lock"]:
+        fig = cache["entries"].get(key)
+        if fig is not None:
+            cache["entries"].move_to_end(key)
+            cache["hits"] += 1
+            return fig
+    
+    fig = build()
+    
+    with cache["lock"]:
+        cache["misses"] += 1
+        cache["entries"][key] = fig
+        while len(cache["entries"]) > FIGURE_CACHE_MAX_ENTRIES:
+            cache["entries"].popitem(last=False)
+    
+    return fig
+
+
+def cached_indicator_chart(df, col, chart_type="line", fingerprint=None, points_budget=None):
+    """
+    رسم المؤشر من ذاكرة الرسوم إن وُجد لنفس (بصمة البيانات، المؤشر، نوع الرسم، السمة، ميزانية النقاط)
+    إعادة الشكل المحفوظ تتجنب px وupdate_layout ولا تحتاج فك ترميز أو تحقق
+    """
+    
+    key = (fingerprint or _df_fingerprint(df), col, chart_type, CHART_THEME, points_budget)
+    return _cached_figure(key, lambda: create_indicator_chart(df, col, chart_type, points_budget))
+
+
+def cached_small_multiples(df, cols, chart_type="line", fingerprint=None, points_budget=None):
+    """الشبكة المصغرة من ذاكرة الرسوم (المفتاح يشمل قائمة المؤشرات المعروضة)"""
     
-    return charts
+    key = (fingerprint or _df_fingerprint(df), "facets", tuple(cols), chart_type, CHART_THEME, points_budget)
+    return _cached_figure(key, lambda: create_small_multiples(df, cols, chart_type, points_budget))
 
 def create_correlation_heatmap(df):
     """إنشاء خريطة حرارية للارتباطات"""
@@ -2027,6 +4057,11 @@ def generate_html_report(df, analysis_text, charts_data):
             {df.describe().to_html(classes='data-table')}
         </div>
         
+        <div class="section">
+            <h2>📈 إحصائيات النمو</h2>
+            {compute_growth_stats(df).to_html(classes='data-table', index=False, float_format=lambda v: f"{v:,.2f}", na_rep='-')}
+        </div>
+        
         <div class="section">
             <h2>🔢 عينة من البيانات</h2>
             {df.head(20).to_html(classes='data-table', index=False)}
@@ -2054,6 +4089,9 @@ def export_to_excel(df, analysis_text=""):
         # الإحصائيات
         df.describe().to_excel(writer, sheet_name='الإحصائيات')
         
+        # النمو لكل دولة ومؤشر
+        compute_growth_stats(df).to_excel(writer, sheet_name='النمو', index=False)
+        
         # التحليل (إذا وجد)
         if analysis_text:
             analysis_df = pd.DataFrame({'التحليل': [analysis_text]})
@@ -2111,20 +4149,7 @@ def main():
             help="احصل على مفتاح API من: https://aistudio.google.com/apikey"
         )
         
-        if api_key and api_key != st.session_state.get('api_key', ''):
-            st.session_state['api_key'] = api_key
-            
-            if GENAI_AVAILABLE:
-                client, success, message = configure_gemini(api_key)
-                if success:
-                    st.session_state['client'] = client
-                    st.session_state['gemini_configured'] = True
-                    st.success(message)
-                else:
-                    st.session_state['gemini_configured'] = False
-                    st.error(message)
-            else:
-                st.error("❌ مكتبة google-genai غير مثبتة")
+        apply_api_key(api_key)
         
         st.markdown("---")
         
@@ -2174,6 +4199,41 @@ def main():
         
         st.markdown("---")
         
+        # ═══════════════════════════════════════════════════════════════════════
+        # 📚 البحث في الكتالوج الكامل (أكثر من 16,000 مؤشر) - بدون API
+        # ═══════════════════════════════════════════════════════════════════════
+        
+        catalogue_indicators = []
+        with st.expander("📚 البحث في كامل كتالوج مؤشرات البنك الدولي", expanded=False):
+            catalogue_query = st.text_input(
+                "ابحث بالاسم أو الكود أو المصدر:",
+                placeholder="مثال: remittances, NY.GDP.PCAP, literacy",
+                key="catalogue_query"
+            )
+            
+            if catalogue_query:
+                search_started = time.perf_counter()
+                with st.spinner("📚 جاري تحميل فهرس الكتالوج..."):
+                    results = search_indicator_catalogue(catalogue_query, limit=25)
+                search_ms = (time.perf_counter() - search_started) * 1000
+                
+                if results.empty:
+                    st.info("لا توجد نتائج (أو تعذر تحميل الكتالوج)")
+                else:
+                    st.caption(f"⏱️ {len(results)} نتيجة في {search_ms:.1f} ms")
+                    labels = {f"{row.name} ({row.code})": row for row in results.itertuples(index=False)}
+                    selected = st.multiselect(
+                        "أضف مؤشرات إلى البحث:",
+                        options=list(labels),
+                        key="catalogue_selection"
+                    )
+                    catalogue_indicators = [
+                        {"code": labels[label].code, "name": labels[label].name}
+                        for label in selected
+                    ]
+        
+        st.markdown("---")
+        
         # زر البحث
         search_button = st.button(
             "🚀 ابحث الآن",
@@ -2195,18 +4255,13 @@ def main():
                 help="للتقارير والدردشة الذكية فقط - البحث يعمل بدونه!"
             )
             
-            if api_key and api_key != st.session_state.get('api_key', ''):
-                st.session_state['api_key'] = api_key
-                
-                if GENAI_AVAILABLE:
-                    client, success, message = configure_gemini(api_key)
-                    if success:
-                        st.session_state['client'] = client
-                        st.session_state['gemini_configured'] = True
-                        st.success(message)
-                    else:
-                        st.session_state['gemini_configured'] = False
-                        st.error(message)
+            st.checkbox(
+                "إرسال المرشحين فقط إلى Gemini (طلب أصغر وأسرع)",
+                key="ai_candidates_only",
+                help="يُرسل فقط المؤشرات والدول التي اقترحها البحث المحلي بدلاً من الكتالوج المضغوط الكامل"
+            )
+            
+            apply_api_key(api_key)
         
         st.markdown("---")
         
@@ -2219,8 +4274,33 @@ def main():
         )
         chart_type_map = {"خطي": "line", "أعمدة": "bar", "مساحي": "area"}
         
+        points_budget = st.slider(
+            "ميزانية النقاط لكل رسم:",
+            min_value=1000,
+            max_value=50000,
+            value=DEFAULT_CHART_POINTS_BUDGET,
+            step=1000,
+            help="فوق هذا العدد يُستخدم WebGL بدون علامات وتُختصر سلسلة كل دولة (LTTB) - مناسب لـ\"جميع الدول\""
+        )
+        
         show_map = st.checkbox("عرض الخريطة الجغرافية", value=True)
         show_correlation = st.checkbox("عرض مصفوفة الارتباط", value=True)
+        stream_ai = st.checkbox(
+            "عرض إجابات الذكاء الاصطناعي فور كتابتها",
+            value=True,
+            help="بث التقرير والدردشة تدريجياً بدلاً من انتظار النص الكامل"
+        )
+        
+        st.markdown("---")
+        
+        # حالة الاتصال بـ API البنك الدولي (عدادات مشتركة على مستوى العملية)
+        http_stats = get_http_client()["stats"]
+        st.caption(
+            f"🌐 طلبات API: {http_stats['requests']:,} | 🔁 إعادة المحاولة: {http_stats['retries']:,} "
+            f"| ❌ الطلبات الفاشلة: {http_stats['failures']:,}"
+        )
+        if http_stats['failures'] and http_stats['last_error']:
+            st.caption(f"آخر خطأ: {http_stats['last_error']}")
         
         st.markdown("---")
         
@@ -2240,15 +4320,27 @@ def main():
     # ═══════════════════════════════════════════════════════════════════════════
     
     if search_button and query:
-        # أولاً: محاولة البحث المحلي الذكي (بدون API)
-        parsed = smart_local_search(query)
+        # أولاً: محاولة البحث المحلي الذكي (بدون API) مع تصحيح الأخطاء الإملائية
+        parsed = smart_local_search(query, load_countries_catalogue)
+        
+        # المؤشرات المختارة من الكتالوج تحل محل المؤشر الافتراضي إذا لم يُعثر في الطلب على أي مؤشر
+        # (ولو بالمطابقة التقريبية)
+        if parsed and catalogue_indicators and parsed.get('default_indicator'):
+            parsed['indicators'] = []
+        
+        # إذا فشل البحث المحلي: نتيجة تحليل سابقة لطلب مماثل، ثم Gemini
+        st.session_state.pop('ai_parse_stats', None)
+        if not parsed:
+            parsed = get_cached_query_parse(query)
         
-        # إذا فشل البحث المحلي ولدينا API، نستخدم Gemini
         if not parsed and st.session_state.get('gemini_configured'):
             client = st.session_state.get('client')
             if client:
                 with st.spinner("🤖 جاري تحليل طلبك بالذكاء الاصطناعي..."):
-                    parsed = parse_query_with_ai(client, query)
+                    parsed = parse_query_with_ai(
+                        client, query,
+                        candidates_only=st.session_state.get('ai_candidates_only', False)
+                    )
         
         # التحقق من النتائج
         if not parsed or not parsed.get('countries'):
@@ -2263,6 +4355,12 @@ def main():
             """)
             st.stop()
         
+        # إضافة المؤشرات المختارة من الكتالوج الكامل
+        known_codes = {ind.get('code') for ind in parsed.get('indicators') or []}
+        parsed['indicators'] = (parsed.get('indicators') or []) + [
+            ind for ind in catalogue_indicators if ind['code'] not in known_codes
+        ]
+        
         if not parsed.get('indicators'):
             # إضافة مؤشر افتراضي
             parsed['indicators'] = [{"code": "NY.GDP.MKTP.CD", "name": "الناتج المحلي الإجمالي"}]
@@ -2286,16 +4384,32 @@ def main():
             with col3:
                 st.markdown("**📅 الفترة:**")
                 st.markdown(f"من **{parsed.get('start', 2010)}** إلى **{parsed.get('end', 2023)}**")
+            
+            ai_stats = st.session_state.get('ai_parse_stats')
+            if ai_stats:
+                tokens_text = f"{ai_stats['prompt_tokens']:,} رمز" if ai_stats['prompt_tokens'] else f"~{ai_stats['prompt_chars'] // 4:,} رمز (تقديري)"
+                first_token_text = f"{ai_stats['first_token_ms']:,.0f} ms" if ai_stats['first_token_ms'] is not None else "-"
+                st.caption(
+                    f"🤖 طلب Gemini: {tokens_text} | الكتالوج {ai_stats['catalogue_chars']:,} حرف "
+                    f"بدلاً من {ai_stats['legacy_catalogue_chars']:,} | أول رمز بعد {first_token_text} "
+                    f"| الإجمالي {ai_stats['total_ms']:,.0f} ms"
+                )
+            
+            if parsed.get('corrections'):
+                st.caption("🔤 تصحيح تلقائي: " + "، ".join(f"{typed} ← {alias}" for typed, alias in parsed['corrections']))
         
         # جلب البيانات من البنك الدولي
         with st.spinner("📥 جاري جلب البيانات من البنك الدولي..."):
-            df = fetch_world_bank_data(
+            df, failed_requests = fetch_world_bank_data(
                 parsed['countries'],
                 parsed['indicators'],
                 parsed.get('start', 2010),
                 parsed.get('end', 2023)
             )
         
+        if failed_requests > 0:
+            st.warning(f"⚠️ تعذر جلب {failed_requests} طلب من البنك الدولي بعد إعادة المحاولة - قد تكون بعض البيانات ناقصة.")
+        
         if df.empty:
             st.error("❌ لا توجد بيانات متاحة. جرب تغيير الفترة الزمنية أو المؤشرات.")
             st.stop()
@@ -2373,11 +4487,51 @@ def main():
             st.markdown("### 📈 الرسوم البيانية التفاعلية")
             
             chart_type_selected = chart_type_map.get(chart_type, "line")
-            charts = create_professional_charts(df, chart_type_selected)
+            data_fingerprint = _df_fingerprint(df)
+            chart_cols = [c for c in df.columns if c not in ['الدولة', 'CountryCode', 'السنة']]
+            
+            # العرض عند الطلب: لا تُبنى ولا تُرسل إلا الرسوم المعروضة
+            chart_view = st.radio(
+                "طريقة العرض:",
+                ["📄 صفحات", "🎯 مؤشرات مختارة", "🧩 شبكة مصغرة", "📚 عرض الكل"],
+                horizontal=True,
+                key="chart_view_mode"
+            )
+            
+            if chart_view == "📄 صفحات":
+                page_count = max(1, -(-len(chart_cols) // CHARTS_PER_PAGE))
+                page = 1
+                if page_count > 1:
+                    page = st.number_input("الصفحة:", min_value=1, max_value=page_count, value=1, step=1)
+                    st.caption(f"الصفحة {page} من {page_count} ({len(chart_cols)} مؤشر)")
+                visible_cols = chart_cols[(page - 1) * CHARTS_PER_PAGE: page * CHARTS_PER_PAGE]
+            elif chart_view == "🎯 مؤشرات مختارة":
+                visible_cols = st.multiselect(
+                    "المؤشرات المعروضة:",
+                    options=chart_cols,
+                    default=chart_cols[:1]
+                )
+            elif chart_view == "🧩 شبكة مصغرة":
+                visible_cols = []
+                if len(chart_cols) > SMALL_MULTIPLES_MAX_FACETS:
+                    st.caption(f"تُعرض أول {SMALL_MULTIPLES_MAX_FACETS} مؤشر من {len(chart_cols)} في الشبكة")
+                if chart_cols:
+                    fig = cached_small_multiples(df, chart_cols[:SMALL_MULTIPLES_MAX_FACETS], chart_type_selected, data_fingerprint, points_budget)
+                    st.plotly_chart(fig, use_container_width=True)
+            else:
+                visible_cols = chart_cols
             
-            for col_name, fig in charts:
+            for col_name in visible_cols:
+                fig = cached_indicator_chart(df, col_name, chart_type_selected, data_fingerprint, points_budget)
                 st.plotly_chart(fig, use_container_width=True)
                 st.markdown("---")
+            
+            # ذاكرة الرسوم المشتركة (على مستوى العملية)
+            figure_cache = get_figure_cache()
+            st.caption(
+                f"🗂️ ذاكرة الرسوم: {len(figure_cache['entries']):,}/{FIGURE_CACHE_MAX_ENTRIES} شكل "
+                f"| ✅ من الذاكرة: {figure_cache['hits']:,} | 🛠️ بناء جديد: {figure_cache['misses']:,}"
+            )
         
         # ═══════════════════════════════════════════════════════════════════════
         # تبويب 2: الخرائط
@@ -2467,34 +4621,22 @@ def main():
                     )
                     
                     # إنشاء الرسم البياني بدون trendline (لتجنب مشاكل statsmodels)
+                    # النقاط تُختصر وتُرسم بـ WebGL فوق ميزانية النقاط؛ خطوط الاتجاه تُحسب من البيانات الكاملة
+                    scatter_df, large_trend = downsample_panel(df, trend_indicator, points_budget)
                     fig_trend = px.scatter(
-                        df,
+                        scatter_df,
                         x='السنة',
                         y=trend_indicator,
                         color='الدولة',
+                        render_mode='webgl' if large_trend else 'auto',
                         title=f'📈 خط الاتجاه لـ {trend_indicator}',
                         color_discrete_sequence=['#D4AF37', '#B8960C', '#996515', '#8B7355', '#5D4E37']
                     )
                     
-                    # إضافة خطوط الاتجاه يدوياً باستخدام numpy
+                    # خطوط الاتجاه من انحدار مجمّع واحد لجميع الدول (مسار واحد لكل لون)
                     colors = ['#D4AF37', '#B8960C', '#996515', '#8B7355', '#5D4E37']
-                    for i, country in enumerate(df['الدولة'].unique()):
-                        country_df = df[df['الدولة'] == country].dropna(subset=['السنة', trend_indicator])
-                        if len(country_df) >= 2:
-                            x_vals = country_df['السنة'].values
-                            y_vals = country_df[trend_indicator].values
-                            # حساب خط الاتجاه الخطي
-                            z = np.polyfit(x_vals, y_vals, 1)
-                            p = np.poly1d(z)
-                            x_line = np.linspace(x_vals.min(), x_vals.max(), 100)
-                            y_line = p(x_line)
-                            fig_trend.add_scatter(
-                                x=x_line, y=y_line,
-                                mode='lines',
-                                name=f'اتجاه {country}',
-                                line=dict(color=colors[i % len(colors)], dash='dash', width=2),
-                                showlegend=False
-                            )
+                    trends = compute_trend_stats(df, trend_indicator)
+                    fig_trend.add_traces(trend_line_traces(trends, scatter_df['الدولة'].unique(), colors))
                     
                     fig_trend.update_layout(
                         font=dict(family="Cairo, Arial", color='#5D4E37'),
@@ -2503,6 +4645,20 @@ def main():
                     )
                     
                     st.plotly_chart(fig_trend, use_container_width=True)
+                    
+                    if not trends.empty:
+                        st.markdown("#### 📐 معاملات الاتجاه لكل دولة")
+                        st.dataframe(
+                            trends.sort_values('الميل (سنوياً)', ascending=False, na_position='last'),
+                            hide_index=True,
+                            use_container_width=True,
+                            column_config={
+                                'الميل (سنوياً)': st.column_config.NumberColumn(format="%.4g"),
+                                'المقطع': st.column_config.NumberColumn(format="%.4g"),
+                                'R²': st.column_config.NumberColumn(format="%.3f"),
+                                'CAGR %': st.column_config.NumberColumn(format="%.2f")
+                            }
+                        )
         
         # ═══════════════════════════════════════════════════════════════════════
         # تبويب 5: التقرير الذكي
@@ -2510,6 +4666,12 @@ def main():
         
         with tabs[4]:
             st.markdown("### 📝 التقرير التحليلي الذكي")
+            report_streamed = False
+            
+            regenerate_report = st.checkbox(
+                "🔄 إعادة توليد التقرير (تجاهل النسخة المحفوظة لنفس البيانات)",
+                value=False
+            )
             
             if st.button("✨ توليد تقرير ذكي بالذكاء الاصطناعي", type="primary", use_container_width=True):
                 if not st.session_state.get('gemini_configured'):
@@ -2517,18 +4679,37 @@ def main():
                 else:
                     client = st.session_state.get('client')
                     
-                    if client:
+                    if client and stream_ai:
+                        # بث التقرير مباشرة في قسم التقرير ثم حفظ النص الكامل
+                        st.markdown('<div class="report-section">', unsafe_allow_html=True)
+                        st.session_state['analysis'] = st.write_stream(
+                            generate_ai_analysis(
+                                client,
+                                df,
+                                parsed['countries'],
+                                parsed['indicators'],
+                                stream=True,
+                                use_cache=not regenerate_report
+                            )
+                        )
+                        st.markdown("</div>", unsafe_allow_html=True)
+                        report_streamed = True
+                    elif client:
                         with st.spinner("🤖 جاري كتابة التقرير بالذكاء الاصطناعي..."):
                             analysis = generate_ai_analysis(
                                 client,
                                 df,
                                 parsed['countries'],
-                                parsed['indicators']
+                                parsed['indicators'],
+                                use_cache=not regenerate_report
                             )
                             st.session_state['analysis'] = analysis
             
-            # عرض التقرير
-            if st.session_state.get('analysis'):
+            if st.session_state.get('analysis') and st.session_state.get('analysis_from_cache'):
+                st.caption("💾 تقرير محفوظ لنفس البيانات - فعّل \"إعادة توليد التقرير\" للحصول على نسخة جديدة")
+            
+            # عرض التقرير (إلا إذا عُرض للتو أثناء البث)
+            if st.session_state.get('analysis') and not report_streamed:
                 st.markdown("""
                 <div class="report-section">
                 """, unsafe_allow_html=True)
@@ -2565,10 +4746,45 @@ def main():
             
             with col1:
                 if st.button("📤 إرسال", use_container_width=True):
-                    if user_question and st.session_state.get('gemini_configured'):
+                    # الأسئلة التجميعية البسيطة تُجاب محلياً فوراً (بدون مفتاح API)
+                    local_answer = answer_locally(df, user_question, parsed) if user_question else None
+                    if local_answer:
+                        st.session_state['chat_history'].append({
+                            'user': user_question,
+                            'assistant': local_answer
+                        })
+                        record_local_answer(user_question, local_answer)
+                        st.rerun()
+                    elif user_question and st.session_state.get('gemini_configured'):
                         client = st.session_state.get('client')
                         
-                        if client:
+                        if client and stream_ai:
+                            st.markdown(f"""
+                            <div class="user-message">👤 {user_question}</div>
+                            """, unsafe_allow_html=True)
+                            
+                            # تحديث فقاعة الإجابة مع وصول كل جزء
+                            bubble = st.empty()
+                            response = ""
+                            for part in chat_with_data(
+                                client,
+                                df,
+                                user_question,
+                                st.session_state.get('chat_history', []),
+                                stream=True
+                            ):
+                                response += part
+                                bubble.markdown(f"""
+                                <div class="ai-response">🤖 {response}</div>
+                                """, unsafe_allow_html=True)
+                            
+                            st.session_state['chat_history'].append({
+                                'user': user_question,
+                                'assistant': response
+                            })
+                            
+                            st.rerun()
+                        elif client:
                             with st.spinner("🤔 جاري التفكير..."):
                                 response = chat_with_data(
                                     client,
@@ -2587,6 +4803,7 @@ def main():
             with col2:
                 if st.button("🗑️ مسح", use_container_width=True):
                     st.session_state['chat_history'] = []
+                    st.session_state.pop('chat_session', None)
                     st.rerun()
         
         # ═══════════════════════════════════════════════════════════════════════
@@ -2685,4 +4902,7 @@ def main():
 # ═══════════════════════════════════════════════════════════════════════════════
 
 if __name__ == "__main__":
+    # أوامر المشغّل (python wbb5.py ingest-wdi ...)؛ streamlit run لا يمرر وسائط إلا بعد "--"
+    if len(sys.argv) > 1 and sys.argv[1] == "ingest-wdi":
+        sys.exit(ingest_wdi_cli(sys.argv[2:]))
     main()